@@ -1,44 +1,159 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 import sys
 import os
-import joblib
 import numpy as np
 import pandas as pd
+import busqueda
+import catalogo
+import despachador
+import metricas
+import prediccion
+import recarga
+import respuestas
 
 app = Flask(__name__)
 CORS(app)
+# Contadores, latencias y bytes por ruta + fases internas en GET /metrics
+metricas.instrumentar(app)
 
 # --- Cargar modelo ML ---
-model = joblib.load("ML/exoplanet_classifier.joblib")
-encoder = joblib.load("ML/label_encoder.joblib")
-scaler = joblib.load("ML/scaler.joblib")
+# Se recarga en caliente (ver más abajo) cuando ML/ML.py guarda uno nuevo
+modelo_activo = prediccion.ModeloActivo("ML")
+# Las peticiones concurrentes de /predict se clasifican juntas en micro-lotes
+cola_prediccion = despachador.Despachador(modelo_activo.predecir)
+# Espera máxima (s) de /predict por su lote; pasado ese tiempo responde 503
+ESPERA_PREDICCION_S = float(os.environ.get("PREDICT_TIMEOUT_S", "2"))
+metricas.registrar_medidor(
+    "prediccion_cola", "Predicciones esperando en la cola de micro-lotes.",
+    lambda: cola_prediccion.metricas()["cola_actual"],
+)
+metricas.registrar_medidor(
+    "prediccion_lote_medio", "Tamaño medio de los micro-lotes de predicción.",
+    lambda: cola_prediccion.metricas()["lote_medio"],
+)
+metricas.registrar_medidor(
+    "prediccion_cache_aciertos", "Predicciones de /predict servidas desde la caché.",
+    lambda: modelo_activo.cache.aciertos,
+)
+metricas.registrar_medidor(
+    "prediccion_cache_fallos", "Predicciones de /predict que no estaban en la caché.",
+    lambda: modelo_activo.cache.fallos,
+)
 
 # --- Cargar datos de exoplanetas ---
-df = pd.read_csv("exoplanets_visual.csv")
-exoplanetas = df.to_dict(orient="records")
+# El JSON se serializa y comprime una vez por versión del catálogo; los nulos
+# (NaN / <NA> de las columnas tipadas) se envían como null. Solo lleva las
+# columnas del CSV, no las que el catálogo calcula para los visores
+CATALOGO_CSV = "exoplanets_visual.csv"
+catalogo_activo = catalogo.CatalogoActivo(CATALOGO_CSV)
+exoplanetas = respuestas.RespuestaPrecalculada(
+    lambda: respuestas.registros_json(catalogo.load_catalog(CATALOGO_CSV, columns=catalogo.columnas_csv(CATALOGO_CSV))),
+    catalogo_activo.version,
+)
+# Formato columnar binario (?format=bin) con las columnas que usan los simuladores
+exoplanetas_binario = respuestas.RespuestaPrecalculada(
+    lambda: respuestas.columnar_binario(
+        catalogo.load_catalog(CATALOGO_CSV, columns=["ra", "dec", "pl_rade", "hostname"])
+    ),
+    catalogo_activo.version,
+    mimetype=respuestas.FORMATO_BINARIO,
+)
+# Índice de nombres (prefijos + trigramas) para /search
+indice_busqueda = respuestas.PorVersion(lambda: busqueda.construir(CATALOGO_CSV), catalogo_activo.version)
+catalogo_activo.dependientes += [exoplanetas, exoplanetas_binario, indice_busqueda]
+exoplanetas.precalcular()
+exoplanetas_binario.precalcular()
+indice_busqueda.precalcular()
+
+# --- Recarga en caliente ---
+# Un hilo de fondo carga, valida y publica el modelo o el catálogo nuevos
+# cuando cambian sus archivos; las peticiones siguen con la versión anterior
+# mientras tanto. La versión activa va en cada respuesta.
+vigilante = recarga.vigilar(app, recarga.Vigilante())
+vigilante.agregar("modelo", modelo_activo.rutas(), modelo_activo.recargar)
+vigilante.agregar("catálogo", catalogo_activo.rutas(), catalogo_activo.recargar)
 
 # Endpoint para enviar datos de exoplanetas al frontend
 @app.route("/exoplanets", methods=["GET"])
 def get_exoplanets():
-    return jsonify(exoplanetas)
+    if request.args.get("format") == "bin":
+        return exoplanetas_binario.responder()
+    return exoplanetas.responder()
+
+# Búsqueda de planetas y estrellas por nombre: exacta, por prefijo y aproximada
+# GET /search?q=kepler 22&limit=10&tipo=planeta|estrella
+@app.route("/search", methods=["GET"])
+def search():
+    try:
+        texto, limite, columnas = busqueda.leer_consulta(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    version, indice = indice_busqueda.obtener_con_version()
+    resultados = indice.buscar(texto, limite, columnas)
+    respuesta = jsonify({"q": texto, "resultados": resultados})
+    respuesta.headers[respuestas.CABECERA_VERSION] = str(version)
+    return respuesta
+
+# Versión del modelo que hizo la predicción (huella de los .joblib)
+CABECERA_MODELO = "X-Model-Version"
 
 # Endpoint para predecir un nuevo exoplaneta
 @app.route("/predict", methods=["POST"])
 def predict():
     data = request.get_json()
     try:
-        features = np.array([[
-            data["snr"], data["radius"], data["sma"], data["temp"], 
-            data["period"], data["duration"], data["depth"],
-            data["steff"], data["slogg"], data["sr"], data["time0bk"]
-        ]])
-        scaled = scaler.transform(features)
-        pred = model.predict(scaled)
-        label = encoder.inverse_transform(pred)[0]
-        return jsonify({"prediction": label})
+        features = np.array([data[clave] for clave in prediccion.CLAVES], dtype=float)
+        # Las filas repetidas salen de la caché sin pasar por la cola ni el bosque
+        label, _, version = modelo_activo.predecir_fila(
+            features, lambda fila: cola_prediccion.predecir(fila, timeout=ESPERA_PREDICCION_S)
+        )
+        respuesta = jsonify({"prediction": label, "model_version": version})
+        respuesta.headers[CABECERA_MODELO] = version
+        return respuesta
+    except despachador.TimeoutError:
+        respuesta = jsonify({"error": f"La predicción no terminó en {ESPERA_PREDICCION_S} s"})
+        respuesta.headers["Retry-After"] = "1"
+        return respuesta, 503
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
+# Métricas del despachador de micro-lotes (profundidad de cola y tamaños de lote)
+@app.route("/predict/stats", methods=["GET"])
+def predict_stats():
+    return jsonify({**cola_prediccion.metricas(), "model_version": modelo_activo.version,
+                    "catalog_version": catalogo_activo.version(), "recargas": vigilante.recargas,
+                    "recargas_fallidas": vigilante.fallos, "cache": modelo_activo.cache.metricas()})
+
+# Endpoint para clasificar miles de candidatos de una vez (JSON array, CSV o NDJSON).
+# La respuesta es NDJSON en streaming: una línea por candidato, en el mismo orden.
+@app.route("/predict/batch", methods=["POST"])
+def predict_batch():
+    # Todo el lote se clasifica con el modelo activo al empezar, aunque se recargue a mitad
+    modelo = modelo_activo.modelo
+    try:
+        candidatos = prediccion.leer_lote(request.get_data(), request.content_type)
+        lineas = prediccion.predecir_ndjson(modelo, candidatos)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    respuesta = Response(stream_with_context(lineas), mimetype="application/x-ndjson")
+    respuesta.headers[CABECERA_MODELO] = modelo.version
+    return respuesta
+
 if __name__ == "__main__":
-    app.run(debug=True, host="127.0.0.1", port=5001)
+    import argparse
+    import prefork
+
+    parser = argparse.ArgumentParser(description="API de exoplanetas y clasificador.")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="procesos que comparten el modelo ya cargado (0 = servidor de desarrollo)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5001)
+    args = parser.parse_args()
+
+    if args.workers > 0:
+        # Modelo, scaler, encoder y catálogo ya se cargaron al importar: los workers los heredan.
+        # Cada worker arranca su propio hilo de recarga con su primera petición.
+        prefork.servir(app, args.host, args.port, args.workers)
+    else:
+        app.run(debug=True, host=args.host, port=args.port)
@@ -1,38 +1,66 @@
-import pandas as pd
-from sklearn.model_selection import train_test_split
+import argparse
+import json
+import os
+import sys
 from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-from sklearn.metrics import classification_report
-import joblib
+from sklearn.metrics import classification_report, accuracy_score
 
-KOI = pd.read_csv("koi_completo.csv")
+# Esquema de features, paquete del modelo y datos de entrenamiento: módulos de la raíz del proyecto
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import entrenamiento
+import paquete_modelo
 
-features = [
-    'koi_model_snr', 'koi_prad', 'koi_sma', 'koi_teq', 'koi_period',
-    'koi_duration', 'koi_depth', 'koi_steff', 'koi_slogg', 'koi_srad', 'koi_time0bk'
-]
-target = 'koi_disposition'
 
-data = KOI.dropna(subset=features + [target])
+def _entero_o_nada(valor):
+    return None if valor.lower() == "none" else int(valor)
 
-X = data[features]
-y = data[target]
 
-encoder = LabelEncoder()
-y = encoder.fit_transform(y)
+parser = argparse.ArgumentParser(description="Entrena el clasificador de exoplanetas (koi_completo.csv).")
+parser.add_argument("--csv", default="koi_completo.csv")
+parser.add_argument("--n-estimators", type=int, default=200)
+parser.add_argument("--max-depth", type=_entero_o_nada, default=None)
+parser.add_argument("--max-leaf-nodes", type=_entero_o_nada, default=None)
+parser.add_argument("--buscar", action="store_true",
+                    help="Busca hiperparámetros en paralelo e informa accuracy / latencia / tamaño en lugar de entrenar")
+parser.add_argument("--incremental", action="store_true",
+                    help="Reentrena solo con las filas nuevas o cambiadas desde el último modelo y lo publica si no empeora")
+parser.add_argument("--pliegues", type=int, default=entrenamiento.PLIEGUES)
+parser.add_argument("--workers", type=int, default=None, help="Procesos de la búsqueda (por defecto, uno por CPU)")
+parser.add_argument("--presupuesto-ms", type=float, default=None, help="p99 máximo por predicción para recomendar una combinación")
+args = parser.parse_args()
 
-X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+# Filas limpias de las 11 columnas KOI, en el orden de prediccion.CARACTERISTICAS (en caché por contenido del CSV)
+datos = entrenamiento.preparar(args.csv)
 
-scaler = StandardScaler()
-X_train_s = scaler.fit_transform(X_train)
-X_test_s = scaler.transform(X_test)
+if args.buscar:
+    resultados = entrenamiento.buscar(datos, pliegues=args.pliegues, workers=args.workers)
+    print(entrenamiento.informe(resultados, args.presupuesto_ms))
+    with open("busqueda_modelos.json", "w", encoding="utf-8") as f:
+        json.dump(resultados, f, indent=2)
+    print("Resultados guardados en busqueda_modelos.json")
+    sys.exit(0)
 
-model = RandomForestClassifier(n_estimators=200, random_state=42)
+if args.incremental:
+    resumen = entrenamiento.actualizar(datos)
+    print(json.dumps(resumen, ensure_ascii=False))
+    sys.exit(0 if resumen["publicado"] or not resumen["filas_nuevas"] + resumen["filas_retiradas"] else 1)
+
+encoder = datos.encoder()
+scaler = datos.scaler()
+X_train_s, y_train = datos.X_escalada[datos.entrenamiento], datos.y[datos.entrenamiento]
+X_test_s, y_test = datos.X_escalada[datos.prueba], datos.y[datos.prueba]
+
+model = RandomForestClassifier(
+    n_estimators=args.n_estimators, max_depth=args.max_depth, max_leaf_nodes=args.max_leaf_nodes, random_state=42
+)
 model.fit(X_train_s, y_train)
 
 y_pred = model.predict(X_test_s)
 print(classification_report(y_test, y_pred, target_names=encoder.classes_))
 
-joblib.dump(model, "exoplanet_classifier.joblib")
-joblib.dump(encoder, "label_encoder.joblib")
-joblib.dump(scaler, "scaler.joblib")
\ No newline at end of file
+# .joblib, paquete modelo.exo (el que leen los servidores) y estado para --incremental
+version = entrenamiento.publicar(
+    model, encoder, scaler, datos, datos.huellas[datos.entrenamiento],
+    metricas={"accuracy": round(float(accuracy_score(y_test, y_pred)), 4), "filas_entrenamiento": len(y_train)},
+)
+print(f"Paquete {paquete_modelo.NOMBRE} guardado (versión {version})")
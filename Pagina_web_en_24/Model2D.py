@@ -4,15 +4,15 @@ import pandas as pd
 from vispy import scene, color
 from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout, QFormLayout, QLineEdit, QPushButton, QHBoxLayout, QLabel
 from PyQt5.QtGui import QFont
-import joblib
+import catalogo
+import prediccion
 
 # --- Cargar modelo ML ---
-model = joblib.load("ML/exoplanet_classifier.joblib")
-encoder = joblib.load("ML/label_encoder.joblib")
-scaler = joblib.load("ML/scaler.joblib")
+# Paquete ML/modelo.exo (o los .joblib): scaler, clases y bosque compilado
+modelo = prediccion.Modelo("ML")
 
 # --- Cargar datos existentes ---
-df = pd.read_csv("/Users/mariafernandaviloriazapata/Desktop/Pagina_web_en_24/exoplanets_visual.csv")
+df = catalogo.load_catalog()
 koi = pd.read_csv("/Users/mariafernandaviloriazapata/Desktop/Pagina_web_en_24/ML/koi_completo.csv")
 koi_ex = koi.to_dict(orient="records")
 koi_dict = {str(k['kepoi_name']): k for k in koi_ex}
@@ -77,6 +77,10 @@ ys = np.array(ys)
 sizes = np.array(sizes)
 colors_vals = np.array(colors_vals)
 nombres = np.array(nombres)
+# Nombre -> primera posición: buscar un nombre ya no recorre todo el array
+posiciones = {}
+for i, nombre in enumerate(nombres):
+    posiciones.setdefault(nombre, i)
 
 # --- Normalizar colores ---
 if len(colors_vals) > 0 and colors_vals.max() != colors_vals.min():
@@ -176,16 +180,14 @@ class MainWindow(QWidget):
             time0bk = float(self.inputs["Transit Epoch [BKJD]"].text())
             
             datos = np.array([[snr, rade, sma, eqt, period, dur, depth, steff, slogg, StellarR, time0bk]])
-            nuevo_exoplaneta_s = scaler.transform(datos)
-            prediccion = model.predict(nuevo_exoplaneta_s)
-            resultado = encoder.inverse_transform(prediccion)
+            resultado = modelo.predecir(datos)[0]
         except ValueError:
             self.info_label.setText("Error: ingresa valores numéricos correctos")
             return
 
         # Revisar si ya existe
-        if name in nombres:
-            idx = np.where(nombres == name)[0][0]
+        if name in posiciones:
+            idx = posiciones[name]
             self.highlight_idx = idx
             self.new_idx = None
             self.center_camera(xs[idx], ys[idx])
@@ -200,6 +202,7 @@ class MainWindow(QWidget):
         ys = np.append(ys, y0)
         sizes = np.append(sizes, max(2, min(10, rade)))
         nombres = np.append(nombres, name)
+        posiciones[name] = len(nombres) - 1
 
         norm_color = (eqt - colors_vals.min()) / (colors_vals.max() - colors_vals.min())
         color_val = cmap.map(norm_color)[0]
@@ -1,11 +1,19 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_from_directory, stream_with_context
 from flask_cors import CORS
 from dotenv import load_dotenv
 import os
-from openai import OpenAI
+import json
 import subprocess
 import sys
 import pandas as pd
+import numpy as np
+import asistente
+import busqueda
+import catalogo
+import indice_espacial
+import metricas
+import recarga
+import respuestas
 
 load_dotenv()
 
@@ -13,10 +21,22 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 if not OPENAI_API_KEY:
     raise RuntimeError("OPENAI_API_KEY missing")
 
-client = OpenAI(api_key=OPENAI_API_KEY)
+# Cliente compartido (pool de conexiones en un bucle asyncio de fondo) + caché de
+# respuestas. Las rutas esperan la respuesta en su hilo: el límite de llamadas
+# en curso (CHAT_MAX_CONCURRENTES) es lo que evita que el chat acapare el servidor.
+# OPENAI_BASE_URL permite usar otro servidor compatible, p.ej. stub_openai.py
+chat_asistente = asistente.Asistente(OPENAI_API_KEY)
+metricas.registrar_medidor(
+    "chat_cache_aciertos", "Preguntas respondidas desde la caché.", lambda: chat_asistente.cache.aciertos
+)
+metricas.registrar_medidor(
+    "chat_rechazadas", "Peticiones de chat rechazadas con 503 por falta de plazas.", lambda: chat_asistente.rechazadas
+)
 
 app = Flask(__name__)
 CORS(app)
+# Contadores, latencias y bytes por ruta + fases internas en GET /metrics
+metricas.instrumentar(app, estaticos=("static", "static_files"))
 
 @app.route("/")
 def home():
@@ -35,35 +55,189 @@ def chat():
         return jsonify({"error": "Empty message"}), 400
     
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are an expert in exoplanets. Answer clearly in English."},
-                {"role": "user", "content": user_message}
-            ],
-            max_tokens=300
-        )
-        bot_message = response.choices[0].message.content
+        bot_message, _ = chat_asistente.responder(user_message)
         return jsonify({"response": bot_message})
+    except asistente.Ocupado as e:
+        return _ocupado(e)
     except Exception as e:
         return jsonify({"response": f"Error: {str(e)}"}), 500
 
-@app.route("/exoplanets")
-def exoplanets():
-    base_dir = os.path.dirname(__file__)
-    csv_path = os.path.join(base_dir, "exoplanets_visual.csv")
-    # Fallback to ML/ if the file is stored there
-    if not os.path.exists(csv_path):
-        csv_path = os.path.join(base_dir, "ML", "exoplanets_visual.csv")
-    df = pd.read_csv(csv_path)
+def _ocupado(error):
+    # Sin plaza para otra llamada al modelo: se responde al momento sin retener el hilo
+    respuesta = jsonify({"error": str(error)})
+    respuesta.headers["Retry-After"] = "1"
+    return respuesta, 503
+
+def _evento(datos, tipo=None):
+    linea = f"event: {tipo}\n" if tipo else ""
+    return f"{linea}data: {json.dumps(datos)}\n\n"
+
+@app.route("/chat/stream", methods=["GET", "POST"])
+def chat_stream():
+    # GET ?message=... para EventSource; POST {"message": ...} para fetch
+    if request.method == "POST":
+        user_message = (request.get_json(silent=True) or {}).get("message", "").strip()
+    else:
+        user_message = request.args.get("message", "").strip()
+    if not user_message:
+        return jsonify({"error": "Empty message"}), 400
+    # La plaza se reserva antes de empezar a responder, para poder devolver 503
+    try:
+        partes = chat_asistente.transmitir(user_message)
+    except asistente.Ocupado as e:
+        return _ocupado(e)
+
+    def eventos():
+        # Server-sent events: un evento por fragmento de texto y uno final
+        try:
+            for parte in partes:
+                yield _evento({"token": parte})
+            yield _evento({}, "fin")
+        except Exception as e:
+            yield _evento({"error": str(e)}, "error")
+
+    respuesta = Response(stream_with_context(eventos()), mimetype="text/event-stream")
+    # Libera la plaza aunque el cliente se desconecte antes de leer nada
+    if hasattr(partes, "close"):
+        respuesta.call_on_close(partes.close)
+    respuesta.headers["Cache-Control"] = "no-cache"
+    respuesta.headers["X-Accel-Buffering"] = "no"
+    return respuesta
+
+PARAMETROS_VISTA = ("bbox", "radec", "zoom", "limit")
+
+def _construir_vista():
+    # Catálogo columnar compartido (memory-mapped): el CSV solo se parsea una vez.
+    # Falls back to ML/exoplanets_visual.csv if the root file is missing.
+    df = catalogo.load_catalog(columns=['ra', 'dec', 'pl_rade', 'hostname'])
 
     # Normalizar RA y Dec al rango 0-1 para el canvas
-    df['x'] = (df['ra'] - df['ra'].min()) / (df['ra'].max() - df['ra'].min())
-    df['y'] = (df['dec'] - df['dec'].min()) / (df['dec'].max() - df['dec'].min())
+    rangos = (df['ra'].min(), df['ra'].max(), df['dec'].min(), df['dec'].max())
+    df['x'] = (df['ra'] - rangos[0]) / (rangos[1] - rangos[0])
+    df['y'] = (df['dec'] - rangos[2]) / (rangos[3] - rangos[2])
 
     # Seleccionar solo las columnas necesarias
-    data = df[['x', 'y', 'pl_rade', 'hostname']].to_dict(orient="records")
-    return jsonify(data)
+    df = df[['x', 'y', 'pl_rade', 'hostname']]
+    with metricas.fase("indice_espacial"):
+        indice = indice_espacial.IndiceCuadricula(df['x'], df['y'])
+    return df, indice, rangos
+
+
+def _exoplanets_json():
+    df = vista_exoplanets.obtener()[0]
+    return respuestas.registros_json(df)
+
+
+# Versión del catálogo en servicio: la cambia el hilo de recarga cuando la nueva está lista
+catalogo_activo = catalogo.CatalogoActivo()
+# Posiciones normalizadas e índice espacial, recalculados solo si cambia el catálogo
+vista_exoplanets = respuestas.PorVersion(_construir_vista, catalogo_activo.version)
+# JSON serializado y comprimido una vez por versión del catálogo (ETag + 304)
+exoplanets_respuesta = respuestas.RespuestaPrecalculada(_exoplanets_json, catalogo_activo.version)
+# Las mismas columnas en formato columnar binario (?format=bin) para los simuladores
+exoplanets_binario = respuestas.RespuestaPrecalculada(
+    lambda: respuestas.columnar_binario(vista_exoplanets.obtener()[0]),
+    catalogo_activo.version,
+    mimetype=respuestas.FORMATO_BINARIO,
+)
+# Índice de nombres (prefijos + trigramas) para /search
+indice_busqueda = respuestas.PorVersion(lambda: busqueda.construir(catalogo_activo.csv_path), catalogo_activo.version)
+catalogo_activo.dependientes += [vista_exoplanets, exoplanets_respuesta, exoplanets_binario, indice_busqueda]
+try:
+    vista_exoplanets.precalcular()
+    exoplanets_respuesta.precalcular()
+    exoplanets_binario.precalcular()
+    indice_busqueda.precalcular()
+except FileNotFoundError:
+    print("⚠️ No se encontró exoplanets_visual.csv: /exoplanets fallará hasta que exista.")
+
+# Recarga en caliente: el catálogo nuevo (p.ej. tras el pipeline) se carga y
+# precalcula en segundo plano y se publica sin reiniciar el servidor
+vigilante = recarga.vigilar(app, recarga.Vigilante())
+vigilante.agregar("catálogo", catalogo_activo.rutas(), catalogo_activo.recargar)
+
+
+def _numeros(texto, nombre, cantidad):
+    try:
+        valores = [float(v) for v in texto.split(",")]
+    except ValueError:
+        valores = []
+    if len(valores) != cantidad or not all(np.isfinite(valores)):
+        raise ValueError(f"'{nombre}' debe tener {cantidad} números separados por comas")
+    return valores
+
+
+def _leer_vista(args, rangos):
+    """Rectángulo normalizado (x_min, y_min, x_max, y_max), límite y zoom de la consulta."""
+    if "bbox" in args:
+        x_min, y_min, x_max, y_max = _numeros(args["bbox"], "bbox", 4)
+    elif "radec" in args:
+        ra_min, dec_min, ra_max, dec_max = _numeros(args["radec"], "radec", 4)
+        ra0, ra1, dec0, dec1 = rangos
+        x_min, x_max = ((ra - ra0) / (ra1 - ra0) for ra in (ra_min, ra_max))
+        y_min, y_max = ((dec - dec0) / (dec1 - dec0) for dec in (dec_min, dec_max))
+    else:
+        x_min, y_min, x_max, y_max = 0.0, 0.0, 1.0, 1.0
+    if x_min > x_max or y_min > y_max:
+        raise ValueError("el rectángulo debe cumplir mínimo <= máximo")
+
+    try:
+        limite = int(args.get("limit", indice_espacial.LIMITE_POR_DEFECTO))
+        zoom = int(args["zoom"]) if "zoom" in args else indice_espacial.zoom_para(x_min, y_min, x_max, y_max)
+    except ValueError:
+        raise ValueError("'limit' y 'zoom' deben ser enteros")
+    if limite <= 0 or not 0 <= zoom <= 20:
+        raise ValueError("'limit' debe ser positivo y 'zoom' estar entre 0 y 20")
+    return (x_min, y_min, x_max, y_max), limite, zoom
+
+
+@app.route("/exoplanets")
+def exoplanets():
+    vista = any(parametro in request.args for parametro in PARAMETROS_VISTA)
+    if request.args.get("format") == "bin":
+        if vista:
+            return jsonify({"error": "format=bin solo está disponible para el catálogo completo"}), 400
+        return exoplanets_binario.responder()
+    # Sin parámetros de vista: el catálogo completo, precalculado
+    if not vista:
+        return exoplanets_respuesta.responder()
+
+    version, (df, indice, rangos) = vista_exoplanets.obtener_con_version()
+    try:
+        rectangulo, limite, zoom = _leer_vista(request.args, rangos)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    indices = indice.consultar(*rectangulo)
+    campos = {"zoom": zoom, "total": int(len(indices))}
+    if zoom < indice_espacial.ZOOM_DETALLE and len(indices) > limite:
+        # Poco zoom: grupos de planetas (centroide, número y radio máximo)
+        clusters = indice.agrupar(indices, zoom, df['pl_rade'])
+        datos = respuestas.registros_json(pd.DataFrame(clusters))
+        cuerpo = respuestas.sobre_json(datos, tipo="clusters", truncado=False, **campos)
+    else:
+        # Zoom alto: planetas individuales, los más grandes primero si superan el límite
+        if len(indices) > limite:
+            radios = np.nan_to_num(df['pl_rade'].to_numpy(dtype=float, na_value=np.nan)[indices], nan=-np.inf)
+            indices = np.sort(indices[np.argsort(-radios, kind="stable")[:limite]])
+        datos = respuestas.registros_json(df.iloc[indices])
+        cuerpo = respuestas.sobre_json(datos, tipo="planetas", truncado=len(indices) < campos["total"], **campos)
+    respuesta = app.response_class(cuerpo, mimetype="application/json")
+    respuesta.headers[respuestas.CABECERA_VERSION] = str(version)
+    return respuesta
+
+# Búsqueda de planetas y estrellas por nombre: exacta, por prefijo y aproximada
+# GET /search?q=kepler 22&limit=10&tipo=planeta|estrella
+@app.route("/search")
+def search():
+    try:
+        texto, limite, columnas = busqueda.leer_consulta(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    version, indice = indice_busqueda.obtener_con_version()
+    respuesta = jsonify({"q": texto, "resultados": indice.buscar(texto, limite, columnas)})
+    respuesta.headers[respuestas.CABECERA_VERSION] = str(version)
+    return respuesta
 
 if __name__ == "__main__":
     app.run(host="127.0.0.1", port=5001, debug=True)
\ No newline at end of file
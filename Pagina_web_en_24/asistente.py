@@ -0,0 +1,213 @@
+# asistente.py
+# Chat del explorador de exoplanetas sin dejar sin hilos al resto de rutas.
+#
+# Todas las llamadas al modelo se hacen con un único cliente AsyncOpenAI (con su
+# pool de conexiones HTTP) que vive en un bucle asyncio propio, en un hilo de
+# fondo. Para el servidor WSGI las rutas siguen siendo síncronas: la petición
+# de /chat ocupa su hilo mientras espera la respuesta completa, y la de
+# /chat/stream mientras dura el stream. Lo que protege al resto de rutas es un
+# límite de concurrencia: solo se admiten MAX_CONCURRENTES llamadas al modelo a
+# la vez, y las demás se rechazan al momento con Ocupado (la ruta responde 503)
+# en lugar de quedarse esperando y acaparar hilos que necesitan /exoplanets y
+# los visores. Las respuestas se guardan en una caché LRU con caducidad,
+# indexada por la pregunta normalizada; las que salen de la caché no ocupan
+# plaza.
+#
+# OPENAI_BASE_URL permite apuntar a otro servidor con la misma API, p.ej. el
+# servidor de pruebas local (stub_openai.py).
+
+import asyncio
+import os
+import queue
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from openai import AsyncOpenAI
+
+from metricas import fase
+
+MODELO = "gpt-4o-mini"
+MAX_TOKENS = 300
+SISTEMA = "You are an expert in exoplanets. Answer clearly in English."
+TIMEOUT_S = 60.0
+CACHE_MAXIMO = 512
+CACHE_TTL_S = 3600.0
+# Llamadas al modelo en curso a la vez (cada una retiene un hilo del servidor)
+MAX_CONCURRENTES = int(os.getenv("CHAT_MAX_CONCURRENTES", "4"))
+
+_FIN = object()
+
+
+class Ocupado(Exception):
+    """Todas las plazas de llamadas al modelo están en uso."""
+
+
+def normalizar(pregunta):
+    """Clave de caché: minúsculas, espacios colapsados y sin puntuación final."""
+    return re.sub(r"\s+", " ", pregunta).strip().lower().rstrip("?!.¿¡ ")
+
+
+class CacheLRU:
+    """Caché LRU con caducidad (TTL) y segura entre hilos."""
+
+    def __init__(self, maximo=CACHE_MAXIMO, ttl=CACHE_TTL_S):
+        self.maximo = maximo
+        self.ttl = ttl
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, clave):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None or entrada[0] < time.monotonic():
+                self._datos.pop(clave, None)
+                self.fallos += 1
+                return None
+            self._datos.move_to_end(clave)
+            self.aciertos += 1
+            return entrada[1]
+
+    def guardar(self, clave, valor):
+        with self._lock:
+            self._datos[clave] = (time.monotonic() + self.ttl, valor)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.maximo:
+                self._datos.popitem(last=False)
+
+
+class Asistente:
+    """Cliente de chat compartido: bucle asyncio en segundo plano, caché de respuestas y
+    límite de llamadas al modelo en curso (quien llama espera el resultado en su hilo)."""
+
+    def __init__(self, api_key, base_url=None, modelo=MODELO, timeout=TIMEOUT_S, cache=None,
+                 concurrentes=MAX_CONCURRENTES):
+        self.modelo = modelo
+        self.timeout = timeout
+        self.cache = cache if cache is not None else CacheLRU()
+        self.concurrentes = concurrentes
+        self._plazas = threading.BoundedSemaphore(concurrentes)
+        # Peticiones rechazadas por falta de plaza (lo leen las métricas desde otro hilo)
+        self._lock = threading.Lock()
+        self.rechazadas = 0
+        self._bucle = asyncio.new_event_loop()
+        threading.Thread(target=self._bucle.run_forever, name="asistente", daemon=True).start()
+        # El cliente (y su pool de conexiones) se crea dentro del bucle que lo usará
+        self._cliente = asyncio.run_coroutine_threadsafe(
+            self._crear_cliente(api_key, base_url or os.getenv("OPENAI_BASE_URL"), timeout), self._bucle
+        ).result()
+
+    @staticmethod
+    async def _crear_cliente(api_key, base_url, timeout):
+        return AsyncOpenAI(api_key=api_key, base_url=base_url, timeout=timeout, max_retries=1)
+
+    def _mensajes(self, pregunta):
+        return [
+            {"role": "system", "content": SISTEMA},
+            {"role": "user", "content": pregunta},
+        ]
+
+    async def _completar(self, pregunta):
+        respuesta = await self._cliente.chat.completions.create(
+            model=self.modelo, messages=self._mensajes(pregunta), max_tokens=MAX_TOKENS
+        )
+        return respuesta.choices[0].message.content
+
+    def _reservar(self):
+        # Ocupado al momento si no hay plaza: nunca se espera a que se libere una
+        if not self._plazas.acquire(blocking=False):
+            with self._lock:
+                self.rechazadas += 1
+            raise Ocupado(f"Chat busy: {self.concurrentes} requests already in progress, try again shortly")
+
+    def responder(self, pregunta):
+        """Respuesta completa (de la caché si la pregunta ya se hizo). Devuelve (texto, en_cache).
+
+        Ocupado si ya hay MAX_CONCURRENTES llamadas al modelo en curso.
+        """
+        clave = normalizar(pregunta)
+        guardada = self.cache.obtener(clave)
+        if guardada is not None:
+            return guardada, True
+        self._reservar()
+        try:
+            futuro = asyncio.run_coroutine_threadsafe(self._completar(pregunta), self._bucle)
+            try:
+                with fase("chat_modelo"):
+                    texto = futuro.result(self.timeout)
+            except BaseException:
+                futuro.cancel()
+                raise
+        finally:
+            self._plazas.release()
+        self.cache.guardar(clave, texto)
+        return texto, False
+
+    async def _transmitir(self, pregunta, salida):
+        partes = []
+        try:
+            stream = await self._cliente.chat.completions.create(
+                model=self.modelo, messages=self._mensajes(pregunta), max_tokens=MAX_TOKENS, stream=True
+            )
+            async for evento in stream:
+                if evento.choices and evento.choices[0].delta.content:
+                    partes.append(evento.choices[0].delta.content)
+                    salida.put(partes[-1])
+            self.cache.guardar(normalizar(pregunta), "".join(partes))
+            salida.put(_FIN)
+        except Exception as e:
+            salida.put(e)
+
+    def transmitir(self, pregunta):
+        """Iterador de fragmentos de texto a medida que llegan (uno solo si estaba en caché).
+
+        La plaza se reserva aquí, antes de empezar la respuesta (Ocupado si no
+        queda ninguna), y se libera al agotar el iterador o al llamar a close().
+        """
+        guardada = self.cache.obtener(normalizar(pregunta))
+        if guardada is not None:
+            return iter([guardada])
+        self._reservar()
+        return _Transmision(self, pregunta)
+
+
+class _Transmision:
+    """Fragmentos de una respuesta en streaming; close() corta el stream y libera la plaza."""
+
+    def __init__(self, asistente, pregunta):
+        self._asistente = asistente
+        self._salida = queue.Queue()
+        self._futuro = asyncio.run_coroutine_threadsafe(asistente._transmitir(pregunta, self._salida), asistente._bucle)
+        self._lock = threading.Lock()
+        self._abierta = True
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if not self._abierta:
+            raise StopIteration
+        try:
+            parte = self._salida.get(timeout=self._asistente.timeout)
+        except BaseException:
+            self.close()
+            raise
+        if parte is _FIN:
+            self.close()
+            raise StopIteration
+        if isinstance(parte, Exception):
+            self.close()
+            raise parte
+        return parte
+
+    def close(self):
+        with self._lock:
+            if not self._abierta:
+                return
+            self._abierta = False
+        # Si el cliente se desconecta a mitad, se deja de leer del modelo
+        self._futuro.cancel()
+        self._asistente._plazas.release()
@@ -0,0 +1,150 @@
+# bosque.py
+# Motor de inferencia para el RandomForestClassifier de ML/ML.py.
+#
+# predict_proba de sklearn recorre los 200 árboles uno a uno desde Python:
+# con una sola fila casi todo el tiempo se va en esa sobrecarga. Aquí el
+# bosque se compila a arrays de nodos contiguos (todos los árboles seguidos),
+# indexados por 2 * nodo + lado (0 izquierda, 1 derecha) para que bajar un
+# nivel no necesite multiplicar:
+#   caracteristica2  intp     feature que se compara en el nodo
+#   umbral2          float64  se va a la izquierda si x <= umbral
+#   hijos2           intp     2 * hijo de ese lado (las hojas apuntan a sí mismas)
+#   es_hoja2         bool     el nodo es una hoja
+#   proba_hoja       float64  probabilidades de cada clase por nodo (n_nodos x clases)
+#   raices           intp     nodo raíz de cada árbol
+# Los índices son intp para que numpy no los convierta en cada gather. Todas
+# las parejas (fila, árbol) bajan un nivel a la vez con gathers vectorizados;
+# las que llegan a una hoja salen del recorrido.
+#
+# El resultado es idéntico al de sklearn: X se pasa a float32 igual que hace
+# sklearn antes de comparar con los umbrales, las hojas dan las mismas
+# probabilidades que DecisionTreeClassifier.predict_proba (las versiones
+# recientes guardan en tree_.value fracciones y las usan tal cual; las antiguas
+# guardaban recuentos y los normalizaban), y las probabilidades se suman árbol
+# a árbol en el mismo orden (cumsum) antes de dividir por el número de árboles.
+#
+# Los arrays se pueden guardar y abrir con memory-mapping tal cual (ver
+# paquete_modelo.py): ARRAYS es la lista de los que forman el bosque.
+
+import numpy as np
+
+FILAS_POR_BLOQUE = 256   # filas que se recorren juntas (los arrays de trabajo caben en caché)
+NIVELES_POR_PODA = 4     # cada cuántos niveles se quitan las parejas que ya están en una hoja
+_HOJA = -1               # sklearn.tree._tree.TREE_LEAF
+ARRAYS = ("caracteristica2", "umbral2", "hijos2", "es_hoja2", "proba_hoja", "raices")
+
+
+class BosquePlano:
+    """RandomForestClassifier de sklearn compilado a arrays de nodos."""
+
+    def __init__(self, caracteristica2, umbral2, hijos2, es_hoja2, proba_hoja, raices, profundidad,
+                 classes_, n_features_in_):
+        self.caracteristica2 = caracteristica2
+        self.umbral2 = umbral2
+        self.hijos2 = hijos2
+        self.es_hoja2 = es_hoja2
+        self.proba_hoja = proba_hoja
+        self.raices = raices
+        self.profundidad = int(profundidad)
+        self.classes_ = classes_
+        self.n_features_in_ = int(n_features_in_)
+
+    @classmethod
+    def desde_sklearn(cls, modelo):
+        """Compila un RandomForestClassifier ya entrenado (una sola salida)."""
+        if getattr(modelo, "n_outputs_", 1) != 1:
+            raise ValueError("Solo se admiten bosques de una sola salida")
+        arboles = [estimador.tree_ for estimador in modelo.estimators_]
+        n_clases = len(modelo.classes_)
+        caracteristica, umbral, hijos, es_hoja, proba_hoja, raices = [], [], [], [], [], []
+        base = 0
+        for arbol in arboles:
+            propios = np.arange(arbol.node_count)
+            hoja = arbol.children_left == _HOJA
+            izquierdo = np.where(hoja, propios, arbol.children_left) + base
+            derecho = np.where(hoja, propios, arbol.children_right) + base
+            caracteristica.append(np.where(hoja, 0, arbol.feature))
+            umbral.append(np.where(hoja, 0.0, arbol.threshold))
+            hijos.append(np.column_stack([izquierdo, derecho]).ravel())
+            es_hoja.append(hoja)
+            # Igual que DecisionTreeClassifier.predict_proba: las fracciones (la raíz
+            # suma 1) se usan tal cual; los recuentos se normalizan por nodo
+            valores = arbol.value[:, 0, :n_clases].astype(np.float64)
+            if not np.isclose(valores[0].sum(), 1.0):
+                normalizador = valores.sum(axis=1)[:, np.newaxis]
+                normalizador[normalizador == 0.0] = 1.0
+                valores = valores / normalizador
+            proba_hoja.append(valores)
+            raices.append(base)
+            base += arbol.node_count
+        return cls(
+            caracteristica2=np.repeat(np.concatenate(caracteristica), 2).astype(np.intp),
+            umbral2=np.repeat(np.concatenate(umbral), 2).astype(np.float64),
+            hijos2=2 * np.concatenate(hijos).astype(np.intp),
+            es_hoja2=np.repeat(np.concatenate(es_hoja), 2),
+            proba_hoja=np.concatenate(proba_hoja),
+            raices=np.array(raices, dtype=np.intp),
+            profundidad=max(arbol.max_depth for arbol in arboles),
+            classes_=modelo.classes_,
+            n_features_in_=modelo.n_features_in_,
+        )
+
+    def arrays(self):
+        """Arrays del bosque por nombre (los de ARRAYS)."""
+        return {nombre: getattr(self, nombre) for nombre in ARRAYS}
+
+    @property
+    def n_arboles(self):
+        return len(self.raices)
+
+    def _preparar(self, X):
+        X = np.asarray(X)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(f"Se esperaban {self.n_features_in_} features por fila, llegó la forma {X.shape}")
+        # Mismo tipo con el que sklearn recorre los árboles
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if not np.isfinite(X).all():
+            raise ValueError("X contiene NaN, infinitos o valores demasiado grandes para float32")
+        return X
+
+    def hojas(self, X):
+        """Índice (global) de la hoja a la que llega cada fila en cada árbol: (n, árboles)."""
+        X = self._preparar(X)
+        return np.vstack([self._hojas(X[i:i + FILAS_POR_BLOQUE]) for i in range(0, len(X), FILAS_POR_BLOQUE)]) \
+            if len(X) else np.empty((0, self.n_arboles), dtype=np.int32)
+
+    def _hojas(self, X):
+        valores = X.ravel()
+        hojas = np.tile(self.raices, len(X))
+        # Parejas (fila, árbol) que aún no llegaron a una hoja, dónde empieza su
+        # fila en 'valores', y su nodo actual como 2 * nodo (posición en 'hijos')
+        activas = np.arange(len(hojas))
+        inicio_fila = np.repeat(np.arange(len(X)) * X.shape[1], self.n_arboles)
+        nodo2 = 2 * hojas
+        for nivel in range(1, self.profundidad + 1):
+            indices = self.caracteristica2[nodo2]
+            if len(X) > 1:
+                indices += inicio_fila
+            x = valores[indices]
+            nodo2 = self.hijos2[nodo2 + (x > self.umbral2[nodo2])]
+            if nivel % NIVELES_POR_PODA == 0:
+                # Las que llegaron a su hoja salen del recorrido
+                sigue = ~self.es_hoja2[nodo2]
+                hojas[activas] = nodo2 // 2
+                activas, nodo2, inicio_fila = activas[sigue], nodo2[sigue], inicio_fila[sigue]
+                if not len(activas):
+                    break
+        hojas[activas] = nodo2 // 2
+        return hojas.reshape(len(X), self.n_arboles)
+
+    def predict_proba(self, X):
+        """Probabilidad de cada clase (n x clases), igual que RandomForestClassifier.predict_proba."""
+        por_arbol = self.proba_hoja[self.hojas(X)]
+        # Suma secuencial árbol a árbol, en el mismo orden que sklearn
+        proba = np.cumsum(por_arbol, axis=1)[:, -1] if self.n_arboles else por_arbol.sum(axis=1)
+        proba /= self.n_arboles
+        return proba
+
+    def predict(self, X):
+        """Clase de cada fila, igual que RandomForestClassifier.predict."""
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
@@ -0,0 +1,176 @@
+# busqueda.py
+# Búsqueda de planetas (pl_name) y estrellas (hostname) por nombre.
+#
+# El índice se construye una vez por versión del catálogo:
+#   - los nombres normalizados ("Kepler-22 b" -> "kepler22b") en una lista
+#     ordenada: las coincidencias por prefijo son un rango contiguo que se
+#     encuentra con dos bisect, sin mirar el resto de nombres;
+#   - un índice invertido de trigramas (trigrama -> posiciones, int32) para
+#     las búsquedas aproximadas ("keplr 22"): se cuentan los trigramas en común
+#     con np.bincount y se puntúa con el índice de Jaccard.
+# Orden de los resultados: coincidencia exacta, prefijos (los más cortos
+# primero) y después los aproximados por similitud.
+#
+# Uso desde Python:  busqueda.buscar("kepler 22", limite=5)
+# y por HTTP:         GET /search?q=kepler%2022&limit=5  (app.py y Flask.py)
+
+import bisect
+import math
+import threading
+import unicodedata
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+
+import catalogo
+
+# columna del catálogo -> tipo de resultado
+COLUMNAS = {"pl_name": "planeta", "hostname": "estrella"}
+LIMITE_POR_DEFECTO = 10
+LIMITE_MAXIMO = 100
+# Similitud de trigramas mínima para una coincidencia aproximada
+UMBRAL_APROXIMADO = 0.3
+
+_lock = threading.Lock()
+# ruta del CSV -> (versión del catálogo, IndiceCatalogo)
+_cache = {}
+
+
+def normalizar(texto):
+    """Clave de búsqueda: sin acentos, en minúsculas y solo letras y dígitos."""
+    texto = unicodedata.normalize("NFKD", str(texto))
+    return "".join(c for c in texto.lower() if c.isalnum() and not unicodedata.combining(c))
+
+
+def trigramas(clave):
+    """Trigramas de la clave con marcas de inicio y fin ('^' y '$')."""
+    marcada = f"^{clave}$"
+    return {marcada[i:i + 3] for i in range(len(marcada) - 2)}
+
+
+class IndiceNombres:
+    """Índice de prefijos y de trigramas sobre una lista de nombres."""
+
+    def __init__(self, nombres):
+        unicos = pd.Series(nombres).dropna().astype(str).unique()
+        claves = [normalizar(nombre) for nombre in unicos]
+        orden = sorted(range(len(unicos)), key=claves.__getitem__)
+        # Nombre original y clave normalizada, en el orden de las claves
+        self.nombres = [unicos[i] for i in orden]
+        self.claves = [claves[i] for i in orden]
+
+        self._largos = np.array([len(clave) for clave in self.claves], dtype=np.int32)
+        listas = defaultdict(list)
+        cuantos = np.zeros(len(self.claves), dtype=np.int32)
+        for posicion, clave in enumerate(self.claves):
+            propios = trigramas(clave)
+            cuantos[posicion] = len(propios)
+            for trigrama in propios:
+                listas[trigrama].append(posicion)
+        self._trigramas = {t: np.array(posiciones, dtype=np.int32) for t, posiciones in listas.items()}
+        self._cuantos = cuantos
+
+    def __len__(self):
+        return len(self.claves)
+
+    def _prefijo(self, clave, limite):
+        # Posición -> puntuación de los 'limite' nombres más cortos que empiezan por la clave
+        inicio = bisect.bisect_left(self.claves, clave)
+        fin = bisect.bisect_left(self.claves, clave + "\uffff", inicio)
+        posiciones = np.arange(inicio, fin)
+        if len(posiciones) > limite:
+            posiciones = inicio + np.argpartition(self._largos[inicio:fin], limite)[:limite]
+        # 1.0 la exacta; el resto entre 0.5 y 1 según cuánto del nombre cubre la búsqueda
+        return {int(p): 0.5 + 0.5 * len(clave) / int(self._largos[p]) for p in posiciones}
+
+    def _aproximados(self, clave, limite, excluir):
+        propios = trigramas(clave)
+        listas = [self._trigramas[t] for t in propios if t in self._trigramas]
+        if not listas:
+            return {}
+        comunes = np.bincount(np.concatenate(listas), minlength=len(self.claves))
+        # Jaccard >= umbral exige al menos umbral * |trigramas de la búsqueda| en común
+        candidatos = np.flatnonzero(comunes >= math.ceil(UMBRAL_APROXIMADO * len(propios)))
+        en_comun = comunes[candidatos]
+        similitud = en_comun / (len(propios) + self._cuantos[candidatos] - en_comun)
+        validos = similitud >= UMBRAL_APROXIMADO
+        candidatos, similitud = candidatos[validos], similitud[validos]
+        tope = limite + len(excluir)
+        if len(candidatos) > tope:
+            mejores = np.argpartition(-similitud, tope)[:tope]
+            candidatos, similitud = candidatos[mejores], similitud[mejores]
+        # Por debajo de cualquier prefijo (como mucho 0.5)
+        return {
+            int(posicion): 0.5 * float(valor)
+            for posicion, valor in zip(candidatos, similitud)
+            if int(posicion) not in excluir
+        }
+
+    def buscar(self, texto, limite=LIMITE_POR_DEFECTO):
+        """Lista de (nombre, puntuación) ordenada de mejor a peor."""
+        clave = normalizar(texto)
+        if not clave or limite <= 0:
+            return []
+        resultados = self._prefijo(clave, limite)
+        if len(resultados) < limite:
+            resultados.update(self._aproximados(clave, limite - len(resultados), resultados))
+        mejores = sorted(resultados.items(), key=lambda par: (-par[1], par[0]))[:limite]
+        return [(self.nombres[posicion], puntuacion) for posicion, puntuacion in mejores]
+
+
+class IndiceCatalogo:
+    """Índices de nombres de las columnas de COLUMNAS de un DataFrame del catálogo."""
+
+    def __init__(self, df):
+        self.indices = {col: IndiceNombres(df[col]) for col in COLUMNAS if col in df.columns}
+
+    def buscar(self, texto, limite=LIMITE_POR_DEFECTO, columnas=None):
+        """Coincidencias de todas las columnas pedidas, mezcladas por puntuación."""
+        resultados = []
+        for col in columnas or list(self.indices):
+            for nombre, puntuacion in self.indices[col].buscar(texto, limite):
+                resultados.append({"nombre": nombre, "tipo": COLUMNAS[col], "puntuacion": round(puntuacion, 3)})
+        resultados.sort(key=lambda r: -r["puntuacion"])
+        return resultados[:limite]
+
+
+def leer_consulta(args):
+    """(texto, límite, columnas) de los parámetros q, limit y tipo de GET /search."""
+    texto = args.get("q", "").strip()
+    try:
+        limite = int(args.get("limit", LIMITE_POR_DEFECTO))
+    except ValueError:
+        limite = 0
+    if not texto or not 1 <= limite <= LIMITE_MAXIMO:
+        raise ValueError(f"Se necesita 'q' y un 'limit' entre 1 y {LIMITE_MAXIMO}")
+    tipos = {tipo: col for col, tipo in COLUMNAS.items()}
+    tipo = args.get("tipo")
+    if tipo is not None and tipo not in tipos:
+        raise ValueError(f"'tipo' debe ser uno de: {', '.join(tipos)}")
+    return texto, limite, [tipos[tipo]] if tipo else None
+
+
+def construir(csv_path=None):
+    """IndiceCatalogo del catálogo actual (sin caché)."""
+    return IndiceCatalogo(catalogo.load_catalog(csv_path, columns=list(COLUMNAS)))
+
+
+def indice(csv_path=None):
+    """IndiceCatalogo de la versión actual del catálogo, construido una vez por versión."""
+    csv_path = csv_path or catalogo.default_csv_path()
+    version = catalogo.version(csv_path)
+    cached = _cache.get(csv_path)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    with _lock:
+        cached = _cache.get(csv_path)
+        if cached is None or cached[0] != version:
+            cached = (version, construir(csv_path))
+            _cache[csv_path] = cached
+        return cached[1]
+
+
+def buscar(texto, limite=LIMITE_POR_DEFECTO, columnas=None, csv_path=None):
+    """Planetas y estrellas cuyo nombre coincide con 'texto', de mejor a peor."""
+    return indice(csv_path).buscar(texto, limite, columnas)
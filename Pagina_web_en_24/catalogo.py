@@ -0,0 +1,200 @@
+# catalogo.py
+# Almacén columnar compartido del catálogo de exoplanetas.
+#
+# El CSV limpio (exoplanets_visual.csv) se convierte UNA sola vez a un archivo
+# Arrow IPC sin compresión (exoplanets_visual.arrow) que luego se abre con
+# memory-mapping. Todas las apps (app.py, Flask.py, Model2D.py, streamlit_app.py
+# y el Dash de 'proyecto nasa') leen el catálogo desde aquí, de modo que el
+# parseo del CSV desaparece de cada petición/rerun y el sistema operativo comparte
+# las páginas del archivo entre procesos.
+
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.feather as feather
+
+from coordenadas import COLUMNAS_CARTESIANAS, agregar_cartesianas
+from esquema import apply_schema
+from metricas import fase
+from validacion import COLUMNA_VALIDO, evaluar
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+CSV_NAME = "exoplanets_visual.csv"
+
+# Columnas que se calculan al construir el catálogo (no vienen del CSV): las
+# usan los visores, pero no forman parte de los registros de la API
+COLUMNAS_DERIVADAS = [COLUMNA_VALIDO] + COLUMNAS_CARTESIANAS
+
+_lock = threading.Lock()
+# ruta del archivo .arrow -> (mtime_ns, tabla Arrow, DataFrame)
+_cache = {}
+
+
+def default_csv_path():
+    """Ruta del CSV del catálogo (EXOPLANETS_CSV, raíz del proyecto, o ML/ como respaldo)."""
+    if os.environ.get("EXOPLANETS_CSV"):
+        return os.environ["EXOPLANETS_CSV"]
+    csv_path = os.path.join(BASE_DIR, CSV_NAME)
+    if not os.path.exists(csv_path):
+        csv_path = os.path.join(BASE_DIR, "ML", CSV_NAME)
+    return csv_path
+
+
+def arrow_path_for(csv_path):
+    """Ruta del archivo columnar que acompaña a un CSV."""
+    return os.path.splitext(csv_path)[0] + ".arrow"
+
+
+@contextmanager
+def atomic_write(path):
+    """Entrega una ruta temporal y la mueve a 'path' solo si la escritura terminó bien."""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", suffix=os.path.basename(path), dir=directory)
+    os.close(fd)
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _csv_to_table(csv_path):
+    # Los tipos del esquema (float32, categorías, Int16...) se guardan en el
+    # archivo y se restauran al leerlo, así que cada app los recibe ya aplicados.
+    df = apply_schema(pd.read_csv(csv_path, engine="pyarrow"))
+    # Máscara de filas válidas para los visores, calculada una vez por versión
+    df[COLUMNA_VALIDO] = evaluar(df)[0]
+    # Posiciones 3D en parsecs (float32): los visores solo escalan por la unidad
+    agregar_cartesianas(df)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    # Los nulos de las columnas float se guardan como NaN: sin bitmap de validez
+    # pandas puede envolver el buffer mapeado sin copiarlo.
+    for i, field in enumerate(table.schema):
+        if pa.types.is_floating(field.type) and table.column(i).null_count:
+            table = table.set_column(i, field, pc.fill_null(table.column(i), float("nan")))
+    return table
+
+
+def build_catalog(csv_path=None, force=False):
+    """Convierte el CSV a Arrow IPC si el .arrow no existe o está desactualizado."""
+    csv_path = csv_path or default_csv_path()
+    arrow_path = arrow_path_for(csv_path)
+    if (
+        not force
+        and os.path.exists(arrow_path)
+        and os.path.getmtime(arrow_path) >= os.path.getmtime(csv_path)
+    ):
+        return arrow_path
+
+    with fase("catalogo_construir"):
+        table = _csv_to_table(csv_path)
+        with atomic_write(arrow_path) as tmp_path:
+            feather.write_feather(table, tmp_path, compression="uncompressed")
+    return arrow_path
+
+
+def _load(csv_path):
+    csv_path = csv_path or default_csv_path()
+    if not os.path.exists(csv_path) and not os.path.exists(arrow_path_for(csv_path)):
+        raise FileNotFoundError(csv_path)
+
+    with _lock:
+        if os.path.exists(csv_path):
+            arrow_path = build_catalog(csv_path)
+        else:
+            # Solo existe el .arrow (p.ej. desplegado sin el CSV)
+            arrow_path = arrow_path_for(csv_path)
+        mtime = os.stat(arrow_path).st_mtime_ns
+        cached = _cache.get(arrow_path)
+        if cached is not None and cached[0] == mtime:
+            return cached
+
+        with fase("catalogo_cargar"):
+            source = pa.memory_map(arrow_path, "r")
+            table = pa.ipc.open_file(source).read_all()
+            # split_blocks evita consolidar columnas en bloques nuevos (copias)
+            df = table.to_pandas(split_blocks=True)
+        cached = (mtime, table, df)
+        _cache[arrow_path] = cached
+        return cached
+
+
+def version(csv_path=None):
+    """Identificador de la versión del catálogo (cambia cuando se reconstruye el .arrow)."""
+    return _load(csv_path)[0]
+
+
+def load_table(csv_path=None):
+    """Tabla Arrow del catálogo, respaldada por el archivo memory-mapped."""
+    return _load(csv_path)[1]
+
+
+def load_catalog(csv_path=None, columns=None):
+    """DataFrame del catálogo compartido entre llamadas.
+
+    Devuelve una copia superficial: se pueden añadir o reemplazar columnas sin
+    afectar a otros usuarios del catálogo, pero los datos subyacentes son los
+    mismos buffers de solo lectura.
+    """
+    df = _load(csv_path)[2]
+    if columns is not None:
+        df = df[[col for col in columns if col in df.columns]]
+    return df.copy(deep=False)
+
+
+def columnas_csv(csv_path=None):
+    """Columnas propias del CSV, en su orden (sin COLUMNAS_DERIVADAS)."""
+    return [col for col in load_table(csv_path).column_names if col not in COLUMNAS_DERIVADAS]
+
+
+class CatalogoActivo:
+    """Versión del catálogo que sirven las apps; solo cambia cuando la nueva ya está lista.
+
+    Las respuestas derivadas (respuestas.PorVersion / RespuestaPrecalculada)
+    usan 'version' como función de versión y se añaden a 'dependientes'.
+    'recargar' (desde el hilo de recarga.Vigilante) carga el catálogo nuevo,
+    precalcula los dependientes con él y después cambia la versión: ninguna
+    petición paga la reconstrucción.
+    """
+
+    def __init__(self, csv_path=None):
+        self.csv_path = csv_path or default_csv_path()
+        self.dependientes = []
+        self._actual = None
+        # Versión que ve el hilo que está recargando, antes de publicarla
+        self._local = threading.local()
+
+    def version(self):
+        pendiente = getattr(self._local, "version", None)
+        if pendiente is not None:
+            return pendiente
+        if self._actual is None:
+            self._actual = version(self.csv_path)
+        return self._actual
+
+    def rutas(self):
+        """Archivos a vigilar: el CSV y su .arrow."""
+        return [self.csv_path, arrow_path_for(self.csv_path)]
+
+    def recargar(self):
+        """Carga y precalcula la versión nueva, y la publica. Devuelve si cambió."""
+        nueva = version(self.csv_path)
+        if nueva == self._actual:
+            return False
+        if load_table(self.csv_path).num_rows == 0:
+            raise ValueError(f"El catálogo {self.csv_path} está vacío")
+        self._local.version = nueva
+        try:
+            for dependiente in self.dependientes:
+                dependiente.precalcular()
+        finally:
+            self._local.version = None
+        self._actual = nueva
+        return True
@@ -0,0 +1,59 @@
+# coordenadas.py
+# Coordenadas cartesianas del catálogo, precalculadas una sola vez.
+#
+# Al construir el catálogo se guardan x_pc, y_pc, z_pc (float32, en parsecs).
+# Los visores 3D ya no calculan deg2rad/cos/sin en cada callback o rerun: para
+# cambiar de unidad (pc / al / UA) basta multiplicar por un escalar.
+
+import numpy as np
+import pandas as pd
+
+# --- CONSTANTES DE CONVERSIÓN ---
+PC_TO_LY = 3.26156    # 1 parsec = 3.26156 años luz
+PC_TO_AU = 206264.8   # 1 parsec = 206,264.8 UA
+FACTORES_UNIDAD = {"pc": 1.0, "ly": PC_TO_LY, "au": PC_TO_AU}
+
+COLUMNAS_CARTESIANAS = ["x_pc", "y_pc", "z_pc"]
+
+
+def vectores_unitarios(ra, dec, dtype=np.float64):
+    """Vectores unitarios (x, y, z) a partir de RA/Dec en grados."""
+    ra_rad = np.deg2rad(np.asarray(ra, dtype=np.float64))
+    dec_rad = np.deg2rad(np.asarray(dec, dtype=np.float64))
+    cos_dec = np.cos(dec_rad)
+    xyz = np.column_stack([cos_dec * np.cos(ra_rad), cos_dec * np.sin(ra_rad), np.sin(dec_rad)])
+    return xyz.astype(dtype, copy=False)
+
+
+def _calcular_pc(df):
+    ra = pd.to_numeric(df["ra"], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    dec = pd.to_numeric(df["dec"], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    dist = pd.to_numeric(df["sy_dist"], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+    return (vectores_unitarios(ra, dec) * dist[:, None]).astype(np.float32)
+
+
+def agregar_cartesianas(df):
+    """Añade x_pc, y_pc, z_pc (float32) a 'df' a partir de ra, dec y sy_dist."""
+    xyz = _calcular_pc(df)
+    for i, col in enumerate(COLUMNAS_CARTESIANAS):
+        df[col] = xyz[:, i]
+    return df
+
+
+def cartesianas(df, unidad="pc"):
+    """Arrays (x, y, z) en la unidad pedida.
+
+    Usa las columnas precalculadas del catálogo; solo se calculan las filas que
+    no las tienen (p.ej. exoplanetas añadidos desde el simulador).
+    """
+    factor = np.float32(FACTORES_UNIDAD.get(unidad, 1.0))
+    if all(col in df.columns for col in COLUMNAS_CARTESIANAS):
+        xyz = df[COLUMNAS_CARTESIANAS].to_numpy(dtype=np.float32, na_value=np.nan)
+        faltan = np.isnan(xyz).any(axis=1)
+        if faltan.any():
+            xyz = xyz.copy()
+            xyz[faltan] = _calcular_pc(df[faltan])
+    else:
+        xyz = _calcular_pc(df)
+    xyz = xyz * factor
+    return xyz[:, 0], xyz[:, 1], xyz[:, 2]
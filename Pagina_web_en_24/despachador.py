@@ -0,0 +1,124 @@
+# despachador.py
+# Agrupa en micro-lotes las predicciones que llegan a la vez.
+#
+# Con 200 árboles, clasificar una fila cuesta casi lo mismo que clasificar
+# cincuenta: el coste está en recorrer el bosque, no en el número de filas.
+# Las peticiones concurrentes de /predict se encolan; un hilo toma la primera,
+# espera unos milisegundos (o hasta llenar el lote) a que lleguen más y las
+# pasa por el scaler y el modelo como una sola matriz. Cada petición recibe su
+# resultado a través de un Future.
+#
+# Si el hilo muere, la siguiente petición arranca otro (la cola se conserva).
+# Una petición que deja de esperar (timeout) cancela su Future y su fila ya no
+# entra en ningún lote.
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+
+import numpy as np
+
+VENTANA_S = 0.003      # espera máxima para completar un lote
+LOTE_MAXIMO = 64       # filas por lote como máximo
+
+
+class Despachador:
+    """Cola de micro-lotes delante de una función de predicción por matriz.
+
+    'predecir' recibe una matriz (n x features) y devuelve una tupla de
+    secuencias por fila, p.ej. (etiquetas, probabilidades); cada petición
+    recibe la tupla con los elementos de su fila.
+    """
+
+    def __init__(self, predecir, ventana=VENTANA_S, lote_maximo=LOTE_MAXIMO):
+        self.predecir_lote = predecir
+        self.ventana = ventana
+        self.lote_maximo = lote_maximo
+        self._cola = queue.Queue()
+        self._lock = threading.Lock()
+        self._hilo = None
+        self._pid = None
+        self._peticiones = 0
+        self._lotes = 0
+        self._profundidad_maxima = 0
+        # tamaño de lote -> número de lotes
+        self._tamaños = {}
+
+    def _arrancar(self):
+        # El hilo se crea en el primer uso (y de nuevo en un proceso hijo tras un fork)
+        with self._lock:
+            if self._hilo is None or self._pid != os.getpid() or not self._hilo.is_alive():
+                self._pid = os.getpid()
+                self._hilo = threading.Thread(target=self._bucle, name="despachador", daemon=True)
+                self._hilo.start()
+
+    def enviar(self, fila):
+        """Encola una fila de features; el Future se resuelve con la tupla de su fila."""
+        if self._hilo is None or self._pid != os.getpid() or not self._hilo.is_alive():
+            self._arrancar()
+        futuro = Future()
+        self._cola.put((np.asarray(fila, dtype=np.float64), futuro))
+        return futuro
+
+    def predecir(self, fila, timeout=None):
+        """Predicción de una fila, compartiendo lote con las peticiones concurrentes.
+
+        Con 'timeout' (segundos) lanza TimeoutError si el resultado no llega a tiempo.
+        """
+        futuro = self.enviar(fila)
+        try:
+            return futuro.result(timeout)
+        except TimeoutError:
+            futuro.cancel()
+            raise
+
+    def _bucle(self):
+        while True:
+            lote = [self._cola.get()]
+            limite = time.monotonic() + self.ventana
+            while len(lote) < self.lote_maximo:
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    break
+                try:
+                    lote.append(self._cola.get(timeout=restante))
+                except queue.Empty:
+                    break
+            self._procesar(lote)
+
+    def _procesar(self, lote):
+        # Las filas cuyas peticiones ya se cancelaron no se clasifican
+        lote = [(fila, futuro) for fila, futuro in lote if futuro.set_running_or_notify_cancel()]
+        if not lote:
+            return
+        profundidad = self._cola.qsize()
+        with self._lock:
+            self._peticiones += len(lote)
+            self._lotes += 1
+            self._tamaños[len(lote)] = self._tamaños.get(len(lote), 0) + 1
+            self._profundidad_maxima = max(self._profundidad_maxima, profundidad + len(lote))
+        futuros = [futuro for _, futuro in lote]
+        try:
+            partes = self.predecir_lote(np.vstack([fila for fila, _ in lote]))
+        except Exception as e:
+            for futuro in futuros:
+                futuro.set_exception(e)
+            return
+        for i, futuro in enumerate(futuros):
+            futuro.set_result(tuple(parte[i] for parte in partes))
+
+    def metricas(self):
+        """Peticiones, lotes, tamaño medio de lote, histograma de tamaños y profundidad de la cola."""
+        with self._lock:
+            return {
+                "peticiones": self._peticiones,
+                "lotes": self._lotes,
+                "lote_medio": round(self._peticiones / self._lotes, 2) if self._lotes else 0.0,
+                "tamaños_lote": dict(sorted(self._tamaños.items())),
+                "cola_actual": self._cola.qsize(),
+                "cola_maxima": self._profundidad_maxima,
+                "ventana_ms": self.ventana * 1000,
+                "lote_maximo": self.lote_maximo,
+            }
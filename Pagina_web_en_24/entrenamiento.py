@@ -0,0 +1,396 @@
+# entrenamiento.py
+# Datos de entrenamiento del clasificador y búsqueda de hiperparámetros (ML/ML.py).
+#
+# Leer koi_completo.csv con pandas es lo más lento de cada entrenamiento, así
+# que las filas limpias (las 11 features y la etiqueta, sin NaN) se guardan en
+# arrays .npy dentro de cache_koi/<huella del CSV>/, junto con la partición
+# entrenamiento/prueba y la matriz ya escalada. Mientras el CSV no cambie, los
+# siguientes entrenamientos y búsquedas los abren con memory-mapping.
+#
+# La partición es estable: una fila va a prueba según el hash de su
+# kepoi_name (o de sus features si el CSV no lo trae), así que al añadir filas
+# nuevas las de siempre no cambian de lado y el conjunto de prueba sirve para
+# comparar versiones sucesivas del modelo.
+#
+# La búsqueda evalúa cada combinación de n_estimators, max_depth y
+# max_leaf_nodes con validación cruzada en un pool de procesos (cada pareja
+# combinación/pliegue es una tarea). Después mide, en un solo proceso para
+# que no compitan por la CPU, lo que importa al servir: latencia de una
+# predicción de una fila con el bosque compilado (p50/p99) y tamaño del
+# paquete. El informe marca la frontera: las combinaciones que ninguna otra
+# supera a la vez en precisión, latencia y tamaño.
+#
+# Reentrenamiento incremental (actualizar): cada fila tiene una huella de su
+# contenido (features + etiqueta) y el modelo publicado guarda, en
+# modelo_estado.npz, las huellas de las filas con las que se entrenó. Las filas
+# de entrenamiento con huellas nuevas son las añadidas o cambiadas. Con ellas y
+# una muestra de las antiguas se entrenan unos pocos árboles (proporcionales al
+# cambio y como mucho MAX_FRACCION_ARBOLES del bosque) que reemplazan a los más
+# antiguos, por turnos. El modelo nuevo solo se publica si su accuracy en el
+# conjunto de prueba no baja más de TOLERANCIA_ACCURACY respecto al actual.
+
+import copy
+import hashlib
+import itertools
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.model_selection import StratifiedKFold
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+import paquete_modelo
+from catalogo import atomic_write
+from prediccion import CARACTERISTICAS, EJEMPLO
+
+OBJETIVO = "koi_disposition"
+IDENTIFICADOR = "kepoi_name"
+DIRECTORIO_CACHE = "cache_koi"
+FORMATO_CACHE = 2
+# Porcentaje de filas (por hash de su identificador) que van al conjunto de prueba
+PORCENTAJE_PRUEBA = 20
+SEMILLA = 42
+# Rejilla de la búsqueda (None: sin límite, como en sklearn)
+REJILLA = {
+    "n_estimators": [25, 50, 100, 200],
+    "max_depth": [8, 12, 16, None],
+    "max_leaf_nodes": [64, 256, 1024, None],
+}
+PLIEGUES = 3
+REPETICIONES_LATENCIA = 300
+
+# Archivos que escribe un entrenamiento (en el directorio del modelo, ML/)
+ARCHIVO_MODELO, ARCHIVO_ENCODER, ARCHIVO_SCALER = "exoplanet_classifier.joblib", "label_encoder.joblib", "scaler.joblib"
+ESTADO = "modelo_estado.npz"
+# Reentrenamiento incremental
+MAX_FRACCION_ARBOLES = 0.25      # árboles que se pueden reemplazar de una vez
+ARBOLES_POR_CAMBIO = 2.0         # árboles nuevos = esto * fracción de filas cambiadas * árboles del bosque
+FILAS_ANTIGUAS_POR_NUEVA = 4     # filas antiguas que acompañan a cada nueva en el ajuste
+MIN_FILAS_ANTIGUAS = 2000
+TOLERANCIA_ACCURACY = 0.005
+
+# Datos del proceso worker del pool (se abren una vez por proceso)
+_datos_worker = None
+
+
+def huella_archivo(ruta):
+    """sha256 (12 caracteres) del contenido de un archivo."""
+    huella = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            huella.update(bloque)
+    return huella.hexdigest()[:12]
+
+
+def _hash64(valores):
+    # Hash estable (igual entre ejecuciones y procesos) de 64 bits de cada bytes
+    return np.fromiter(
+        (int.from_bytes(hashlib.blake2b(v, digest_size=8).digest(), "little") for v in valores),
+        dtype=np.uint64, count=len(valores),
+    )
+
+
+class Datos:
+    """Filas limpias del KOI: X sin escalar, y codificada, huellas y la partición entrenamiento/prueba."""
+
+    def __init__(self, directorio):
+        self.directorio = directorio
+        with open(os.path.join(directorio, "meta.json"), "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.clases = self.meta["clases"]
+        self.X = self._abrir("X")
+        self.y = self._abrir("y")
+        # Huella del contenido (features + etiqueta) de cada fila
+        self.huellas = self._abrir("huellas")
+        self.entrenamiento = self._abrir("entrenamiento")
+        self.prueba = self._abrir("prueba")
+        # Escalada con el scaler ajustado sobre las filas de entrenamiento
+        self.X_escalada = self._abrir("X_escalada")
+
+    def _abrir(self, nombre):
+        return np.load(os.path.join(self.directorio, f"{nombre}.npy"), mmap_mode="r")
+
+    def encoder(self):
+        encoder = LabelEncoder()
+        encoder.fit(self.clases)
+        return encoder
+
+    def scaler(self):
+        """StandardScaler ajustado sobre las filas de entrenamiento (el de X_escalada)."""
+        return StandardScaler().fit(self.X[self.entrenamiento])
+
+
+def preparar(csv_path="koi_completo.csv", directorio=DIRECTORIO_CACHE):
+    """Datos del CSV, desde la caché si ya se prepararon para este mismo contenido."""
+    destino = os.path.join(directorio, huella_archivo(csv_path))
+    meta_path = os.path.join(destino, "meta.json")
+    if os.path.exists(meta_path):
+        with open(meta_path, "r", encoding="utf-8") as f:
+            if json.load(f).get("formato") == FORMATO_CACHE:
+                return Datos(destino)
+
+    inicio = time.perf_counter()
+    features = [columna for _, columna in CARACTERISTICAS]
+    columnas = set(features + [OBJETIVO, IDENTIFICADOR])
+    data = pd.read_csv(csv_path, usecols=lambda c: c in columnas).dropna(subset=features + [OBJETIVO])
+    X = data[features].to_numpy(dtype=np.float64)
+    encoder = LabelEncoder()
+    y = encoder.fit_transform(data[OBJETIVO])
+    etiquetas = data[OBJETIVO].astype(str).to_numpy()
+    huellas = _hash64([fila.tobytes() + etiqueta.encode("utf-8") for fila, etiqueta in zip(X, etiquetas)])
+    # El lado de la partición depende de la identidad de la fila, no de su etiqueta
+    if IDENTIFICADOR in data.columns and data[IDENTIFICADOR].notna().all():
+        claves = _hash64([str(nombre).encode("utf-8") for nombre in data[IDENTIFICADOR]])
+    else:
+        claves = _hash64([fila.tobytes() for fila in X])
+    en_prueba = claves % 100 < PORCENTAJE_PRUEBA
+    entrenamiento, prueba = np.flatnonzero(~en_prueba), np.flatnonzero(en_prueba)
+    X_escalada = StandardScaler().fit(X[entrenamiento]).transform(X)
+
+    os.makedirs(destino, exist_ok=True)
+    arrays = {"X": X, "y": y, "huellas": huellas, "entrenamiento": entrenamiento, "prueba": prueba, "X_escalada": X_escalada}
+    for nombre, valor in arrays.items():
+        with atomic_write(os.path.join(destino, f"{nombre}.npy")) as tmp_path:
+            with open(tmp_path, "wb") as f:
+                np.save(f, np.ascontiguousarray(valor))
+    # meta.json se escribe el último: su presencia indica que la caché está completa
+    meta = {"formato": FORMATO_CACHE, "csv": os.path.abspath(csv_path), "features": features,
+            "clases": [str(c) for c in encoder.classes_]}
+    with atomic_write(os.path.join(destino, "meta.json")) as tmp_path:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+    print(f"📦 {len(y)} filas de {csv_path} preparadas en {time.perf_counter() - inicio:.2f} s -> {destino}")
+    return Datos(destino)
+
+
+def combinaciones(rejilla=None):
+    """Lista de diccionarios de hiperparámetros (producto cartesiano de la rejilla)."""
+    rejilla = rejilla or REJILLA
+    nombres = list(rejilla)
+    return [dict(zip(nombres, valores)) for valores in itertools.product(*(rejilla[n] for n in nombres))]
+
+
+def _iniciar_worker(directorio):
+    global _datos_worker
+    _datos_worker = Datos(directorio)
+
+
+def _evaluar_pliegue(tarea):
+    # (índice de combinación, parámetros, filas de ajuste, filas de validación) -> (índice, accuracy)
+    indice, parametros, ajuste, validacion = tarea
+    datos = _datos_worker
+    model = RandomForestClassifier(random_state=SEMILLA, n_jobs=1, **parametros)
+    model.fit(datos.X_escalada[ajuste], datos.y[ajuste])
+    return indice, float(model.score(datos.X_escalada[validacion], datos.y[validacion]))
+
+
+def _entrenar_final(tarea):
+    # Ajuste con todas las filas de entrenamiento y accuracy en las de prueba
+    indice, parametros = tarea
+    datos = _datos_worker
+    model = RandomForestClassifier(random_state=SEMILLA, n_jobs=1, **parametros)
+    model.fit(datos.X_escalada[datos.entrenamiento], datos.y[datos.entrenamiento])
+    accuracy = float(model.score(datos.X_escalada[datos.prueba], datos.y[datos.prueba]))
+    paquete = paquete_modelo.PaqueteModelo.desde_sklearn(model, datos.scaler(), datos.encoder(), CARACTERISTICAS)
+    return indice, accuracy, paquete
+
+
+def medir_latencia(paquete, repeticiones=REPETICIONES_LATENCIA):
+    """(p50, p99) en ms de predecir una sola fila (EJEMPLO) con el paquete."""
+    X = np.array([EJEMPLO], dtype=float)
+    for _ in range(10):
+        paquete.predict_proba(X)
+    tiempos = np.empty(repeticiones)
+    for i in range(repeticiones):
+        inicio = time.perf_counter()
+        paquete.predict_proba(X)
+        tiempos[i] = time.perf_counter() - inicio
+    p50, p99 = np.percentile(tiempos, [50, 99]) * 1000
+    return float(p50), float(p99)
+
+
+def tamano(paquete):
+    """Bytes de los arrays del paquete (lo que ocupa modelo.exo sin la cabecera)."""
+    return int(sum(valor.nbytes for valor in paquete._arrays().values()))
+
+
+def frontera(resultados):
+    """Marca 'frontera' en los resultados que ninguna otra combinación supera en todo."""
+    for r in resultados:
+        r["frontera"] = not any(
+            o["cv_accuracy"] >= r["cv_accuracy"] and o["p99_ms"] <= r["p99_ms"] and o["bytes"] <= r["bytes"]
+            and (o["cv_accuracy"], -o["p99_ms"], -o["bytes"]) != (r["cv_accuracy"], -r["p99_ms"], -r["bytes"])
+            for o in resultados
+        )
+    return resultados
+
+
+def buscar(datos, rejilla=None, pliegues=PLIEGUES, workers=None):
+    """Evalúa la rejilla y devuelve una lista de resultados (uno por combinación)."""
+    candidatas = combinaciones(rejilla)
+    y_entrenamiento = np.asarray(datos.y[datos.entrenamiento])
+    particion = StratifiedKFold(n_splits=pliegues, shuffle=True, random_state=SEMILLA)
+    # Pliegues como índices de fila del conjunto completo (los workers abren los mismos .npy)
+    filas = [(np.asarray(datos.entrenamiento[a]), np.asarray(datos.entrenamiento[v]))
+             for a, v in particion.split(np.zeros(len(y_entrenamiento)), y_entrenamiento)]
+    tareas = [(i, parametros, a, v) for i, parametros in enumerate(candidatas) for a, v in filas]
+
+    inicio = time.perf_counter()
+    puntuaciones = [[] for _ in candidatas]
+    paquetes, accuracy_prueba = {}, {}
+    with ProcessPoolExecutor(max_workers=workers, initializer=_iniciar_worker, initargs=(datos.directorio,)) as pool:
+        # Las tareas más caras (más árboles) primero, para que no queden al final
+        orden = sorted(tareas, key=lambda t: -(t[1]["n_estimators"]))
+        for indice, accuracy in pool.map(_evaluar_pliegue, orden, chunksize=1):
+            puntuaciones[indice].append(accuracy)
+        for indice, accuracy, paquete in pool.map(_entrenar_final, list(enumerate(candidatas)), chunksize=1):
+            paquetes[indice], accuracy_prueba[indice] = paquete, accuracy
+    print(f"🔎 {len(tareas)} ajustes de validación cruzada y {len(candidatas)} finales en {time.perf_counter() - inicio:.1f} s")
+
+    resultados = []
+    for i, parametros in enumerate(candidatas):
+        p50, p99 = medir_latencia(paquetes[i])
+        resultados.append({
+            **parametros,
+            "cv_accuracy": round(float(np.mean(puntuaciones[i])), 4),
+            "cv_std": round(float(np.std(puntuaciones[i])), 4),
+            "test_accuracy": round(accuracy_prueba[i], 4),
+            "p50_ms": round(p50, 3),
+            "p99_ms": round(p99, 3),
+            "bytes": tamano(paquetes[i]),
+        })
+    return frontera(resultados)
+
+
+def elegir(resultados, presupuesto_ms):
+    """La combinación con más accuracy (y menos latencia) cuyo p99 cabe en el presupuesto; None si ninguna."""
+    validas = [r for r in resultados if r["p99_ms"] <= presupuesto_ms]
+    return max(validas, key=lambda r: (r["cv_accuracy"], -r["p99_ms"]), default=None)
+
+
+def informe(resultados, presupuesto_ms=None):
+    """Tabla de texto ordenada por accuracy; '*' marca la frontera."""
+    lineas = [f"  {'árboles':>7} {'prof.':>5} {'hojas':>6} {'cv acc':>7} {'±':>6} {'test':>6} {'p50 ms':>7} {'p99 ms':>7} {'MB':>7}"]
+    for r in sorted(resultados, key=lambda r: (-r["cv_accuracy"], r["p99_ms"])):
+        marca = "*" if r["frontera"] else " "
+        lineas.append(
+            f"{marca} {r['n_estimators']:>7} {str(r['max_depth']):>5} {str(r['max_leaf_nodes']):>6} "
+            f"{r['cv_accuracy']:>7.4f} {r['cv_std']:>6.4f} {r['test_accuracy']:>6.4f} "
+            f"{r['p50_ms']:>7.3f} {r['p99_ms']:>7.3f} {r['bytes'] / 1e6:>7.2f}"
+        )
+    if presupuesto_ms is not None:
+        mejor = elegir(resultados, presupuesto_ms)
+        if mejor is None:
+            lineas.append(f"Ninguna combinación tiene p99 <= {presupuesto_ms} ms.")
+        else:
+            lineas.append(
+                f"Con p99 <= {presupuesto_ms} ms: n_estimators={mejor['n_estimators']}, "
+                f"max_depth={mejor['max_depth']}, max_leaf_nodes={mejor['max_leaf_nodes']} "
+                f"(cv {mejor['cv_accuracy']:.4f}, p99 {mejor['p99_ms']:.3f} ms)"
+            )
+    return "\n".join(lineas)
+
+
+def publicar(model, encoder, scaler, datos, huellas, siguiente=0, metricas=None, directorio="."):
+    """Guarda los .joblib, el paquete modelo.exo y el estado para el reentrenamiento incremental.
+
+    'huellas' son las de las filas con las que se entrenó el modelo y
+    'siguiente' el primer árbol que reemplazará la próxima actualización.
+    Devuelve la versión del paquete.
+    """
+    paquete = paquete_modelo.PaqueteModelo.desde_sklearn(model, scaler, encoder, CARACTERISTICAS, metricas=metricas)
+    X_prueba = np.asarray(datos.X[datos.prueba])
+    if not np.array_equal(paquete.predict_proba(X_prueba), model.predict_proba(scaler.transform(X_prueba))):
+        raise RuntimeError("El paquete no reproduce las probabilidades de sklearn")
+
+    # Los .joblib se siguen guardando para quien use sklearn directamente
+    for nombre, objeto in ((ARCHIVO_MODELO, model), (ARCHIVO_ENCODER, encoder), (ARCHIVO_SCALER, scaler)):
+        with atomic_write(os.path.join(directorio, nombre)) as tmp_path:
+            joblib.dump(objeto, tmp_path)
+    version = paquete_modelo.guardar(paquete, paquete_modelo.ruta_en(directorio))
+    with atomic_write(os.path.join(directorio, ESTADO)) as tmp_path:
+        with open(tmp_path, "wb") as f:
+            np.savez(f, huellas=np.unique(np.asarray(huellas, dtype=np.uint64)), siguiente=siguiente, version=version)
+    return version
+
+
+def _codificar(datos, encoder):
+    # Etiquetas de 'datos' con el encoder del modelo publicado
+    nuevas = sorted(set(datos.clases) - set(encoder.classes_))
+    if nuevas:
+        raise ValueError(f"Hay clases que el modelo no conoce ({', '.join(nuevas)}): hace falta un entrenamiento completo")
+    return encoder.transform(np.asarray(datos.clases)[np.asarray(datos.y)])
+
+
+def actualizar(datos, directorio=".", tolerancia=TOLERANCIA_ACCURACY):
+    """Reentrena solo lo necesario para las filas nuevas o cambiadas desde el último modelo.
+
+    Devuelve un diccionario con lo que se hizo; 'publicado' indica si se
+    escribió un modelo nuevo. FileNotFoundError si no hay un modelo entrenado
+    con su estado (hace falta un entrenamiento completo primero).
+    """
+    inicio = time.perf_counter()
+    with np.load(os.path.join(directorio, ESTADO)) as estado:
+        anteriores, siguiente = estado["huellas"], int(estado["siguiente"])
+    model = joblib.load(os.path.join(directorio, ARCHIVO_MODELO))
+    encoder = joblib.load(os.path.join(directorio, ARCHIVO_ENCODER))
+    # El scaler no se reajusta: los árboles nuevos usan la misma escala que los que se quedan
+    scaler = joblib.load(os.path.join(directorio, ARCHIVO_SCALER))
+
+    y = _codificar(datos, encoder)
+    entrenamiento = np.asarray(datos.entrenamiento)
+    huellas = np.asarray(datos.huellas)[entrenamiento]
+    es_nueva = ~np.isin(huellas, anteriores)
+    nuevas, antiguas = entrenamiento[es_nueva], entrenamiento[~es_nueva]
+    retiradas = int(np.count_nonzero(~np.isin(anteriores, huellas)))
+    resumen = {"filas_nuevas": len(nuevas), "filas_retiradas": retiradas, "arboles": 0, "publicado": False}
+    if not len(nuevas) and not retiradas:
+        print("Sin filas nuevas ni cambiadas desde el último modelo: no hay nada que reentrenar.")
+        return resumen
+
+    n_arboles = len(model.estimators_)
+    fraccion = (len(nuevas) + retiradas) / max(1, len(entrenamiento))
+    k = min(max(1, math.ceil(ARBOLES_POR_CAMBIO * fraccion * n_arboles)), max(1, int(MAX_FRACCION_ARBOLES * n_arboles)))
+    # Filas del ajuste: todas las nuevas y una muestra de las antiguas
+    rng = np.random.default_rng(siguiente + len(anteriores))
+    cuantas = min(len(antiguas), max(MIN_FILAS_ANTIGUAS, FILAS_ANTIGUAS_POR_NUEVA * len(nuevas)))
+    filas = np.concatenate([nuevas, rng.choice(antiguas, size=cuantas, replace=False)])
+    if len(np.unique(y[filas])) != len(encoder.classes_):
+        raise ValueError("La muestra no contiene todas las clases: hace falta un entrenamiento completo")
+
+    parametros = model.get_params()
+    parametros.update(n_estimators=k, warm_start=False, random_state=int(rng.integers(2**31)))
+    refuerzo = RandomForestClassifier(**parametros)
+    refuerzo.fit(scaler.transform(np.asarray(datos.X[filas])), y[filas])
+
+    # Los árboles nuevos ocupan el lugar de los más antiguos (por turnos)
+    nuevo = copy.copy(model)
+    nuevo.estimators_ = list(model.estimators_)
+    reemplazados = [(siguiente + i) % n_arboles for i in range(k)]
+    for posicion, arbol in zip(reemplazados, refuerzo.estimators_):
+        nuevo.estimators_[posicion] = arbol
+
+    prueba = np.asarray(datos.prueba)
+    X_prueba = scaler.transform(np.asarray(datos.X[prueba]))
+    actual = float(model.score(X_prueba, y[prueba]))
+    candidata = float(nuevo.score(X_prueba, y[prueba]))
+    resumen.update(arboles=k, filas_ajuste=len(filas), accuracy_actual=round(actual, 4), accuracy_nueva=round(candidata, 4))
+    if candidata < actual - tolerancia:
+        print(f"⚠️ Accuracy en prueba {candidata:.4f} < {actual:.4f} - {tolerancia}: no se publica el modelo nuevo.")
+        return resumen
+
+    resumen["version"] = publicar(
+        nuevo, encoder, scaler, datos, datos.huellas[entrenamiento], siguiente=(siguiente + k) % n_arboles,
+        metricas={"accuracy": round(candidata, 4), "filas_entrenamiento": len(entrenamiento), "incremental": True},
+        directorio=directorio,
+    )
+    resumen["publicado"] = True
+    print(f"🔁 {k} de {n_arboles} árboles reemplazados con {len(filas)} filas en {time.perf_counter() - inicio:.2f} s "
+          f"(accuracy en prueba {actual:.4f} -> {candidata:.4f}); versión {resumen['version']}")
+    return resumen
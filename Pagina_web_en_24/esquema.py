@@ -0,0 +1,52 @@
+# esquema.py
+# Esquema tipado del catálogo limpio (exoplanets_visual.csv).
+#
+# Cada app guarda su propia copia del catálogo (p.ej. 'exo_df' en cada sesión de
+# Streamlit), así que el coste por fila importa:
+#   - float32 donde la precisión sobra (radios, masas, temperaturas, distancias)
+#   - float64 solo donde hace falta: RA/Dec (float32 da ~0.1" de error, más que
+#     el radio del cruce posicional) y el período orbital (se compara entre catálogos)
+#   - categorías para textos con pocos valores distintos
+#   - enteros con nulos para 'disc_year'
+#   - cadenas respaldadas por Arrow para nombres (casi todos distintos)
+
+import pandas as pd
+
+NOMBRE = pd.StringDtype("pyarrow")
+
+ESQUEMA_VISUAL = {
+    "pl_name": NOMBRE,
+    "hostname": NOMBRE,
+    "pl_orbper": "float64",
+    "pl_rade": "float32",
+    "pl_bmasse": "float32",
+    "pl_eqt": "float32",
+    "ra": "float64",
+    "dec": "float64",
+    "st_teff": "float32",
+    "st_rad": "float32",
+    "st_mass": "float32",
+    "sy_dist": "float32",
+    "disc_year": "Int16",
+    "discoverymethod": "category",
+    "source": "category",
+    # Nombres del objeto en los otros catálogos con los que se fusionó (separados por ';')
+    "alias": NOMBRE,
+    "pl_insol": "float32",
+    "pl_orbeccen": "float32",
+}
+
+
+def apply_schema(df, schema=ESQUEMA_VISUAL):
+    """Convierte las columnas presentes de 'df' a los tipos del esquema."""
+    df = df.copy(deep=False)
+    for col, dtype in schema.items():
+        if col not in df.columns or df[col].dtype == dtype:
+            continue
+        if dtype in ("float32", "float64"):
+            df[col] = pd.to_numeric(df[col], errors="coerce").astype(dtype)
+        elif dtype == "Int16":
+            df[col] = pd.to_numeric(df[col], errors="coerce").round().astype(dtype)
+        else:
+            df[col] = df[col].astype(dtype)
+    return df
@@ -0,0 +1,77 @@
+# indice_espacial.py
+# Índice de cuadrícula sobre las posiciones normalizadas (x, y en 0-1) del catálogo.
+#
+# Los puntos se ordenan por celda de una cuadrícula fija, así que los de una
+# fila de celdas consecutivas son un tramo contiguo del orden: una consulta por
+# rectángulo solo recorre las filas de celdas que toca. Con poco zoom los
+# puntos del rectángulo se agregan en grupos (clusters) en una cuadrícula
+# proporcional al zoom, de modo que el tamaño de la respuesta no crece con el
+# catálogo; con zoom alto se devuelven los planetas individuales.
+
+import numpy as np
+
+CELDAS = 256           # celdas por lado del índice
+CELDAS_CLUSTER = 32    # celdas de agrupación por lado de la vista
+ZOOM_DETALLE = 4       # a partir de este zoom se devuelven planetas individuales
+LIMITE_POR_DEFECTO = 5000
+
+
+class IndiceCuadricula:
+    """Índice de puntos (x, y) normalizados para consultas por rectángulo."""
+
+    def __init__(self, x, y, celdas=CELDAS):
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+        self.celdas = celdas
+        # Los puntos sin posición no se indexan
+        validos = np.flatnonzero(~(np.isnan(self.x) | np.isnan(self.y)))
+        celda = self._celda(self.x[validos], self.y[validos], celdas)
+        orden = np.argsort(celda, kind="stable")
+        self.orden = validos[orden]
+        # inicio[c]: primera posición de la celda c en 'orden'
+        self.inicio = np.searchsorted(celda[orden], np.arange(celdas * celdas + 1))
+
+    @staticmethod
+    def _columna(v, celdas):
+        return np.clip((v * celdas).astype(np.int64), 0, celdas - 1)
+
+    @classmethod
+    def _celda(cls, x, y, celdas):
+        return cls._columna(y, celdas) * celdas + cls._columna(x, celdas)
+
+    def consultar(self, x_min, y_min, x_max, y_max):
+        """Índices (en orden original) de los puntos dentro del rectángulo."""
+        cx0, cx1 = (int(c) for c in self._columna(np.array([x_min, x_max]), self.celdas))
+        cy0, cy1 = (int(c) for c in self._columna(np.array([y_min, y_max]), self.celdas))
+        tramos = [
+            self.orden[self.inicio[cy * self.celdas + cx0]:self.inicio[cy * self.celdas + cx1 + 1]]
+            for cy in range(cy0, cy1 + 1)
+        ]
+        candidatos = np.concatenate(tramos) if tramos else np.empty(0, dtype=np.int64)
+        # Las celdas del borde pueden tener puntos fuera del rectángulo
+        x, y = self.x[candidatos], self.y[candidatos]
+        dentro = (x >= x_min) & (x <= x_max) & (y >= y_min) & (y <= y_max)
+        return np.sort(candidatos[dentro])
+
+    def agrupar(self, indices, zoom, tamaño=None):
+        """Clusters de los puntos 'indices': centroide, número de puntos y tamaño máximo."""
+        lado = CELDAS_CLUSTER * 2 ** zoom
+        celda = self._celda(self.x[indices], self.y[indices], lado)
+        grupos, inverso, n = np.unique(celda, return_inverse=True, return_counts=True)
+        clusters = {
+            "x": np.bincount(inverso, weights=self.x[indices]) / n,
+            "y": np.bincount(inverso, weights=self.y[indices]) / n,
+            "n": n,
+        }
+        if tamaño is not None:
+            valores = np.nan_to_num(np.asarray(tamaño, dtype=np.float64)[indices], nan=0.0)
+            maximo = np.zeros(len(grupos))
+            np.maximum.at(maximo, inverso, valores)
+            clusters["pl_rade_max"] = maximo.astype(np.float32)
+        return clusters
+
+
+def zoom_para(x_min, y_min, x_max, y_max):
+    """Zoom implícito de un rectángulo: 0 para la vista completa, +1 cada vez que se reduce a la mitad."""
+    lado = max(x_max - x_min, y_max - y_min, 1e-9)
+    return max(0, int(np.floor(np.log2(1.0 / lado))))
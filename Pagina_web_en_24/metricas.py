@@ -0,0 +1,190 @@
+# metricas.py
+# Métricas de los servidores en el formato de texto de Prometheus (GET /metrics).
+#
+# Por ruta se cuentan peticiones, errores y bytes enviados, y se guarda un
+# histograma de latencias. Las fases internas (carga del catálogo,
+# serialización, scaler, predicción del modelo...) se miden con
+#     with metricas.fase("model_predict"): ...
+# Registrar una medida es un perf_counter, un bisect y un incremento bajo un
+# lock, así que se puede dejar activado en producción. No depende de
+# prometheus_client.
+
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+PREFIJO = "exoplanets_"
+# Límites superiores de los cubos del histograma (segundos)
+CUBOS_S = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+TIPO_CONTENIDO = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _etiquetas(nombres, valores):
+    if not nombres:
+        return ""
+    pares = []
+    for nombre, valor in zip(nombres, valores):
+        valor = str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pares.append(f'{nombre}="{valor}"')
+    return "{" + ",".join(pares) + "}"
+
+
+class Contador:
+    """Contador monótono con etiquetas."""
+
+    tipo = "counter"
+
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre = PREFIJO + nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._valores = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *valores, cantidad=1):
+        with self._lock:
+            self._valores[valores] = self._valores.get(valores, 0) + cantidad
+
+    def lineas(self):
+        with self._lock:
+            valores = sorted(self._valores.items())
+        return [f"{self.nombre}{_etiquetas(self.etiquetas, clave)} {valor}" for clave, valor in valores]
+
+
+class Histograma:
+    """Histograma de duraciones con etiquetas (cubos acumulados al exponerlo)."""
+
+    tipo = "histogram"
+
+    def __init__(self, nombre, ayuda, etiquetas=(), cubos=CUBOS_S):
+        self.nombre = PREFIJO + nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self.cubos = tuple(cubos)
+        # valores de etiquetas -> [conteos por cubo (+Inf al final), suma]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observar(self, valor, *valores):
+        i = bisect.bisect_left(self.cubos, valor)
+        with self._lock:
+            serie = self._series.get(valores)
+            if serie is None:
+                serie = self._series[valores] = [[0] * (len(self.cubos) + 1), 0.0]
+            serie[0][i] += 1
+            serie[1] += valor
+
+    def lineas(self):
+        with self._lock:
+            series = sorted((clave, list(conteos), suma) for clave, (conteos, suma) in self._series.items())
+        lineas = []
+        for clave, conteos, suma in series:
+            acumulado = 0
+            for limite, n in zip(self.cubos + ("+Inf",), conteos):
+                acumulado += n
+                etiquetas = _etiquetas(self.etiquetas + ("le",), clave + (limite,))
+                lineas.append(f"{self.nombre}_bucket{etiquetas} {acumulado}")
+            lineas.append(f"{self.nombre}_sum{_etiquetas(self.etiquetas, clave)} {suma:.6f}")
+            lineas.append(f"{self.nombre}_count{_etiquetas(self.etiquetas, clave)} {acumulado}")
+        return lineas
+
+
+class Medidor:
+    """Valor instantáneo que se lee al exponer las métricas (p.ej. la profundidad de una cola)."""
+
+    tipo = "gauge"
+
+    def __init__(self, nombre, ayuda, funcion):
+        self.nombre = PREFIJO + nombre
+        self.ayuda = ayuda
+        self.funcion = funcion
+
+    def lineas(self):
+        try:
+            return [f"{self.nombre} {float(self.funcion())}"]
+        except Exception:
+            return []
+
+
+PETICIONES = Contador("http_peticiones_total", "Peticiones HTTP por ruta, método y código.", ("ruta", "metodo", "codigo"))
+ERRORES = Contador("http_errores_total", "Respuestas con código >= 400 o excepción, por ruta.", ("ruta", "codigo"))
+BYTES = Contador("http_respuesta_bytes_total", "Bytes de cuerpo enviados por ruta (sin las respuestas en streaming).", ("ruta",))
+LATENCIA = Histograma("http_latencia_segundos", "Latencia de las peticiones HTTP por ruta.", ("ruta", "metodo"))
+FASES = Histograma("fase_segundos", "Duración de las fases internas (carga, serialización, predicción...).", ("fase",))
+
+_metricas = [PETICIONES, ERRORES, BYTES, LATENCIA, FASES]
+_lock = threading.Lock()
+
+
+def registrar_medidor(nombre, ayuda, funcion):
+    """Añade un medidor calculado al exponer las métricas."""
+    with _lock:
+        _metricas.append(Medidor(nombre, ayuda, funcion))
+
+
+@contextmanager
+def fase(nombre):
+    """Mide la duración del bloque en el histograma de fases internas."""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        FASES.observar(time.perf_counter() - inicio, nombre)
+
+
+def exponer():
+    """Todas las métricas en el formato de texto de Prometheus."""
+    with _lock:
+        metricas = list(_metricas)
+    lineas = []
+    for metrica in metricas:
+        lineas.append(f"# HELP {metrica.nombre} {metrica.ayuda}")
+        lineas.append(f"# TYPE {metrica.nombre} {metrica.tipo}")
+        lineas.extend(metrica.lineas())
+    return "\n".join(lineas) + "\n"
+
+
+def instrumentar(app, estaticos=("static",)):
+    """Registra los hooks por petición en una app Flask y añade GET /metrics.
+
+    Las rutas se etiquetan por su plantilla (p.ej. '/predict/batch'), y las de
+    los endpoints de 'estaticos' como 'static', para que el número de series no
+    dependa de las URLs pedidas.
+    """
+    from flask import Response, g, request
+
+    def _ruta():
+        if request.endpoint in estaticos:
+            return "static"
+        return request.url_rule.rule if request.url_rule is not None else "<sin ruta>"
+
+    @app.before_request
+    def _inicio():
+        g._metricas_inicio = time.perf_counter()
+
+    @app.after_request
+    def _registrar(respuesta):
+        inicio = g.pop("_metricas_inicio", None)
+        if inicio is None:
+            return respuesta
+        ruta = _ruta()
+        LATENCIA.observar(time.perf_counter() - inicio, ruta, request.method)
+        PETICIONES.inc(ruta, request.method, respuesta.status_code)
+        if respuesta.status_code >= 400:
+            ERRORES.inc(ruta, respuesta.status_code)
+        if not respuesta.is_streamed and respuesta.content_length is not None:
+            BYTES.inc(ruta, cantidad=respuesta.content_length)
+        return respuesta
+
+    @app.teardown_request
+    def _excepcion(error):
+        # Excepción no capturada: after_request no se ejecutó
+        if error is not None and g.pop("_metricas_inicio", None) is not None:
+            ERRORES.inc(_ruta(), 500)
+
+    @app.route("/metrics")
+    def metrics():
+        return Response(exponer(), mimetype=None, content_type=TIPO_CONTENIDO)
+
+    return app
@@ -0,0 +1,188 @@
+# paquete_modelo.py
+# Paquete del clasificador en un solo archivo versionado (ML/modelo.exo).
+#
+# Reúne lo que ML/ML.py guardaba en tres pickles: parámetros del scaler,
+# clases del encoder, esquema de las 11 features (clave JSON y columna del
+# KOI, en orden) y el bosque compilado de bosque.py. Los arrays se guardan
+# sin comprimir y alineados a 64 bytes, así que al cargarlo se abren con
+# memory-mapping sin copiarlos: la carga es casi instantánea y todos los
+# procesos que lo abren comparten las mismas páginas.
+#
+# Formato:
+#   bytes 0-3    "EXOM"
+#   bytes 4-7    longitud L de la cabecera (uint32 little-endian)
+#   bytes 8-8+L  cabecera JSON UTF-8, rellenada con espacios hasta múltiplo de 64
+#   resto        arrays contiguos; 'offset' cuenta desde el final de la cabecera
+# Cabecera: {"formato", "version", "creado", "caracteristicas", "clases",
+#            "profundidad", "n_features", "metricas", "arrays": {nombre: {"dtype", "shape", "offset"}}}
+# 'version' es una huella del contenido: dos entrenamientos idénticos dan la misma.
+
+import hashlib
+import json
+import mmap
+import os
+from datetime import datetime, timezone
+
+import numpy as np
+
+from bosque import ARRAYS, BosquePlano
+from catalogo import atomic_write
+
+NOMBRE = "modelo.exo"
+MAGIA = b"EXOM"
+FORMATO = 1
+ALINEACION = 64
+
+
+class PaqueteModelo:
+    """Scaler, clases y bosque de un paquete (arrays memory-mapped si se cargó de un archivo)."""
+
+    def __init__(self, bosque, media, escala, clases, caracteristicas, version=None, metricas=None, creado=None):
+        self.bosque = bosque
+        self.media = media
+        self.escala = escala
+        self.clases = list(clases)
+        self.caracteristicas = [tuple(par) for par in caracteristicas]
+        self.version = version
+        self.metricas = dict(metricas or {})
+        self.creado = creado
+
+    @classmethod
+    def desde_sklearn(cls, model, scaler, encoder, caracteristicas, metricas=None):
+        """Paquete a partir del RandomForestClassifier, StandardScaler y LabelEncoder entrenados."""
+        n = len(caracteristicas)
+        if model.n_features_in_ != n or scaler.n_features_in_ != n:
+            raise ValueError(f"El modelo y el scaler no tienen las {n} features del esquema")
+        # StandardScaler.transform hace X -= mean_ y X /= scale_; sin centrar o sin
+        # escalar, restar 0 o dividir entre 1 da exactamente el mismo resultado
+        media = scaler.mean_ if scaler.with_mean else np.zeros(n)
+        escala = scaler.scale_ if scaler.with_std else np.ones(n)
+        clases = [str(c) for c in encoder.inverse_transform(model.classes_)]
+        return cls(BosquePlano.desde_sklearn(model), np.asarray(media, dtype=np.float64),
+                   np.asarray(escala, dtype=np.float64), clases, caracteristicas, metricas=metricas)
+
+    def escalar(self, X):
+        """Igual que StandardScaler.transform (mismas operaciones, mismo resultado)."""
+        X = np.array(X, dtype=np.float64)
+        X -= self.media
+        X /= self.escala
+        return X
+
+    def predict_proba(self, X):
+        """Probabilidad de cada clase para la matriz de features sin escalar (n x 11)."""
+        return self.bosque.predict_proba(self.escalar(X))
+
+    def predecir(self, X):
+        """Nombre de la clase predicha para cada fila de X (sin escalar)."""
+        return [self.clases[i] for i in self.predict_proba(X).argmax(axis=1)]
+
+    def _arrays(self):
+        arrays = {"media": self.media, "escala": self.escala, "classes_": np.asarray(self.bosque.classes_)}
+        arrays.update(self.bosque.arrays())
+        return arrays
+
+
+def guardar(paquete, ruta):
+    """Escribe el paquete en 'ruta' (de forma atómica) y devuelve su versión."""
+    arrays = {nombre: np.ascontiguousarray(valor) for nombre, valor in paquete._arrays().items()}
+    descriptores, offset = {}, 0
+    huella = hashlib.sha256()
+    for nombre, valor in arrays.items():
+        offset += -offset % ALINEACION
+        descriptores[nombre] = {"dtype": valor.dtype.str, "shape": list(valor.shape), "offset": offset}
+        offset += valor.nbytes
+        huella.update(nombre.encode("utf-8"))
+        huella.update(valor.tobytes())
+    cabecera = {
+        "formato": FORMATO,
+        "caracteristicas": [list(par) for par in paquete.caracteristicas],
+        "clases": paquete.clases,
+        "profundidad": paquete.bosque.profundidad,
+        "n_features": paquete.bosque.n_features_in_,
+    }
+    huella.update(json.dumps(cabecera, sort_keys=True).encode("utf-8"))
+    cabecera.update({
+        "version": huella.hexdigest()[:12],
+        "creado": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "metricas": paquete.metricas,
+        "arrays": descriptores,
+    })
+    texto = json.dumps(cabecera).encode("utf-8")
+    texto += b" " * (-(8 + len(texto)) % ALINEACION)
+
+    with atomic_write(ruta) as tmp_path:
+        with open(tmp_path, "wb") as f:
+            f.write(MAGIA + len(texto).to_bytes(4, "little") + texto)
+            posicion = 0
+            for nombre, valor in arrays.items():
+                f.write(b"\0" * (descriptores[nombre]["offset"] - posicion))
+                f.write(valor.tobytes())
+                posicion = descriptores[nombre]["offset"] + valor.nbytes
+    paquete.version = cabecera["version"]
+    paquete.creado = cabecera["creado"]
+    return paquete.version
+
+
+def leer_cabecera(ruta):
+    """Cabecera JSON de un paquete (sin abrir los arrays)."""
+    with open(ruta, "rb") as f:
+        inicio = f.read(8)
+        if len(inicio) < 8 or inicio[:4] != MAGIA:
+            raise ValueError(f"{ruta} no es un paquete de modelo (falta la marca {MAGIA!r})")
+        cabecera = json.loads(f.read(int.from_bytes(inicio[4:8], "little")))
+    if cabecera.get("formato") != FORMATO:
+        raise ValueError(f"{ruta} usa el formato {cabecera.get('formato')}; esta versión solo lee el {FORMATO}")
+    return cabecera
+
+
+def cargar(ruta, caracteristicas=None):
+    """Abre un paquete con memory-mapping.
+
+    Si se pasa 'caracteristicas' (lista de (clave, columna) en orden), se
+    comprueba que el modelo se entrenó con ese mismo esquema: ValueError si no.
+    """
+    cabecera = leer_cabecera(ruta)
+    esquema = [tuple(par) for par in cabecera["caracteristicas"]]
+    if caracteristicas is not None and esquema != [tuple(par) for par in caracteristicas]:
+        raise ValueError(
+            f"El modelo de {ruta} se entrenó con otras features: {[c for _, c in esquema]} "
+            f"en lugar de {[c for _, c in caracteristicas]}"
+        )
+
+    with open(ruta, "rb") as f:
+        datos = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    inicio = 8 + int.from_bytes(datos[4:8], "little")
+    arrays = {}
+    for nombre, desc in cabecera["arrays"].items():
+        dtype = np.dtype(desc["dtype"])
+        cantidad = int(np.prod(desc["shape"], dtype=np.int64))
+        if inicio + desc["offset"] + cantidad * dtype.itemsize > len(datos):
+            raise ValueError(f"{ruta} está truncado (array '{nombre}')")
+        arrays[nombre] = np.frombuffer(datos, dtype=dtype, count=cantidad, offset=inicio + desc["offset"]).reshape(desc["shape"])
+    faltan = [nombre for nombre in ARRAYS + ("media", "escala", "classes_") if nombre not in arrays]
+    if faltan:
+        raise ValueError(f"A {ruta} le faltan los arrays: {', '.join(faltan)}")
+
+    # Índices con el tamaño nativo (en un sistema de 32 bits se copian)
+    for nombre in ("caracteristica2", "hijos2", "raices"):
+        if arrays[nombre].dtype != np.intp:
+            arrays[nombre] = arrays[nombre].astype(np.intp)
+    n = cabecera["n_features"]
+    if len(esquema) != n or arrays["media"].shape != (n,) or arrays["escala"].shape != (n,):
+        raise ValueError(f"{ruta}: el esquema tiene {len(esquema)} features, pero el scaler/modelo {n}")
+    if arrays["proba_hoja"].shape[1] != len(cabecera["clases"]):
+        raise ValueError(f"{ruta}: {len(cabecera['clases'])} clases, pero las hojas tienen {arrays['proba_hoja'].shape[1]}")
+
+    bosque = BosquePlano(
+        **{nombre: arrays[nombre] for nombre in ARRAYS},
+        profundidad=cabecera["profundidad"],
+        classes_=arrays["classes_"],
+        n_features_in_=n,
+    )
+    return PaqueteModelo(bosque, arrays["media"], arrays["escala"], cabecera["clases"], esquema,
+                         version=cabecera["version"], metricas=cabecera.get("metricas"), creado=cabecera.get("creado"))
+
+
+def ruta_en(directorio="ML"):
+    """Ruta del paquete dentro de un directorio de modelo."""
+    return os.path.join(directorio, NOMBRE)
@@ -0,0 +1,373 @@
+# prediccion.py
+# Clasificador de exoplanetas para los servidores (Flask.py).
+#
+# Reúne el esquema de las 11 features del modelo (ML/ML.py), la carga de
+# modelo + scaler + encoder y la predicción por lotes: los candidatos se
+# validan de una sola pasada vectorizada y se clasifican como una matriz, en
+# lugar de construir un array 1x11 y llamar al modelo por cada fila.
+#
+# El modelo se lee del paquete ML/modelo.exo (paquete_modelo.py: scaler, clases,
+# esquema y bosque compilado en un archivo memory-mapped) y se evalúa con el
+# bosque de bosque.py, con el mismo resultado que sklearn y sin su sobrecarga
+# por árbol. Con los .joblib antiguos el bosque se compila al cargar, y los
+# lotes grandes siguen en sklearn, que los recorre más rápido en C.
+#
+# Las predicciones de una fila (/predict y los formularios de Streamlit) pasan
+# por CachePredicciones: un LRU acotado cuya clave es el vector de features en
+# el orden del esquema, cuantizado a unos decimales por feature (DECIMALES_CACHE)
+# por debajo de la incertidumbre típica con la que se mide cada columna: dos
+# consultas que solo difieren por debajo de esa precisión (p.ej. el temblor de
+# un slider o un redondeo distinto en el cliente) comparten entrada y resultado.
+# Cada caché pertenece a una versión del modelo y se vacía cuando la versión
+# cambia.
+
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+
+import paquete_modelo
+from metricas import fase
+
+# (clave JSON de /predict, columna del KOI) en el orden con el que se entrenó el modelo
+CARACTERISTICAS = [
+    ("snr", "koi_model_snr"),
+    ("radius", "koi_prad"),
+    ("sma", "koi_sma"),
+    ("temp", "koi_teq"),
+    ("period", "koi_period"),
+    ("duration", "koi_duration"),
+    ("depth", "koi_depth"),
+    ("steff", "koi_steff"),
+    ("slogg", "koi_slogg"),
+    ("sr", "koi_srad"),
+    ("time0bk", "koi_time0bk"),
+]
+CLAVES = [clave for clave, _ in CARACTERISTICAS]
+# Las tablas KOI pueden enviarse con sus nombres de columna originales
+_ALIAS = {columna: clave for clave, columna in CARACTERISTICAS}
+# Columnas que se devuelven tal cual para identificar cada fila en la respuesta
+COLUMNAS_ID = ["id", "kepoi_name", "toi", "pl_name"]
+FILAS_POR_BLOQUE = 1000
+# Con los .joblib: hasta cuántas filas se usa el bosque compilado en lugar de sklearn
+FILAS_BOSQUE_PLANO = 512
+ARCHIVOS_MODELO = ("exoplanet_classifier.joblib", "label_encoder.joblib", "scaler.joblib")
+# Candidato de ejemplo (el de ML/Test.py) para la predicción de prueba al recargar
+EJEMPLO = [18.0, 0.59, 0.0739, 443, 10.3128, 3.2, 0.45, 5600, 4.4, 0.98, 2459000.123]
+# Caché de predicciones de una fila: entradas y decimales de cada feature en la
+# clave (por debajo de la incertidumbre de medida de cada columna)
+CAPACIDAD_CACHE = 4096
+DECIMALES_CACHE = {
+    "snr": 2,        # koi_model_snr
+    "radius": 3,     # koi_prad (radios terrestres)
+    "sma": 4,        # koi_sma (UA)
+    "temp": 1,       # koi_teq (K)
+    "period": 5,     # koi_period (días; incertidumbre típica ~1e-5)
+    "duration": 3,   # koi_duration (horas)
+    "depth": 3,      # koi_depth (ppm)
+    "steff": 0,      # koi_steff (K)
+    "slogg": 3,      # koi_slogg
+    "sr": 3,         # koi_srad (radios solares)
+    "time0bk": 4,    # koi_time0bk (días; incertidumbre típica ~1e-3)
+}
+_DECIMALES = [DECIMALES_CACHE[clave] for clave in CLAVES]
+
+
+def rutas_modelo(directorio="ML"):
+    """Archivos de un modelo: el paquete modelo.exo y los .joblib de versiones anteriores."""
+    return [paquete_modelo.ruta_en(directorio)] + [os.path.join(directorio, nombre) for nombre in ARCHIVOS_MODELO]
+
+
+class Modelo:
+    """Clasificador guardado por ML/ML.py: el paquete ML/modelo.exo o, si no existe, los tres .joblib."""
+
+    def __init__(self, directorio="ML"):
+        ruta = paquete_modelo.ruta_en(directorio)
+        self.model = None
+        if os.path.exists(ruta):
+            # Memory-mapped; ValueError si se entrenó con otro esquema de features
+            self.paquete = paquete_modelo.cargar(ruta, CARACTERISTICAS)
+            self.version = self.paquete.version
+        else:
+            rutas = rutas_modelo(directorio)[1:]
+            # Versión: huella del contenido de los tres archivos (igual en todos los workers)
+            huella = hashlib.sha256()
+            for ruta in rutas:
+                with open(ruta, "rb") as f:
+                    for bloque in iter(lambda: f.read(1 << 20), b""):
+                        huella.update(bloque)
+            self.version = huella.hexdigest()[:12]
+            self.model, encoder, self.scaler = (joblib.load(ruta) for ruta in rutas)
+            self.paquete = None
+            if isinstance(self.model, RandomForestClassifier):
+                self.paquete = paquete_modelo.PaqueteModelo.desde_sklearn(self.model, self.scaler, encoder, CARACTERISTICAS)
+            self._clases = [str(c) for c in encoder.inverse_transform(self.model.classes_)]
+
+    @property
+    def clases(self):
+        """Nombre de la clase de cada columna de las probabilidades."""
+        return self.paquete.clases if self.paquete is not None else self._clases
+
+    def probabilidades(self, X):
+        """Probabilidad de cada clase para la matriz de features X (n x 11)."""
+        if self.paquete is None:
+            with fase("scaler_transform"):
+                X = self.scaler.transform(X)
+            with fase("model_predict"):
+                return self.model.predict_proba(X)
+        with fase("scaler_transform"):
+            X = self.paquete.escalar(X)
+        with fase("model_predict"):
+            if self.model is not None and len(X) > FILAS_BOSQUE_PLANO:
+                return self.model.predict_proba(X)
+            return self.paquete.bosque.predict_proba(X)
+
+    def predecir(self, X):
+        """Etiquetas y probabilidades de cada fila de X."""
+        proba = self.probabilidades(X)
+        return [self.clases[i] for i in proba.argmax(axis=1)], proba
+
+    def probar(self):
+        """Predicción de prueba con EJEMPLO; ValueError si el resultado no tiene sentido."""
+        etiquetas, proba = self.predecir(np.array([EJEMPLO], dtype=float))
+        if proba.shape != (1, len(self.clases)):
+            raise ValueError(f"predict_proba devolvió la forma {proba.shape}, se esperaba (1, {len(self.clases)})")
+        if not np.all(np.isfinite(proba)) or abs(proba.sum() - 1.0) > 1e-6:
+            raise ValueError(f"Probabilidades no válidas: {proba[0].tolist()}")
+        if self.model is not None and self.paquete is not None:
+            X = self.scaler.transform(np.array([EJEMPLO], dtype=float))
+            if not np.array_equal(self.paquete.predict_proba(np.array([EJEMPLO], dtype=float)), self.model.predict_proba(X)):
+                raise ValueError("El bosque compilado no coincide con sklearn")
+        return etiquetas[0]
+
+
+def clave_cache(fila):
+    """Clave de caché de una fila de features (en el orden de CLAVES); None si no se puede cachear."""
+    fila = np.asarray(fila, dtype=np.float64).ravel()
+    if fila.shape != (len(CLAVES),) or not np.isfinite(fila).all():
+        return None
+    # + 0.0 convierte -0.0 (p.ej. -0.04 redondeado a un decimal) en 0.0
+    return ",".join(
+        f"{round(valor, decimales) + 0.0:.{decimales}f}" for valor, decimales in zip(fila.tolist(), _DECIMALES)
+    )
+
+
+class CachePredicciones:
+    """LRU de resultados de una fila para una versión del modelo.
+
+    Al pedirla con otra versión se vacía; los resultados calculados con una
+    versión que ya no es la actual no se guardan.
+    """
+
+    def __init__(self, capacidad=CAPACIDAD_CACHE):
+        self.capacidad = capacidad
+        self._entradas = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.invalidaciones = 0
+
+    def invalidar(self, version=None):
+        """Vacía la caché; a partir de aquí solo se aceptan resultados de 'version'."""
+        with self._lock:
+            self._entradas.clear()
+            self._version = version
+            self.invalidaciones += 1
+
+    def obtener(self, version, fila):
+        """Resultado guardado para la fila con esa versión del modelo, o None."""
+        clave = clave_cache(fila)
+        with self._lock:
+            if version != self._version:
+                self._entradas.clear()
+                self._version = version
+                self.invalidaciones += 1
+            resultado = self._entradas.get(clave) if clave is not None else None
+            if resultado is None:
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return resultado
+
+    def guardar(self, version, fila, resultado):
+        clave = clave_cache(fila)
+        if clave is None:
+            return
+        with self._lock:
+            if version != self._version:
+                return
+            self._entradas[clave] = resultado
+            self._entradas.move_to_end(clave)
+            if len(self._entradas) > self.capacidad:
+                self._entradas.popitem(last=False)
+
+    def predecir(self, modelo, fila):
+        """(etiqueta, probabilidades) de una fila con 'modelo' (un Modelo), desde la caché si ya se pidió."""
+        resultado = self.obtener(modelo.version, fila)
+        if resultado is None:
+            etiquetas, proba = modelo.predecir(np.asarray(fila, dtype=np.float64).reshape(1, -1))
+            resultado = (etiquetas[0], proba[0])
+            self.guardar(modelo.version, fila, resultado)
+        return resultado
+
+    def metricas(self):
+        """Aciertos, fallos, tasa de aciertos, entradas e invalidaciones."""
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {
+                "aciertos": self.aciertos,
+                "fallos": self.fallos,
+                "tasa_aciertos": round(self.aciertos / consultas, 4) if consultas else 0.0,
+                "entradas": len(self._entradas),
+                "capacidad": self.capacidad,
+                "invalidaciones": self.invalidaciones,
+            }
+
+
+class ModeloActivo:
+    """Modelo en servicio, reemplazable en caliente por una versión nueva ya validada.
+
+    La versión nueva se carga y se prueba aparte; el cambio es una sola
+    asignación, así que cada lote se clasifica entero con la versión anterior o
+    con la nueva, nunca con una mezcla.
+    """
+
+    def __init__(self, directorio="ML"):
+        self.directorio = directorio
+        self.modelo = Modelo(directorio)
+        self.cache = CachePredicciones()
+
+    @property
+    def version(self):
+        return self.modelo.version
+
+    def rutas(self):
+        return rutas_modelo(self.directorio)
+
+    def recargar(self):
+        """Carga, prueba y publica el modelo de 'directorio'. Devuelve si cambió."""
+        nuevo = Modelo(self.directorio)
+        if nuevo.version == self.modelo.version:
+            return False
+        nuevo.probar()
+        self.modelo = nuevo
+        self.cache.invalidar(nuevo.version)
+        return True
+
+    def predecir(self, X):
+        """Etiquetas, probabilidades y versión del modelo que clasificó cada fila."""
+        modelo = self.modelo
+        etiquetas, proba = modelo.predecir(X)
+        return etiquetas, proba, [modelo.version] * len(etiquetas)
+
+    def predecir_fila(self, fila, calcular=None):
+        """(etiqueta, probabilidades, versión) de una fila, desde la caché si ya se pidió a este modelo.
+
+        'calcular' clasifica la fila cuando no está en caché (p.ej. el
+        despachador de micro-lotes); por defecto se llama a predecir.
+        """
+        resultado = self.cache.obtener(self.version, fila)
+        if resultado is None:
+            if calcular is None:
+                etiquetas, proba, versiones = self.predecir(np.asarray(fila, dtype=np.float64).reshape(1, -1))
+                resultado = (etiquetas[0], proba[0], versiones[0])
+            else:
+                resultado = calcular(fila)
+            self.cache.guardar(resultado[2], fila, resultado)
+        return resultado
+
+
+def _desde_registros(registros):
+    if not all(isinstance(registro, dict) for registro in registros):
+        raise ValueError("Cada candidato debe ser un objeto JSON")
+    df = pd.DataFrame.from_records(registros)
+    # Los identificadores se devuelven tal cual llegaron: se toman de los registros
+    # y no de la columna que infiere pandas (donde un 7 acaba como 7.0 si falta en alguna fila)
+    for col in COLUMNAS_ID:
+        if col in df.columns:
+            df[col] = pd.Series([registro.get(col) for registro in registros], index=df.index, dtype=object)
+    return df
+
+
+def leer_lote(cuerpo, tipo):
+    """DataFrame de candidatos a partir de un cuerpo JSON (array), NDJSON o CSV."""
+    tipo = (tipo or "").split(";")[0].strip().lower()
+    texto = cuerpo.decode("utf-8") if isinstance(cuerpo, bytes) else cuerpo
+    if tipo in ("text/csv", "application/csv"):
+        # Los identificadores de un CSV se devuelven como el texto de la celda
+        df = pd.read_csv(io.StringIO(texto), dtype={col: str for col in COLUMNAS_ID})
+    elif tipo in ("application/x-ndjson", "application/ndjson", "application/jsonl"):
+        lineas = [json.loads(linea) for linea in texto.splitlines() if linea.strip()]
+        df = _desde_registros(lineas)
+    else:
+        datos = json.loads(texto)
+        if not isinstance(datos, list):
+            raise ValueError("Se esperaba un array JSON de candidatos")
+        df = _desde_registros(datos)
+    return df.rename(columns=_ALIAS)
+
+
+def validar(df):
+    """Matriz de features (n x 11) y error de cada fila (None si es válida).
+
+    Todas las columnas se convierten a número de una vez; solo las filas con
+    algún valor ausente o no numérico generan un mensaje.
+    """
+    faltan = [clave for clave in CLAVES if clave not in df.columns]
+    if faltan:
+        raise ValueError(f"Faltan las columnas: {', '.join(faltan)}")
+    X = np.column_stack([
+        pd.to_numeric(df[clave], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan) for clave in CLAVES
+    ])
+    malas = ~np.isfinite(X)
+    errores = [None] * len(df)
+    for fila in np.flatnonzero(malas.any(axis=1)):
+        invalidas = [CLAVES[j] for j in np.flatnonzero(malas[fila])]
+        errores[fila] = f"Valores ausentes o no numéricos: {', '.join(invalidas)}"
+    return X, errores
+
+
+def predecir_ndjson(modelo, df, filas_por_bloque=FILAS_POR_BLOQUE):
+    """Iterador de bloques NDJSON (bytes) con la predicción y probabilidades de cada fila.
+
+    La validación ocurre al llamarla (ValueError si faltan columnas), antes de
+    empezar a enviar la respuesta; la predicción avanza bloque a bloque.
+    """
+    X, errores = validar(df)
+    return _bloques_ndjson(modelo, df, X, errores, filas_por_bloque)
+
+
+def _bloques_ndjson(modelo, df, X, errores, filas_por_bloque):
+    ids = [col for col in COLUMNAS_ID if col in df.columns]
+    for inicio in range(0, len(df), filas_por_bloque):
+        fin = min(inicio + filas_por_bloque, len(df))
+        validas = [i for i in range(inicio, fin) if errores[i] is None]
+        resultados = {}
+        if validas:
+            etiquetas, proba = modelo.predecir(X[validas])
+            resultados = dict(zip(validas, zip(etiquetas, proba)))
+        lineas = []
+        for i in range(inicio, fin):
+            salida = {"fila": i}
+            for col in ids:
+                valor = df[col].iat[i]
+                # Sin la clave si la fila no traía ese identificador
+                if not pd.isna(valor):
+                    salida[col] = valor.item() if hasattr(valor, "item") else valor
+            if errores[i] is not None:
+                salida["error"] = errores[i]
+            else:
+                etiqueta, p = resultados[i]
+                salida["prediction"] = etiqueta
+                salida["probabilidades"] = {clase: round(float(v), 4) for clase, v in zip(modelo.clases, p)}
+            lineas.append(json.dumps(salida, ensure_ascii=False))
+        yield ("\n".join(lineas) + "\n").encode("utf-8")
@@ -0,0 +1,113 @@
+# prefork.py
+# Modo de servicio "preload and fork" para los servidores Flask.
+#
+# El proceso padre importa la app (modelo, scaler, encoder y catálogo ya
+# cargados), abre el socket y congela el recolector de basura (gc.freeze):
+# los objetos existentes pasan a la generación permanente y el GC de los
+# hijos ya no escribe en sus cabeceras, así que sus páginas siguen
+# compartidas copy-on-write. Los arrays del modelo (nodos de los árboles,
+# catálogo memory-mapped) viven en buffers aparte de la cabecera del objeto:
+# los cambios de refcount no los tocan. Después se crean N workers con fork()
+# que aceptan conexiones del mismo socket; si uno muere, se reemplaza.
+
+import gc
+import os
+import signal
+import sys
+import time
+
+from werkzeug.serving import make_server
+
+
+def _smaps(pid):
+    """Campos de /proc/<pid>/smaps_rollup en kB (vacío si no se pueden leer)."""
+    campos = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+            for linea in f:
+                partes = linea.split()
+                if len(partes) >= 3 and partes[0].endswith(":"):
+                    campos[partes[0][:-1]] = int(partes[1])
+    except OSError:
+        pass
+    return campos
+
+
+def informe_memoria(padre, workers):
+    """Texto con RSS, PSS y memoria privada/compartida del padre y de cada worker."""
+    filas = []
+    for nombre, pid in [("padre", padre)] + [(f"worker {i}", pid) for i, pid in enumerate(workers)]:
+        campos = _smaps(pid)
+        if not campos:
+            return "Informe de memoria no disponible (requiere /proc/<pid>/smaps_rollup, Linux)."
+        privada = campos.get("Private_Clean", 0) + campos.get("Private_Dirty", 0)
+        compartida = campos.get("Shared_Clean", 0) + campos.get("Shared_Dirty", 0)
+        filas.append((nombre, pid, campos.get("Rss", 0), campos.get("Pss", 0), privada, compartida))
+
+    lineas = [f"{'proceso':<10} {'pid':>7} {'RSS MB':>8} {'PSS MB':>8} {'privada MB':>11} {'compartida MB':>14}"]
+    for nombre, pid, rss, pss, privada, compartida in filas:
+        lineas.append(f"{nombre:<10} {pid:>7} {rss / 1024:>8.1f} {pss / 1024:>8.1f} {privada / 1024:>11.1f} {compartida / 1024:>14.1f}")
+    total_pss = sum(f[3] for f in filas) / 1024
+    sin_compartir = filas[0][2] / 1024 * len(filas)
+    lineas.append(f"Memoria real (suma de PSS): {total_pss:.1f} MB; cargando todo en cada proceso serían ~{sin_compartir:.1f} MB.")
+    return "\n".join(lineas)
+
+
+def _worker(servidor):
+    # Los hijos vuelven al comportamiento por defecto ante las señales
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    try:
+        servidor.serve_forever()
+    finally:
+        os._exit(0)
+
+
+def servir(app, host="127.0.0.1", port=5001, workers=2, informe=True):
+    """Sirve 'app' con 'workers' procesos hijos que comparten lo ya cargado en el padre."""
+    if not hasattr(os, "fork"):
+        print("⚠️ fork() no está disponible en este sistema: se usa un solo proceso.")
+        app.run(host=host, port=port, threaded=True)
+        return
+
+    servidor = make_server(host, port, app, threaded=True)
+    # Todo lo cargado hasta aquí queda fuera del alcance del GC de los hijos
+    gc.collect()
+    gc.freeze()
+
+    hijos = set()
+
+    def lanzar():
+        pid = os.fork()
+        if pid == 0:
+            _worker(servidor)
+        hijos.add(pid)
+        return pid
+
+    def terminar(signum, frame):
+        for pid in list(hijos):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        sys.exit(0)
+
+    signal.signal(signal.SIGTERM, terminar)
+    signal.signal(signal.SIGINT, terminar)
+
+    for _ in range(max(1, workers)):
+        lanzar()
+    print(f"🚀 Sirviendo en http://{host}:{port} con {len(hijos)} workers (pid padre {os.getpid()})")
+    if informe:
+        # Se deja arrancar a los workers antes de medir
+        time.sleep(1.0)
+        print(informe_memoria(os.getpid(), sorted(hijos)))
+
+    while True:
+        try:
+            pid, estado = os.wait()
+        except ChildProcessError:
+            return
+        hijos.discard(pid)
+        print(f"⚠️ El worker {pid} terminó (estado {estado}); se lanza otro.")
+        lanzar()
@@ -0,0 +1,225 @@
+# benchmark.py
+# Mide cómo escala la cadena de datos con catálogos sintéticos (sintetico.py).
+#
+# Para cada tamaño (10k, 100k, 1M, 10M filas) se generan las tablas FULL (una
+# sola vez: se reutilizan entre ejecuciones) y se miden, cada una en su propio
+# proceso para que el pico de memoria sea el de la etapa: unificar_datasets, limpiar_datasets, la construcción del catálogo
+# Arrow, load_and_prepare_data() del Dash y la ruta /exoplanets de app.py.
+# De cada etapa se guarda tiempo, pico de RSS y filas por segundo en
+# benchmark_resultados.jsonl (una línea por etapa), para comparar ejecuciones.
+#
+# Uso:
+#   python benchmark.py                       -> 10k, 100k y 1M
+#   python benchmark.py --tamaños 10k 10M
+#   python benchmark.py --comparar            -> última ejecución frente a la anterior
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import uuid
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+RAIZ = os.path.dirname(DIRECTORIO)
+sys.path.insert(0, RAIZ)
+
+import sintetico
+
+RESULTADOS = "benchmark_resultados.jsonl"
+DATOS = "benchmark_datos"
+TAMAÑOS_POR_DEFECTO = ["10k", "100k", "1M"]
+ETAPAS = ["unificar", "limpiar", "catalogo", "dash", "exoplanets"]
+
+
+def _rss_pico_mb():
+    """Pico de memoria residente del proceso actual (None si no se puede medir)."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux lo da en KB, macOS en bytes
+    return round(pico / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _filas_csv(ruta):
+    with open(ruta, "rb") as f:
+        return max(sum(bloque.count(b"\n") for bloque in iter(lambda: f.read(1 << 20), b"")) - 1, 0)
+
+
+def _etapa(nombre, filas):
+    """Ejecuta una etapa en la carpeta actual. Devuelve (filas procesadas, datos extra)."""
+    sys.path.insert(0, DIRECTORIO)
+    if nombre == "unificar":
+        import unificar_datasets
+        return filas, {"filas_salida": unificar_datasets.unificar()}
+    if nombre == "limpiar":
+        import limpiar_datasets
+        entrada = _filas_csv(limpiar_datasets.ENTRADA)
+        return entrada, {"filas_salida": limpiar_datasets.limpiar()}
+    if nombre == "catalogo":
+        import catalogo
+        catalogo.build_catalog(os.path.abspath(catalogo.CSV_NAME), force=True)
+        return _filas_csv(catalogo.CSV_NAME), {}
+    if nombre == "dash":
+        import visualizacion_3d_exoplanetas
+        inicio = time.perf_counter()
+        df = visualizacion_3d_exoplanetas.load_and_prepare_data()
+        primera = time.perf_counter() - inicio
+        # Los callbacks vuelven a llamarla en cada interacción: se mide también en caliente
+        inicio = time.perf_counter()
+        visualizacion_3d_exoplanetas.load_and_prepare_data()
+        return len(df), {"segundos_primera": round(primera, 4), "segundos_caliente": round(time.perf_counter() - inicio, 4)}
+    if nombre == "exoplanets":
+        # app.py exige la clave al importarse; /exoplanets no llega a usarla
+        os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+        os.environ["EXOPLANETS_CSV"] = os.path.abspath("exoplanets_visual.csv")
+        import app
+        cliente = app.app.test_client()
+        inicio = time.perf_counter()
+        respuesta = cliente.get("/exoplanets")
+        primera = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        cliente.get("/exoplanets")
+        return len(respuesta.get_json()), {
+            "status": respuesta.status_code,
+            "bytes": len(respuesta.data),
+            "segundos_primera": round(primera, 4),
+            "segundos_caliente": round(time.perf_counter() - inicio, 4),
+        }
+    raise ValueError(f"Etapa desconocida: {nombre}")
+
+
+def _medir_en_este_proceso(nombre, filas):
+    # El RSS base (intérprete + pandas) se separa del consumo propio de la etapa
+    import pandas  # noqa: F401
+    base = _rss_pico_mb()
+    inicio = time.perf_counter()
+    procesadas, extra = _etapa(nombre, filas)
+    segundos = time.perf_counter() - inicio
+    medida = {
+        "segundos": round(segundos, 4),
+        "filas": procesadas,
+        "filas_por_s": round(procesadas / segundos) if segundos > 0 else None,
+        "rss_base_mb": base,
+        "rss_pico_mb": _rss_pico_mb(),
+    }
+    medida.update(extra)
+    print(json.dumps(medida))
+
+
+def medir(nombre, filas, directorio, timeout=None):
+    """Ejecuta la etapa en un proceso nuevo dentro de 'directorio' y devuelve su medida."""
+    comando = [sys.executable, os.path.abspath(__file__), "--_etapa", nombre, "--_filas", str(filas)]
+    inicio = time.perf_counter()
+    try:
+        proceso = subprocess.run(comando, cwd=directorio, capture_output=True, text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return {"ok": False, "error": f"timeout ({timeout} s)", "segundos": round(time.perf_counter() - inicio, 4)}
+    if proceso.returncode != 0:
+        # Un proceso matado por falta de memoria no deja traza: queda el código de salida
+        ultima = (proceso.stderr.strip().splitlines() or [f"código de salida {proceso.returncode}"])[-1]
+        return {"ok": False, "error": ultima, "segundos": round(time.perf_counter() - inicio, 4)}
+    medida = json.loads(proceso.stdout.strip().splitlines()[-1])
+    medida["ok"] = True
+    return medida
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=DIRECTORIO, capture_output=True, text=True
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def ejecutar(tamaños, etapas=ETAPAS, datos=DATOS, resultados=RESULTADOS, timeout=None):
+    """Corre el benchmark y añade una línea por (tamaño, etapa) a 'resultados'."""
+    ejecucion = {
+        "ejecucion": uuid.uuid4().hex[:8],
+        "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": _commit(),
+        "python": platform.python_version(),
+        "maquina": platform.platform(),
+    }
+    medidas = []
+    for tamaño in tamaños:
+        filas = sintetico.parse_tamaño(tamaño)
+        directorio = os.path.join(datos, tamaño)
+        print(f"Generando {tamaño} filas sintéticas en {directorio}...")
+        sintetico.generar(filas, directorio)
+        roto = False
+        for nombre in etapas:
+            if roto:
+                # Si una etapa falla, las siguientes no tienen entrada
+                medida = {"ok": False, "error": "omitida (falló una etapa anterior)"}
+            else:
+                medida = medir(nombre, filas, directorio, timeout)
+                roto = not medida["ok"]
+            medida = {**ejecucion, "tamaño": tamaño, "etapa": nombre, **medida}
+            medidas.append(medida)
+            with open(resultados, "a", encoding="utf-8") as f:
+                f.write(json.dumps(medida) + "\n")
+            _imprimir(medida)
+    return medidas
+
+
+def _imprimir(medida):
+    if not medida["ok"]:
+        print(f"❌ {medida['tamaño']:>5} {medida['etapa']:<10} {medida['error']}")
+        return
+    ritmo = f"{medida['filas_por_s']:>12,} filas/s" if medida.get("filas_por_s") else " " * 19
+    rss = f"{medida['rss_pico_mb']:>9.1f} MB" if medida.get("rss_pico_mb") is not None else ""
+    print(f"✔ {medida['tamaño']:>5} {medida['etapa']:<10} {medida['segundos']:>9.3f} s {ritmo} {rss}")
+
+
+def comparar(resultados=RESULTADOS):
+    """Compara la última ejecución con la anterior (tiempo y pico de RSS por etapa)."""
+    with open(resultados, "r", encoding="utf-8") as f:
+        medidas = [json.loads(linea) for linea in f if linea.strip()]
+    ejecuciones = list(dict.fromkeys(m["ejecucion"] for m in medidas))
+    if len(ejecuciones) < 2:
+        print("Hace falta al menos dos ejecuciones para comparar.")
+        return
+    previa, ultima = ({(m["tamaño"], m["etapa"]): m for m in medidas if m["ejecucion"] == e} for e in ejecuciones[-2:])
+    print(f"{'tamaño':>6} {'etapa':<10} {'antes (s)':>10} {'ahora (s)':>10} {'cambio':>8} {'RSS antes':>10} {'RSS ahora':>10}")
+    for clave, ahora in ultima.items():
+        antes = previa.get(clave)
+        if not antes or not antes["ok"] or not ahora["ok"]:
+            estado = "error" if not ahora["ok"] else "nueva"
+            print(f"{clave[0]:>6} {clave[1]:<10} {estado:>10}")
+            continue
+        cambio = (ahora["segundos"] / antes["segundos"] - 1) * 100 if antes["segundos"] else 0.0
+        print(
+            f"{clave[0]:>6} {clave[1]:<10} {antes['segundos']:>10.3f} {ahora['segundos']:>10.3f} {cambio:>+7.1f}%"
+            f" {antes.get('rss_pico_mb') or 0:>10.1f} {ahora.get('rss_pico_mb') or 0:>10.1f}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de la cadena de datos con catálogos sintéticos.")
+    parser.add_argument("--tamaños", nargs="+", default=TAMAÑOS_POR_DEFECTO, help=f"entre {sintetico.TAMAÑOS}")
+    parser.add_argument("--etapas", nargs="+", default=ETAPAS, choices=ETAPAS)
+    parser.add_argument("--timeout", type=float, help="segundos máximos por etapa")
+    parser.add_argument("--comparar", action="store_true", help="comparar las dos últimas ejecuciones")
+    # Uso interno: el proceso hijo que mide una etapa
+    parser.add_argument("--_etapa", help=argparse.SUPPRESS)
+    parser.add_argument("--_filas", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args._etapa:
+        _medir_en_este_proceso(args._etapa, args._filas)
+        return
+    os.chdir(DIRECTORIO)
+    if args.comparar:
+        comparar()
+        return
+    ejecutar(args.tamaños, args.etapas, timeout=args.timeout)
+
+
+if __name__ == "__main__":
+    main()
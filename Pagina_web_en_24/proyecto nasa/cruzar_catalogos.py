@@ -0,0 +1,127 @@
+# cruzar_catalogos.py
+# Cruce posicional entre Kepler (KOI), TESS (TOI) y K2.
+#
+# Un mismo objeto puede aparecer con nombres distintos en cada catálogo
+# ("Kepler-227 b", "TOI-1049.01", "K2-151 b"...), así que deduplicar por
+# 'pl_name' no basta. Aquí se buscan parejas cercanas en el cielo con un
+# KD-tree sobre vectores unitarios (O(n log n) en lugar de comparar todas las
+# parejas), se confirman con el período orbital y cada grupo se fusiona en un
+# único registro canónico que conserva de qué catálogos proviene ('source') y
+# los nombres que tenía en los demás ('alias').
+#
+# Un grupo nunca contiene dos filas del mismo catálogo: las cadenas del tipo
+# KOI-a ~ TOI-x ~ KOI-b se parten. Las parejas se unen de la más cercana a la
+# más lejana y se descarta la que juntaría dos filas de un mismo catálogo, así
+# que TOI-x queda con el KOI más próximo y el otro sigue como objeto aparte.
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from coordenadas import vectores_unitarios
+
+# Radio de búsqueda en segundos de arco
+RADIO_ARCSEC = 2.0
+# Diferencia relativa máxima entre períodos orbitales para considerar que es el mismo planeta
+TOLERANCIA_PERIODO = 0.005
+# Orden de preferencia al elegir los valores del registro canónico
+PRIORIDAD_FUENTES = ("K2", "KOI", "TOI")
+
+
+def parejas_coincidentes(df, radio_arcsec=RADIO_ARCSEC, tolerancia_periodo=TOLERANCIA_PERIODO):
+    """Índices (i, j) de filas de catálogos distintos que son el mismo objeto."""
+    ra = pd.to_numeric(df["ra"], errors="coerce").to_numpy()
+    dec = pd.to_numeric(df["dec"], errors="coerce").to_numpy()
+    periodo = pd.to_numeric(df["pl_orbper"], errors="coerce").to_numpy()
+    fuente = df["source"].astype(str).to_numpy()
+
+    # Sin posición ni período no se puede confirmar la coincidencia
+    con_datos = np.flatnonzero(~np.isnan(ra) & ~np.isnan(dec) & ~np.isnan(periodo) & (periodo > 0))
+    if len(con_datos) < 2:
+        return np.empty((0, 2), dtype=np.intp)
+
+    arbol = cKDTree(vectores_unitarios(ra[con_datos], dec[con_datos]))
+    # Un ángulo θ en la esfera corresponde a una cuerda de 2·sin(θ/2)
+    cuerda = 2 * np.sin(np.deg2rad(radio_arcsec / 3600.0) / 2)
+    parejas = con_datos[arbol.query_pairs(cuerda, output_type="ndarray")]
+    if len(parejas) == 0:
+        return parejas.reshape(0, 2)
+
+    i, j = parejas[:, 0], parejas[:, 1]
+    # Misma estrella no basta: planetas del mismo sistema comparten posición,
+    # por eso se exige el mismo período y que vengan de catálogos distintos.
+    p_i, p_j = periodo[i], periodo[j]
+    mismo_periodo = np.abs(p_i - p_j) <= tolerancia_periodo * np.maximum(p_i, p_j)
+    return parejas[mismo_periodo & (fuente[i] != fuente[j])]
+
+
+def agrupar(df, parejas):
+    """Etiqueta de grupo de cada fila (en orden de primera aparición), sin repetir catálogo en un grupo."""
+    n = len(df)
+    fuente = df["source"].astype(str).to_numpy()
+    padre = np.arange(n)
+    fuentes = {i: {fuente[i]} for i in np.unique(parejas)}
+
+    def raiz(i):
+        while padre[i] != i:
+            padre[i] = padre[padre[i]]
+            i = padre[i]
+        return i
+
+    # Las parejas más cercanas primero (distancia entre vectores unitarios)
+    vectores = vectores_unitarios(
+        pd.to_numeric(df["ra"], errors="coerce").to_numpy()[parejas.ravel()],
+        pd.to_numeric(df["dec"], errors="coerce").to_numpy()[parejas.ravel()],
+    ).reshape(len(parejas), 2, 3)
+    distancia = np.linalg.norm(vectores[:, 0] - vectores[:, 1], axis=1)
+    for i, j in parejas[np.argsort(distancia, kind="stable")]:
+        a, b = raiz(i), raiz(j)
+        if a == b or fuentes[a] & fuentes[b]:
+            continue
+        padre[b] = a
+        fuentes[a] |= fuentes.pop(b)
+
+    raices = np.array([raiz(i) for i in range(n)])
+    primera = np.full(n, n)
+    np.minimum.at(primera, raices, np.arange(n))
+    return np.unique(primera[raices], return_inverse=True)[1]
+
+
+def crossmatch(df, radio_arcsec=RADIO_ARCSEC, tolerancia_periodo=TOLERANCIA_PERIODO, prioridad=PRIORIDAD_FUENTES):
+    """Fusiona las filas que son el mismo objeto en distintos catálogos.
+
+    Cada grupo se reduce a un registro: para cada columna se toma el primer
+    valor no nulo siguiendo 'prioridad'. La columna 'source' pasa a listar todos
+    los catálogos del grupo (p.ej. "KOI+TOI") y 'alias' los demás nombres.
+    """
+    df = df.reset_index(drop=True)
+    parejas = parejas_coincidentes(df, radio_arcsec, tolerancia_periodo)
+    if len(parejas) == 0:
+        # Misma columna 'alias' (vacía) aunque no haya nada que fusionar
+        return df.assign(alias=pd.NA)
+
+    grupo = agrupar(df, parejas)
+
+    rango = {fuente: k for k, fuente in enumerate(prioridad)}
+    orden = df["source"].map(rango).fillna(len(prioridad))
+    ordenado = df.assign(_grupo=grupo, _rango=orden).sort_values(["_grupo", "_rango"], kind="stable")
+
+    # Solo se agregan los grupos con más de una fila; el resto pasa tal cual
+    tamano = np.bincount(grupo)
+    multiples = tamano[ordenado["_grupo"].to_numpy()] > 1
+    sueltos = ordenado[~multiples]
+    agrupados = ordenado[multiples].groupby("_grupo", sort=False)
+
+    fusionados = agrupados.first()
+    fusionados["source"] = agrupados["source"].agg(lambda s: "+".join(dict.fromkeys(s.astype(str))))
+    fusionados["alias"] = agrupados["pl_name"].agg(lambda s: ";".join(s.dropna().astype(str).iloc[1:]))
+
+    # Se conserva el orden original (las etiquetas de grupo siguen el orden de las filas)
+    resultado = pd.concat([sueltos, fusionados.reset_index()], ignore_index=True)
+    resultado = resultado.sort_values("_grupo", kind="stable")
+    print(f"Cruce posicional: {int(multiples.sum())} filas fusionadas en {len(fusionados)} objetos.")
+    return resultado.drop(columns=["_grupo", "_rango"]).reset_index(drop=True)
@@ -1,30 +1,353 @@
 # descargar_datasets.py
 # Script modificado para descargar TODAS las columnas disponibles en la fuente de la NASA.
+#
+# Uso:
+#   python descargar_datasets.py                  -> descarga completa de las 3 tablas
+#   python descargar_datasets.py --sync           -> sincronización incremental (solo filas nuevas/cambiadas)
+#   python descargar_datasets.py --sync --archive carpeta/
+#       -> igual, pero contra un archivo local (carpeta con <tabla>.csv) para probar sin conexión
+#
+# La descarga completa se hace por tramos de 'rowupdate' (uno por año, más las
+# filas anteriores, las posteriores y las que no tienen fecha). Cada tramo se
+# guarda en '<archivo>.tramoN.csv' y se anota en sync_state.json; si la descarga
+# se interrumpe, la siguiente ejecución sigue por el primer tramo que falta.
+# Dentro de cada tabla la red y el disco se solapan: un hilo escribe un tramo
+# mientras se descarga el siguiente.
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-from astroquery.nasa_exoplanet_archive import NasaExoplanetArchive
 import pandas as pd
 
+# atomic_write vive en el módulo del catálogo (raíz del proyecto)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from catalogo import atomic_write
+
+# (tabla en el archivo de la NASA, archivo local, columnas que identifican una fila)
+TABLAS = [
+    ("cumulative", "kepler_koi_FULL.csv", ["kepoi_name"]),   # Kepler/KOI
+    ("toi", "tess_toi_FULL.csv", ["toi"]),                   # TESS
+    ("k2pandc", "k2_planets_FULL.csv", ["pl_name", "pl_refname"]),  # K2
+]
+
+# Columna con la fecha de última modificación de cada fila (formato ISO, comparable como texto)
+COLUMNA_ACTUALIZACION = "rowupdate"
+ARCHIVO_ESTADO = "sync_state.json"
+# Primer año con tramo propio en la descarga completa (las filas anteriores van juntas)
+ANIO_INICIAL = 2010
+_estado_lock = threading.Lock()
+
+
+class LocalArchive:
+    """Archivo local con la misma interfaz de consulta que NasaExoplanetArchive.
+
+    Cada tabla es un CSV '<tabla>.csv' dentro de 'directorio'. Solo se admite el
+    tipo de filtro que genera este script: condiciones "<columna> >= '<valor>'",
+    "<columna> < '<valor>'" o "<columna> is null" unidas con "and".
+    """
+
+    def __init__(self, directorio):
+        self.directorio = directorio
+
+    def query_criteria(self, table, select="*", where=None):
+        df = pd.read_csv(os.path.join(self.directorio, f"{table}.csv"), dtype=str)
+        for condicion in (where.split(" and ") if where else []):
+            if condicion.endswith(" is null"):
+                df = df[df[condicion[:-len(" is null")].strip()].isna()]
+            elif ">=" in condicion:
+                columna, valor = [parte.strip() for parte in condicion.split(">=", 1)]
+                df = df[df[columna] >= valor.strip("'")]
+            else:
+                columna, valor = [parte.strip() for parte in condicion.split("<", 1)]
+                df = df[df[columna] < valor.strip("'")]
+        if select != "*":
+            df = df[[col.strip() for col in select.split(",")]]
+        return _ResultadoLocal(df.reset_index(drop=True))
+
+
+class _ResultadoLocal:
+    def __init__(self, df):
+        self._df = df
+
+    def to_pandas(self):
+        return self._df.copy()
+
+
+def archivo_remoto():
+    from astroquery.nasa_exoplanet_archive import NasaExoplanetArchive
+    return NasaExoplanetArchive
+
+
+def leer_estado(ruta=ARCHIVO_ESTADO):
+    if not os.path.exists(ruta):
+        return {}
+    with open(ruta, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def guardar_estado(estado, ruta=ARCHIVO_ESTADO):
+    # Un solo hilo escribe a la vez; el último en escribir deja el estado más reciente
+    with _estado_lock, atomic_write(ruta) as tmp_path:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(estado, f, indent=2, sort_keys=True)
+
+
+def _ultima_actualizacion(df):
+    if COLUMNA_ACTUALIZACION not in df.columns or df.empty:
+        return None
+    valores = df[COLUMNA_ACTUALIZACION].dropna().astype(str)
+    valores = valores[valores != ""]
+    return valores.max() if not valores.empty else None
+
+
+def tramos(hasta=None):
+    """Filtros 'where' que reparten una tabla completa por año de 'rowupdate', sin solaparse."""
+    hasta = hasta or time.gmtime().tm_year + 1
+    limites = [f"{anio}-01-01" for anio in range(ANIO_INICIAL, hasta + 1)]
+    col = COLUMNA_ACTUALIZACION
+    filtros = [f"{col} < '{limites[0]}'"]
+    filtros += [f"{col} >= '{desde}' and {col} < '{hasta}'" for desde, hasta in zip(limites, limites[1:])]
+    return filtros + [f"{col} >= '{limites[-1]}'", f"{col} is null"]
+
+
+def _guardar_tramo(table, ruta):
+    with atomic_write(ruta) as tmp_path:
+        table.to_pandas().to_csv(tmp_path, index=False)
+
+
+def _descargar(name, filename, archive=None, estado=None, ruta_estado=ARCHIVO_ESTADO, claves=None):
+    """Descarga completa por tramos, reanudable: los tramos ya guardados no se vuelven a pedir.
+
+    Cada tramo se escribe en un hilo aparte mientras se descarga el siguiente;
+    un tramo cuenta como hecho (y se anota en el estado) cuando ya está en disco.
+    """
+    archive = archive or archivo_remoto()
+    estado = leer_estado(ruta_estado) if estado is None else estado
+    # Los tramos se fijan al empezar (para reanudar con los mismos aunque cambie el año)
+    progreso = dict(estado.get(name, {}).get("inicial") or {"tramos": tramos(), "hechos": 0})
+    if progreso["hechos"]:
+        print(f"{name}: reanudando la descarga completa en el tramo {progreso['hechos'] + 1}/{len(progreso['tramos'])}.")
+    partes = [f"{filename}.tramo{i}.csv" for i in range(len(progreso["tramos"]))]
+
+    def anotar(i):
+        nonlocal progreso
+        progreso = dict(progreso, hechos=i + 1)
+        estado[name] = dict(estado.get(name, {}), inicial=progreso)
+        guardar_estado(estado, ruta_estado)
+
+    # (tramo, Future de su escritura) que todavía no se ha anotado
+    escrito = None
+    with ThreadPoolExecutor(max_workers=1) as escritor:
+        try:
+            for i in range(progreso["hechos"], len(progreso["tramos"])):
+                # 1. DESCARGAR UN TRAMO DE LA TABLA COMPLETA: Usamos select='*'
+                table = archive.query_criteria(table=name, select="*", where=progreso["tramos"][i])
+                if escrito is not None:
+                    escrito[1].result()
+                    anotar(escrito[0])
+                escrito = (i, escritor.submit(_guardar_tramo, table, partes[i]))
+            if escrito is not None:
+                escrito[1].result()
+                anotar(escrito[0])
+                escrito = None
+        finally:
+            # Si falla la red, el tramo que se estaba escribiendo no se pierde
+            if escrito is not None and escrito[1].exception() is None:
+                anotar(escrito[0])
+
+    # 2. GUARDAR EL ARCHIVO CON TODAS LAS COLUMNAS DISPONIBLES (los tramos, como texto, tal cual)
+    df = pd.concat(
+        [pd.read_csv(parte, dtype=str, keep_default_na=False) for parte in partes], ignore_index=True
+    )
+    # Una fila modificada entre dos ejecuciones puede venir en dos tramos: gana la más reciente
+    claves = [c for c in (claves or []) if c in df.columns]
+    if claves:
+        df = df.drop_duplicates(subset=claves, keep="last")
+    with atomic_write(filename) as tmp_path:
+        df.to_csv(tmp_path, index=False)
+    estado[name] = {clave: valor for clave, valor in estado.get(name, {}).items() if clave != "inicial"}
+    guardar_estado(estado, ruta_estado)
+    for parte in partes:
+        os.remove(parte)
+    return df
+
+
 # Función auxiliar para guardar CSV
-def save_table(name, filename):
+def save_table(name, filename, archive=None):
     print(f"Descargando {name} ...")
     try:
-        # 1. DESCARGAR LA TABLA COMPLETA: Usamos select='*'
-        table = NasaExoplanetArchive.query_criteria(table=name, select="*")
-        df = table.to_pandas()
-
-        # 2. GUARDAR EL ARCHIVO CON TODAS LAS COLUMNAS DISPONIBLES
-        df.to_csv(filename, index=False)
-        
+        df = _descargar(name, filename, archive)
         print(f"✔ Guardado en {filename} con {len(df)} filas y {len(df.columns)} columnas.")
         print(f"  --> Se han guardado {len(df.columns)} columnas.")
-        
+        return df
+
     except Exception as e:
         print(f"❌ Error descargando {name}: {e}")
 
 
-# --- EJECUCIÓN DE DESCARGAS ---
-save_table("cumulative", "kepler_koi_FULL.csv")   # Kepler/KOI
-save_table("toi", "tess_toi_FULL.csv")           # TESS
-save_table("k2pandc", "k2_planets_FULL.csv")      # K2
+def _fusionar(filename, delta, claves):
+    """Mezcla las filas nuevas/cambiadas en el CSV local (gana la versión más reciente)."""
+    actual = pd.read_csv(filename, dtype=str)
+    combinado = pd.concat([actual, delta], ignore_index=True)
+    claves = [c for c in claves if c in combinado.columns] or None
+    combinado = combinado.drop_duplicates(subset=claves, keep="last")
+    with atomic_write(filename) as tmp_path:
+        combinado.to_csv(tmp_path, index=False)
+    return len(combinado)
+
+
+def sync_table(name, filename, claves, archive=None, estado=None, ruta_estado=ARCHIVO_ESTADO):
+    """Sincroniza una tabla de forma incremental usando la marca 'rowupdate'.
+
+    El delta descargado se guarda primero en '<archivo>.delta.csv' y se anota en el
+    estado; si el proceso se interrumpe, la siguiente ejecución fusiona ese delta
+    sin volver a descargarlo.
+    """
+    estado = leer_estado(ruta_estado) if estado is None else estado
+    # Cada tabla reemplaza su propia entrada (nunca la modifica en sitio) para
+    # que varios hilos puedan compartir 'estado'.
+    info = dict(estado.get(name, {}))
+    marca = info.get("rowupdate")
+
+    if marca is None or not os.path.exists(filename):
+        print(f"{name}: sin marca previa, descarga completa.")
+        df = _descargar(name, filename, archive, estado, ruta_estado, claves)
+        estado[name] = {"rowupdate": _ultima_actualizacion(df), "filas": len(df)}
+        guardar_estado(estado, ruta_estado)
+        return estado
+
+    ruta_delta = filename + ".delta.csv"
+    pendiente = info.get("pendiente")
+    if pendiente and os.path.exists(ruta_delta):
+        print(f"{name}: reanudando fusión de un delta descargado previamente.")
+        delta = pd.read_csv(ruta_delta, dtype=str)
+    else:
+        print(f"Sincronizando {name} desde {marca} ...")
+        archive = archive or archivo_remoto()
+        # '>=' para no perder filas modificadas el mismo día de la marca; la
+        # fusión por clave hace que repetirlas no tenga efecto.
+        table = archive.query_criteria(
+            table=name, select="*", where=f"{COLUMNA_ACTUALIZACION} >= '{marca}'"
+        )
+        delta = table.to_pandas()
+        with atomic_write(ruta_delta) as tmp_path:
+            delta.to_csv(tmp_path, index=False)
+        # Se vuelve a leer como texto para fusionar igual que al reanudar
+        delta = pd.read_csv(ruta_delta, dtype=str)
+        pendiente = {"rowupdate": _ultima_actualizacion(delta) or marca, "filas": len(delta)}
+        estado[name] = dict(info, pendiente=pendiente)
+        guardar_estado(estado, ruta_estado)
+
+    total = _fusionar(filename, delta, claves) if len(delta) else info.get("filas")
+    estado[name] = {"rowupdate": pendiente["rowupdate"], "filas": total}
+    guardar_estado(estado, ruta_estado)
+    os.remove(ruta_delta)
+    print(f"✔ {name}: {len(delta)} filas nuevas o modificadas fusionadas en {filename}.")
+    return estado
+
+
+def _con_reintentos(funcion, reintentos, espera):
+    """Ejecuta 'funcion' reintentando con espera exponencial (espera, 2*espera, 4*espera...)."""
+    for intento in range(reintentos + 1):
+        try:
+            return funcion()
+        except Exception as e:
+            if intento == reintentos:
+                raise
+            pausa = espera * 2 ** intento
+            print(f"  ⚠️ {e} -> reintento {intento + 1}/{reintentos} en {pausa:.1f} s")
+            time.sleep(pausa)
+
+
+def _procesar_tabla(name, filename, claves, archive, estado, sync, reintentos, espera):
+    inicio = time.perf_counter()
+    if sync:
+        _con_reintentos(
+            lambda: sync_table(name, filename, claves, archive, estado), reintentos, espera
+        )
+        filas = estado[name]["filas"]
+    else:
+        print(f"Descargando {name} ...")
+        df = _con_reintentos(lambda: _descargar(name, filename, archive, estado, claves=claves), reintentos, espera)
+        # Deja anotada la marca para que un '--sync' posterior sea incremental
+        estado[name] = {"rowupdate": _ultima_actualizacion(df), "filas": len(df)}
+        guardar_estado(estado)
+        filas = len(df)
+    return {
+        "tabla": name,
+        "archivo": filename,
+        "filas": filas,
+        "bytes": os.path.getsize(filename),
+        "segundos": time.perf_counter() - inicio,
+    }
+
+
+def descargar_en_paralelo(tablas=TABLAS, archive=None, sync=False, workers=3, reintentos=3, espera=2.0):
+    """Descarga (o sincroniza) varias tablas a la vez con un pool de hilos acotado.
+
+    Cada hilo descarga su tabla por tramos y, dentro de la tabla, escribe un
+    tramo mientras descarga el siguiente (ver _descargar); además las tablas
+    avanzan a la vez, así que el tiempo total se acerca al de la tabla más
+    lenta. Devuelve un informe por tabla.
+    """
+    estado = leer_estado()
+    # Claves creadas antes de lanzar los hilos: luego solo se reemplazan valores
+    for name, _, _ in tablas:
+        estado.setdefault(name, {})
+
+    informes = []
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futuros = {
+            pool.submit(_procesar_tabla, name, filename, claves, archive, estado, sync, reintentos, espera): name
+            for name, filename, claves in tablas
+        }
+        for futuro in as_completed(futuros):
+            name = futuros[futuro]
+            try:
+                informe = futuro.result()
+            except Exception as e:
+                print(f"❌ Error descargando {name}: {e}")
+                continue
+            informes.append(informe)
+            print(
+                f"✔ {informe['tabla']}: {informe['filas']} filas, "
+                f"{informe['bytes'] / 1e6:.2f} MB en {informe['segundos']:.2f} s -> {informe['archivo']}"
+            )
+
+    total = time.perf_counter() - inicio
+    suma = sum(informe["segundos"] for informe in informes)
+    print(f"⏱  Tiempo total: {total:.2f} s (suma por tabla: {suma:.2f} s, {workers} hilos)")
+    return informes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Descarga las tablas del NASA Exoplanet Archive.")
+    parser.add_argument("--sync", action="store_true", help="sincronización incremental por 'rowupdate'")
+    parser.add_argument("--archive", help="carpeta con tablas locales que sustituye al archivo de la NASA")
+    parser.add_argument("--workers", type=int, default=3, help="tablas descargadas en paralelo (por defecto 3)")
+    parser.add_argument("--reintentos", type=int, default=3, help="reintentos por tabla ante un error")
+    parser.add_argument("--espera", type=float, default=2.0, help="espera inicial entre reintentos, en segundos")
+    args = parser.parse_args(argv)
+
+    archive = LocalArchive(args.archive) if args.archive else None
+
+    # --- EJECUCIÓN DE DESCARGAS ---
+    descargar_en_paralelo(
+        archive=archive, sync=args.sync, workers=args.workers,
+        reintentos=args.reintentos, espera=args.espera,
+    )
+
+    if args.sync:
+        print("🚀 Sincronización finalizada.")
+    else:
+        print("🚀 Descarga finalizada. Los 3 archivos contienen TODAS las columnas posibles.")
+
 
-print("🚀 Descarga finalizada. Los 3 archivos contienen TODAS las columnas posibles.")
+if __name__ == "__main__":
+    main()
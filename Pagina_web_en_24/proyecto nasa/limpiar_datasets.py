@@ -1,51 +1,82 @@
 import pandas as pd
 import numpy as np
 import os
+import sys
+from cruzar_catalogos import crossmatch
 
-# --- Cargar dataset unificado ---
-try:
-    df = pd.read_csv("exoplanets_dataset.csv")
-except FileNotFoundError:
-    print("ERROR: No se encontró 'exoplanets_dataset.csv'. Ejecuta 'unificar_datasets.py' primero.")
-    exit()
-
-# --- LIMPIEZA GENERAL Y CONVERSIÓN ---
-cols_to_numeric = [
-    'pl_orbper', 'pl_rade', 'pl_bmasse', 'pl_eqt', 
-    'st_teff', 'st_rad', 'st_mass', 'sy_dist', 'ra', 'dec'
-]
-for col in cols_to_numeric:
-    if col in df.columns:
-        df[col] = pd.to_numeric(df[col], errors='coerce')
-
-# Rellenar valores de temperatura faltantes con la mediana
-if 'st_teff' in df.columns:
-    df['st_teff'] = df['st_teff'].fillna(df['st_teff'].median())
-
-# Rellenar valores de nombre faltantes
-if 'pl_name' in df.columns:
-    df['pl_name'] = df['pl_name'].fillna('Unknown')
-    df = df.drop_duplicates(subset=['pl_name'])
-
-# =============================
-# 2) DATASET PARA VISUALIZACIÓN (VISUAL)
-# =============================
-cols_visual_base = [
-    "pl_name", "hostname", "pl_orbper", "pl_rade", "pl_bmasse", "pl_eqt", "ra", "dec", 
-    "st_teff", "st_rad", "st_mass", "sy_dist", "disc_year", "discoverymethod", "source"
-] 
-cols_visual = [col for col in cols_visual_base if col in df.columns]
-
-df_visual = df[cols_visual].copy()
-
-# *** FILTRADO CRÍTICO AQUÍ: ELIMINAR CUALQUIER FILA SIN COORDENADAS O DISTANCIA ***
-# Si falta cualquiera de estas, la coordenada 3D será (0,0,0) o NaN.
-df_visual = df_visual.dropna(subset=['ra', 'dec', 'sy_dist'])
-
-# Adicionalmente, eliminar distancias negativas o cero.
-df_visual = df_visual[df_visual['sy_dist'] > 0.0]
-
-# Guardar dataset para visualización (ESTE ES EL ARCHIVO LIMPIO)
-df_visual.to_csv("exoplanets_visual.csv", index=False)
-print("✅ Dataset para visualización (exoplanets_visual.csv) creado. ¡Filas con NaN en coordenadas ELIMINADAS!")
-print(f"Dimensiones de exoplanets_visual.csv: {df_visual.shape[0]} filas limpias.")
\ No newline at end of file
+# El esquema tipado del catálogo vive en la raíz del proyecto
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from catalogo import atomic_write
+from esquema import apply_schema
+from validacion import REGLAS_LIMPIEZA, evaluar, resumen
+
+ENTRADA = "exoplanets_dataset.csv"
+SALIDA = "exoplanets_visual.csv"
+
+
+def limpiar(entrada=ENTRADA, salida=SALIDA):
+    """Limpia el dataset unificado y guarda el dataset para visualización. Devuelve sus filas."""
+    # --- Cargar dataset unificado ---
+    df = pd.read_csv(entrada)
+
+    # Nombres repetidos entre tablas (unificar no los quita): se queda la primera
+    # fila, y solo una de las que no tienen nombre
+    if 'pl_name' in df.columns:
+        df = df.drop_duplicates(subset=['pl_name'], keep='first')
+
+    # --- LIMPIEZA GENERAL Y CONVERSIÓN ---
+    cols_to_numeric = [
+        'pl_orbper', 'pl_rade', 'pl_bmasse', 'pl_eqt',
+        'st_teff', 'st_rad', 'st_mass', 'sy_dist', 'ra', 'dec'
+    ]
+    for col in cols_to_numeric:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    # Cruce posicional: fusiona el mismo objeto listado con distinto nombre en KOI/TOI/K2
+    # (antes de imputar, para que los valores reales de cada catálogo tengan prioridad)
+    if {'ra', 'dec', 'pl_orbper', 'source'}.issubset(df.columns):
+        df = crossmatch(df)
+
+    # Rellenar valores de temperatura faltantes con la mediana
+    if 'st_teff' in df.columns:
+        df['st_teff'] = df['st_teff'].fillna(df['st_teff'].median())
+
+    # Rellenar valores de nombre faltantes
+    if 'pl_name' in df.columns:
+        df['pl_name'] = df['pl_name'].fillna('Unknown')
+        df = df.drop_duplicates(subset=['pl_name'])
+
+    # =============================
+    # 2) DATASET PARA VISUALIZACIÓN (VISUAL)
+    # =============================
+    cols_visual_base = [
+        "pl_name", "hostname", "pl_orbper", "pl_rade", "pl_bmasse", "pl_eqt", "ra", "dec",
+        "st_teff", "st_rad", "st_mass", "sy_dist", "disc_year", "discoverymethod", "source", "alias"
+    ]
+    cols_visual = [col for col in cols_visual_base if col in df.columns]
+
+    # Tipos compactos del esquema (float32, categorías, Int16 para 'disc_year')
+    df_visual = apply_schema(df[cols_visual])
+
+    # *** FILTRADO CRÍTICO AQUÍ: ELIMINAR CUALQUIER FILA SIN COORDENADAS O DISTANCIA ***
+    # Si falta cualquiera de estas, la coordenada 3D será (0,0,0) o NaN.
+    # Adicionalmente, eliminar distancias negativas o cero.
+    valido, rechazos = evaluar(df_visual, REGLAS_LIMPIEZA)
+    print(resumen(rechazos, len(df_visual)))
+    df_visual = df_visual[valido]
+
+    # Guardar dataset para visualización (ESTE ES EL ARCHIVO LIMPIO)
+    with atomic_write(salida) as tmp_path:
+        df_visual.to_csv(tmp_path, index=False)
+    return len(df_visual)
+
+
+if __name__ == "__main__":
+    try:
+        filas = limpiar()
+    except FileNotFoundError:
+        print("ERROR: No se encontró 'exoplanets_dataset.csv'. Ejecuta 'unificar_datasets.py' primero.")
+        exit()
+    print("✅ Dataset para visualización (exoplanets_visual.csv) creado. ¡Filas con NaN en coordenadas ELIMINADAS!")
+    print(f"Dimensiones de exoplanets_visual.csv: {filas} filas limpias.")
@@ -0,0 +1,267 @@
+# pipeline.py
+# Ejecuta la cadena de datos descargar -> unificar -> limpiar -> catálogo como un DAG.
+#
+# Cada etapa declara sus archivos de entrada, sus salidas y el código del que
+# depende. Su huella es el hash de todo eso; si coincide con la de la última
+# ejecución y las salidas siguen en disco, la etapa se salta. Las etapas
+# independientes (las tres descargas) se ejecutan en paralelo y todas las
+# salidas se escriben de forma atómica (archivo temporal + os.replace).
+#
+# Uso:
+#   python pipeline.py                 -> reconstruye solo lo que haya cambiado
+#   python pipeline.py --descargar     -> además sincroniza las tablas con la NASA
+#   python pipeline.py --publicar      -> copia el catálogo limpio a la raíz del proyecto (apps)
+#   python pipeline.py --forzar        -> ignora la caché y reconstruye todas las etapas locales
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+RAIZ = os.path.dirname(DIRECTORIO)
+sys.path.insert(0, RAIZ)
+
+import catalogo
+import descargar_datasets
+import limpiar_datasets
+import unificar_datasets
+from catalogo import atomic_write
+
+ARCHIVO_CACHE = ".pipeline_cache.json"
+# Código del que depende la construcción del catálogo columnar
+CODIGO_CATALOGO = [os.path.join(RAIZ, nombre) for nombre in ("catalogo.py", "esquema.py", "validacion.py", "coordenadas.py")]
+
+
+class Etapa:
+    """Nodo del DAG: una función con sus entradas, salidas, código y dependencias."""
+
+    def __init__(self, nombre, funcion, entradas=(), salidas=(), codigo=(), depende=(), siempre=False):
+        self.nombre = nombre
+        self.funcion = funcion
+        self.entradas = list(entradas)
+        self.salidas = list(salidas)
+        self.codigo = list(codigo)
+        self.depende = list(depende)
+        # Las descargas no tienen entradas locales: solo se repiten si se piden
+        self.siempre = siempre
+
+
+class _Hashes:
+    """Hash del contenido de cada archivo, reutilizado mientras su tamaño y mtime no cambien."""
+
+    def __init__(self, guardados):
+        self.guardados = guardados
+        self._lock = threading.Lock()
+
+    def __call__(self, ruta):
+        stat = os.stat(ruta)
+        firma = [stat.st_size, stat.st_mtime_ns]
+        with self._lock:
+            previo = self.guardados.get(ruta)
+        if previo and previo["firma"] == firma:
+            return previo["sha256"]
+        h = hashlib.sha256()
+        with open(ruta, "rb") as f:
+            for bloque in iter(lambda: f.read(1 << 20), b""):
+                h.update(bloque)
+        with self._lock:
+            self.guardados[ruta] = {"firma": firma, "sha256": h.hexdigest()}
+        return h.hexdigest()
+
+
+def huella(etapa, hash_archivo):
+    """Hash de las entradas y del código de la etapa (un archivo ausente también cuenta)."""
+    h = hashlib.sha256(etapa.nombre.encode())
+    for ruta in etapa.codigo + etapa.entradas:
+        h.update(ruta.encode())
+        h.update(hash_archivo(ruta).encode() if os.path.exists(ruta) else b"<ausente>")
+    return h.hexdigest()
+
+
+def construir_etapas(descargar=False, publicar=False):
+    """Define el DAG de la cadena de datos."""
+    codigo_descarga = [os.path.join(DIRECTORIO, "descargar_datasets.py"), os.path.join(RAIZ, "catalogo.py")]
+    # Un único estado de sincronización compartido por las tres descargas
+    estado_sync = descargar_datasets.leer_estado()
+    etapas = []
+    for tabla, archivo, claves in descargar_datasets.TABLAS:
+        estado_sync.setdefault(tabla, {})
+        etapas.append(Etapa(
+            f"descargar:{tabla}",
+            lambda tabla=tabla, archivo=archivo, claves=claves: descargar_datasets.sync_table(
+                tabla, archivo, claves, estado=estado_sync
+            ),
+            salidas=[archivo],
+            codigo=codigo_descarga,
+            siempre=descargar,
+        ))
+
+    entradas_full = [archivo for _, archivo, _ in descargar_datasets.TABLAS]
+    etapas.append(Etapa(
+        "unificar",
+        unificar_datasets.unificar,
+        # El unificador tolera tablas ausentes (cuentan como "<ausente>" en la huella)
+        entradas=entradas_full,
+        salidas=[unificar_datasets.SALIDA],
+        codigo=[os.path.join(DIRECTORIO, "unificar_datasets.py")],
+        depende=[f"descargar:{tabla}" for tabla, _, _ in descargar_datasets.TABLAS],
+    ))
+    etapas.append(Etapa(
+        "limpiar",
+        limpiar_datasets.limpiar,
+        entradas=[limpiar_datasets.ENTRADA],
+        salidas=[limpiar_datasets.SALIDA],
+        codigo=[
+            os.path.join(DIRECTORIO, "limpiar_datasets.py"),
+            os.path.join(DIRECTORIO, "cruzar_catalogos.py"),
+            os.path.join(RAIZ, "coordenadas.py"),
+            os.path.join(RAIZ, "esquema.py"),
+            os.path.join(RAIZ, "validacion.py"),
+        ],
+        depende=["unificar"],
+    ))
+    etapas.append(Etapa(
+        "catalogo",
+        lambda: catalogo.build_catalog(os.path.abspath(limpiar_datasets.SALIDA), force=True),
+        entradas=[limpiar_datasets.SALIDA],
+        salidas=[catalogo.arrow_path_for(limpiar_datasets.SALIDA)],
+        codigo=CODIGO_CATALOGO,
+        depende=["limpiar"],
+    ))
+    if publicar:
+        destino = os.path.join(RAIZ, catalogo.CSV_NAME)
+
+        def _publicar():
+            with atomic_write(destino) as tmp_path:
+                shutil.copyfile(limpiar_datasets.SALIDA, tmp_path)
+            catalogo.build_catalog(destino, force=True)
+
+        etapas.append(Etapa(
+            "publicar",
+            _publicar,
+            entradas=[limpiar_datasets.SALIDA],
+            salidas=[destino, catalogo.arrow_path_for(destino)],
+            codigo=CODIGO_CATALOGO,
+            depende=["limpiar"],
+        ))
+    return etapas
+
+
+def _orden_valido(etapas):
+    """ValueError si una dependencia no existe o si las dependencias forman un ciclo."""
+    nombres = {etapa.nombre for etapa in etapas}
+    for etapa in etapas:
+        for dep in etapa.depende:
+            if dep not in nombres:
+                raise ValueError(f"La etapa '{etapa.nombre}' depende de '{dep}', que no existe.")
+    # Orden topológico (Kahn): las etapas que nunca quedan libres están en un ciclo
+    faltan = {etapa.nombre: set(etapa.depende) for etapa in etapas}
+    libres = [nombre for nombre, deps in faltan.items() if not deps]
+    while libres:
+        hecha = libres.pop()
+        del faltan[hecha]
+        for nombre, deps in faltan.items():
+            if hecha in deps:
+                deps.discard(hecha)
+                if not deps:
+                    libres.append(nombre)
+    if faltan:
+        raise ValueError(f"Las dependencias forman un ciclo entre las etapas: {', '.join(sorted(faltan))}")
+
+
+def ejecutar(etapas, workers=4, forzar=False, ruta_cache=ARCHIVO_CACHE):
+    """Ejecuta el DAG. Devuelve {etapa: 'ok' | 'al día' | 'error' | 'omitida'}."""
+    _orden_valido(etapas)
+    cache = {"etapas": {}, "archivos": {}}
+    if os.path.exists(ruta_cache):
+        with open(ruta_cache, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    hash_archivo = _Hashes(cache.setdefault("archivos", {}))
+    huellas = cache.setdefault("etapas", {})
+
+    por_nombre = {etapa.nombre: etapa for etapa in etapas}
+    pendientes = set(por_nombre)
+    estado = {}
+
+    def correr(etapa):
+        previa = huellas.get(etapa.nombre)
+        actual = huella(etapa, hash_archivo)
+        salidas_ok = all(os.path.exists(salida) for salida in etapa.salidas)
+        if etapa.entradas:
+            al_dia = previa == actual and salidas_ok
+        else:
+            # Sin entradas locales (descargas): vale lo que ya esté en disco
+            al_dia = salidas_ok
+        # --forzar reconstruye todo lo local; las descargas solo con --descargar
+        al_dia = al_dia and not etapa.siempre and not (forzar and etapa.entradas)
+        if al_dia:
+            return "al día", 0.0
+        inicio = time.perf_counter()
+        etapa.funcion()
+        # La huella se recalcula: las entradas pueden haber aparecido durante la ejecución
+        huellas[etapa.nombre] = huella(etapa, hash_archivo)
+        return "ok", time.perf_counter() - inicio
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        en_curso = {}
+        while pendientes or en_curso:
+            for nombre in sorted(pendientes):
+                etapa = por_nombre[nombre]
+                if any(estado.get(dep) in ("error", "omitida") for dep in etapa.depende):
+                    estado[nombre] = "omitida"
+                    pendientes.discard(nombre)
+                    print(f"⏭  {nombre}: omitida (falló una dependencia)")
+                elif all(dep in estado for dep in etapa.depende):
+                    en_curso[pool.submit(correr, etapa)] = nombre
+                    pendientes.discard(nombre)
+            if not en_curso:
+                if not pendientes:
+                    # Las últimas pendientes se acaban de omitir
+                    break
+                # No debería pasar tras _orden_valido; sin esto el bucle giraría para siempre
+                raise RuntimeError(f"No se puede ejecutar ninguna etapa pendiente: {', '.join(sorted(pendientes))}")
+            hechos, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+            for futuro in hechos:
+                nombre = en_curso.pop(futuro)
+                try:
+                    resultado, segundos = futuro.result()
+                    estado[nombre] = resultado
+                    if resultado == "ok":
+                        print(f"✔ {nombre}: ejecutada en {segundos:.2f} s")
+                    else:
+                        print(f"= {nombre}: al día, se salta")
+                except Exception as e:
+                    estado[nombre] = "error"
+                    print(f"❌ {nombre}: {e}")
+
+    with atomic_write(ruta_cache) as tmp_path:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(cache, f, indent=2, sort_keys=True)
+    return estado
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cadena de datos de exoplanetas con caché por contenido.")
+    parser.add_argument("--descargar", action="store_true", help="sincronizar las tablas con la NASA")
+    parser.add_argument("--publicar", action="store_true", help="copiar el catálogo limpio a la raíz del proyecto")
+    parser.add_argument("--forzar", action="store_true", help="ignorar la caché y reconstruir todas las etapas locales")
+    parser.add_argument("--workers", type=int, default=4, help="etapas independientes en paralelo")
+    args = parser.parse_args(argv)
+
+    # Las rutas de los scripts son relativas a esta carpeta
+    os.chdir(DIRECTORIO)
+    inicio = time.perf_counter()
+    estado = ejecutar(construir_etapas(args.descargar, args.publicar), args.workers, args.forzar)
+    print(f"🚀 Pipeline terminada en {time.perf_counter() - inicio:.2f} s")
+    if "error" in estado.values():
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+# sintetico.py
+# Generador de tablas KOI / TOI / K2 sintéticas para medir la cadena de datos.
+#
+# Produce kepler_koi_FULL.csv, tess_toi_FULL.csv y k2_planets_FULL.csv con los
+# nombres de columna reales del Exoplanet Archive, distribuciones plausibles
+# (campo de Kepler, cielo completo de TESS, franja eclíptica de K2) y las mismas
+# proporciones de nulos que las tablas reales. Las filas se generan y escriben
+# por bloques, así que 10M de filas no necesitan 10M de filas en memoria.
+#
+# Uso:
+#   python sintetico.py 100k                 -> tablas en ./sintetico_100k
+#   python sintetico.py 1M --dir /tmp/datos
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from catalogo import atomic_write
+
+TAMAÑOS = ["10k", "100k", "1M", "10M"]
+FILAS_POR_BLOQUE = 250_000
+SEMILLA = 42
+# Se guarda junto a las tablas: si coincide, no hace falta regenerarlas
+MARCADOR = "sintetico.json"
+VERSION = 1
+
+# Proporción de filas de cada catálogo (9564 KOI, 7703 TOI y 4004 K2 en las tablas reales)
+PROPORCIONES = {"KOI": 0.45, "TOI": 0.36, "K2": 0.19}
+
+# Fracción de nulos por columna, medida en las tablas reales
+NULOS = {
+    "KOI": {
+        "kepler_name": 0.72, "koi_teq": 0.038, "koi_prad": 0.038, "koi_steff": 0.038,
+        "koi_srad": 0.038, "koi_insol": 0.034, "koi_slogg": 0.038,
+    },
+    "TOI": {
+        "st_dist": 0.028, "pl_eqt": 0.04, "pl_rade": 0.066, "pl_orbper": 0.014,
+        "st_teff": 0.021, "st_rad": 0.066, "pl_insol": 0.023,
+    },
+    "K2": {
+        "pl_orbper": 0.011, "pl_rade": 0.208, "pl_bmasse": 0.891, "pl_eqt": 0.787,
+        "st_teff": 0.278, "st_rad": 0.032, "st_mass": 0.475, "pl_insol": 0.843,
+        "pl_orbeccen": 0.893, "sy_dist": 0.02,
+    },
+}
+
+
+def parse_tamaño(texto):
+    """'10k' -> 10000, '1M' -> 1000000."""
+    texto = str(texto).strip()
+    multiplicador = {"k": 1_000, "K": 1_000, "m": 1_000_000, "M": 1_000_000}.get(texto[-1:], 1)
+    numero = texto[:-1] if multiplicador != 1 else texto
+    return int(float(numero) * multiplicador)
+
+
+def _filas_por_tabla(filas):
+    koi = int(filas * PROPORCIONES["KOI"])
+    toi = int(filas * PROPORCIONES["TOI"])
+    return {"KOI": koi, "TOI": toi, "K2": filas - koi - toi}
+
+
+def _texto(valores):
+    return pd.Series(valores).astype(str)
+
+
+def _letra(indice):
+    # Dos planetas por estrella: ' b' y ' c'
+    return np.where(np.asarray(indice) % 2 == 0, " b", " c")
+
+
+def _con_errores(df, columnas, rng):
+    # Las tablas FULL traen err1/err2 de cada magnitud: no se usan, pero pesan al parsear
+    for col in columnas:
+        error = np.abs(df[col].to_numpy() * rng.uniform(0.01, 0.1, len(df)))
+        df[f"{col}err1"] = error
+        df[f"{col}err2"] = -error
+    return df
+
+
+def _aplicar_nulos(df, nulos, rng):
+    for col, fraccion in nulos.items():
+        df.loc[rng.random(len(df)) < fraccion, col] = np.nan
+    return df
+
+
+def _fisica(n, rng):
+    """Magnitudes físicas comunes a los tres catálogos."""
+    periodo = rng.lognormal(np.log(10.0), 1.2, n)
+    radio = rng.lognormal(np.log(2.5), 0.7, n)
+    teq = np.clip(rng.normal(900, 400, n), 100, 4000)
+    return {
+        "periodo": periodo,
+        "radio": radio,
+        "teq": teq,
+        "insol": (teq / 278.0) ** 4,
+        "st_teff": np.clip(rng.normal(5600, 800, n), 2500, 12000),
+        "st_rad": rng.lognormal(0.0, 0.3, n),
+        "st_mass": rng.lognormal(0.0, 0.2, n),
+        "st_logg": rng.normal(4.4, 0.2, n),
+        "dist": rng.lognormal(np.log(300.0), 0.9, n),
+    }
+
+
+def bloque_koi(inicio, n, rng):
+    """Filas de la tabla 'cumulative' (campo de Kepler, sin distancia)."""
+    f = _fisica(n, rng)
+    indice = np.arange(inicio, inicio + n)
+    estrella = indice // 2 + 1
+    koi = "K" + _texto(estrella).str.zfill(5) + "." + _texto(indice % 2 + 1).str.zfill(2)
+    df = pd.DataFrame({
+        "kepid": 10_000_000 + estrella,
+        "kepoi_name": koi,
+        "kepler_name": "Kepler-" + _texto(estrella) + _letra(indice),
+        "koi_disposition": rng.choice(["CONFIRMED", "CANDIDATE", "FALSE POSITIVE"], n, p=[0.3, 0.2, 0.5]),
+        "koi_period": f["periodo"],
+        "koi_prad": f["radio"],
+        "koi_teq": f["teq"],
+        "koi_insol": f["insol"],
+        "koi_steff": f["st_teff"],
+        "koi_slogg": f["st_logg"],
+        "koi_srad": f["st_rad"],
+        "ra": rng.uniform(280.0, 301.0, n),
+        "dec": rng.uniform(36.5, 52.5, n),
+    })
+    df = _con_errores(df, ["koi_period", "koi_prad", "koi_steff", "koi_srad"], rng)
+    return _aplicar_nulos(df, NULOS["KOI"], rng)
+
+
+def bloque_toi(inicio, n, rng):
+    """Filas de la tabla 'toi' (cielo completo)."""
+    f = _fisica(n, rng)
+    indice = np.arange(inicio, inicio + n)
+    estrella = indice // 2 + 101
+    planeta = indice % 2 + 1
+    df = pd.DataFrame({
+        "tid": 100_000_000 + estrella,
+        "toi": estrella + planeta / 100.0,
+        "toidisplay": "TOI-" + _texto(estrella) + "." + _texto(planeta).str.zfill(2),
+        "tfopwg_disp": rng.choice(["PC", "CP", "KP", "FP", "APC"], n, p=[0.6, 0.1, 0.1, 0.15, 0.05]),
+        "ra": rng.uniform(0.0, 360.0, n),
+        "dec": np.rad2deg(np.arcsin(rng.uniform(-1.0, 1.0, n))),
+        "pl_orbper": f["periodo"],
+        "pl_rade": f["radio"],
+        "pl_eqt": f["teq"],
+        "pl_insol": f["insol"],
+        "st_teff": f["st_teff"],
+        "st_logg": f["st_logg"],
+        "st_rad": f["st_rad"],
+        "st_dist": f["dist"],
+    })
+    df = _con_errores(df, ["pl_orbper", "pl_rade", "st_teff", "st_dist"], rng)
+    return _aplicar_nulos(df, NULOS["TOI"], rng)
+
+
+def bloque_k2(inicio, n, rng):
+    """Filas de la tabla 'k2pandc' (franja eclíptica, varias referencias por planeta)."""
+    f = _fisica(n, rng)
+    indice = np.arange(inicio, inicio + n)
+    # Dos de cada tres planetas aparecen con dos referencias bibliográficas
+    planeta = (indice * 2) // 3
+    estrella = planeta // 2 + 1
+    df = pd.DataFrame({
+        "pl_name": "K2-" + _texto(estrella) + _letra(planeta),
+        "hostname": "K2-" + _texto(estrella),
+        "pl_refname": "<a refstr=SYNTH_" + _texto(indice) + ">Synthetic et al.</a>",
+        "default_flag": (indice * 2) % 3 != 2,
+        "discoverymethod": rng.choice(["Transit", "Radial Velocity"], n, p=[0.97, 0.03]),
+        "disc_year": rng.integers(2015, 2025, n),
+        "pl_orbper": f["periodo"],
+        "pl_rade": f["radio"],
+        "pl_bmasse": rng.lognormal(np.log(8.0), 1.0, n),
+        "pl_orbeccen": rng.beta(0.9, 3.0, n),
+        "pl_insol": f["insol"],
+        "pl_eqt": f["teq"],
+        "st_teff": f["st_teff"],
+        "st_rad": f["st_rad"],
+        "st_mass": f["st_mass"],
+        "st_logg": f["st_logg"],
+        "ra": rng.uniform(0.0, 360.0, n),
+        "dec": rng.uniform(-25.0, 25.0, n),
+        "sy_dist": f["dist"],
+    })
+    df = _con_errores(df, ["pl_orbper", "pl_rade", "st_teff", "sy_dist"], rng)
+    return _aplicar_nulos(df, NULOS["K2"], rng)
+
+
+# catálogo -> (archivo FULL, generador de bloques)
+TABLAS = {
+    "KOI": ("kepler_koi_FULL.csv", bloque_koi),
+    "TOI": ("tess_toi_FULL.csv", bloque_toi),
+    "K2": ("k2_planets_FULL.csv", bloque_k2),
+}
+
+
+def _marcador(filas, semilla):
+    return {"version": VERSION, "filas": filas, "semilla": semilla}
+
+
+def generar(filas, directorio, semilla=SEMILLA, filas_por_bloque=FILAS_POR_BLOQUE, forzar=False):
+    """Escribe las tres tablas FULL sintéticas en 'directorio'. Devuelve {archivo: filas}."""
+    os.makedirs(directorio, exist_ok=True)
+    ruta_marcador = os.path.join(directorio, MARCADOR)
+    por_tabla = _filas_por_tabla(filas)
+    resultado = {TABLAS[fuente][0]: n for fuente, n in por_tabla.items()}
+    if not forzar and os.path.exists(ruta_marcador):
+        with open(ruta_marcador, "r", encoding="utf-8") as f:
+            if json.load(f) == _marcador(filas, semilla):
+                return resultado
+
+    for i, (fuente, (archivo, bloque)) in enumerate(TABLAS.items()):
+        # Un generador por tabla: el contenido no depende del tamaño de bloque elegido
+        rng = np.random.default_rng([semilla, i])
+        with atomic_write(os.path.join(directorio, archivo)) as tmp_path:
+            for inicio in range(0, max(por_tabla[fuente], 1), filas_por_bloque):
+                n = min(filas_por_bloque, por_tabla[fuente] - inicio)
+                bloque(inicio, n, rng).to_csv(
+                    tmp_path, mode="w" if inicio == 0 else "a", header=inicio == 0,
+                    index=False, float_format="%.6g",
+                )
+
+    with atomic_write(ruta_marcador) as tmp_path:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(_marcador(filas, semilla), f)
+    return resultado
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Genera tablas KOI/TOI/K2 sintéticas.")
+    parser.add_argument("tamaño", help="número de filas en total, p.ej. 10k, 100k, 1M, 10M")
+    parser.add_argument("--dir", help="carpeta de salida (por defecto ./sintetico_<tamaño>)")
+    parser.add_argument("--semilla", type=int, default=SEMILLA)
+    parser.add_argument("--forzar", action="store_true", help="regenerar aunque ya existan")
+    args = parser.parse_args(argv)
+
+    directorio = args.dir or f"sintetico_{args.tamaño}"
+    for archivo, n in generar(parse_tamaño(args.tamaño), directorio, args.semilla, forzar=args.forzar).items():
+        print(f"✔ {os.path.join(directorio, archivo)}: {n} filas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# test_cruzar_catalogos.py
+# Cruce posicional: un grupo nunca junta dos filas del mismo catálogo.
+
+import numpy as np
+import pandas as pd
+
+from cruzar_catalogos import agrupar, crossmatch, parejas_coincidentes
+
+SEGUNDO = 1 / 3600.0
+
+
+def catalogo(filas):
+    """DataFrame a partir de (pl_name, source, desplazamiento en RA en segundos de arco, período)."""
+    return pd.DataFrame(
+        [{"pl_name": nombre, "source": fuente, "ra": 150.0 + arcsec * SEGUNDO, "dec": 0.0, "pl_orbper": periodo}
+         for nombre, fuente, arcsec, periodo in filas]
+    )
+
+
+def test_cadena_se_parte_por_el_koi_mas_cercano():
+    # KOI-a ~ TOI-x (1.5") y TOI-x ~ KOI-b (1.0"): TOI-x se queda con KOI-b
+    df = catalogo([("KOI-a", "KOI", 0.0, 10.0), ("TOI-x", "TOI", 1.5, 10.0), ("KOI-b", "KOI", 2.5, 10.0)])
+    grupo = agrupar(df, parejas_coincidentes(df))
+    assert grupo[1] == grupo[2] != grupo[0]
+
+    resultado = crossmatch(df)
+    assert list(resultado["pl_name"]) == ["KOI-a", "KOI-b"]
+    assert list(resultado["source"]) == ["KOI", "KOI+TOI"]
+    assert resultado["alias"].iloc[1] == "TOI-x"
+
+
+def test_ningun_grupo_repite_catalogo():
+    rng = np.random.default_rng(0)
+    # Muchas filas apiñadas con el mismo período: abundan las cadenas entre catálogos
+    filas = [(f"{fuente}-{i}", fuente, rng.uniform(0, 6), 10.0)
+             for i, fuente in enumerate(rng.choice(["KOI", "TOI", "K2"], size=60))]
+    df = catalogo(filas)
+    grupo = agrupar(df, parejas_coincidentes(df))
+    por_grupo = df.assign(grupo=grupo).groupby("grupo")["source"]
+    assert (por_grupo.nunique() == por_grupo.size()).all()
+    assert (por_grupo.size() > 1).any()
+
+
+def test_mismo_catalogo_o_distinto_periodo_no_se_fusionan():
+    df = catalogo([
+        ("KOI-1", "KOI", 0.0, 10.0), ("KOI-2", "KOI", 0.1, 10.0),   # mismo catálogo
+        ("TOI-9", "TOI", 0.2, 25.0),                                # otro planeta de la misma estrella
+    ])
+    resultado = crossmatch(df)
+    assert list(resultado["pl_name"]) == ["KOI-1", "KOI-2", "TOI-9"]
+    assert resultado["alias"].isna().all()
+
+
+def test_tres_catalogos_en_un_objeto():
+    df = catalogo([("TOI-5.01", "TOI", 0.0, 3.0), ("Kepler-5 b", "KOI", 0.5, 3.001), ("K2-5 b", "K2", 0.8, 3.0)])
+    resultado = crossmatch(df)
+    assert len(resultado) == 1
+    # Valores y nombre canónico según PRIORIDAD_FUENTES (K2, KOI, TOI)
+    assert resultado["pl_name"].iloc[0] == "K2-5 b"
+    assert resultado["source"].iloc[0] == "K2+KOI+TOI"
+    assert resultado["alias"].iloc[0] == "Kepler-5 b;TOI-5.01"
@@ -0,0 +1,83 @@
+# test_pipeline.py
+# DAG de pipeline.py: ciclos rechazados antes de ejecutar nada y etapas al día saltadas.
+
+import os
+
+import pytest
+
+from pipeline import Etapa, ejecutar
+
+
+def _nada():
+    raise AssertionError("no debería ejecutarse ninguna etapa")
+
+
+@pytest.mark.parametrize("depende", [
+    {"a": ["b"], "b": ["a"]},                      # ciclo de dos
+    {"a": ["a"]},                                  # una etapa que depende de sí misma
+    {"a": [], "b": ["a", "d"], "c": ["b"], "d": ["c"]},  # ciclo detrás de una etapa válida
+])
+def test_ciclo_rechazado(tmp_path, depende):
+    etapas = [Etapa(nombre, _nada, depende=deps) for nombre, deps in depende.items()]
+    with pytest.raises(ValueError, match="ciclo"):
+        ejecutar(etapas, ruta_cache=str(tmp_path / "cache.json"))
+
+
+def test_dependencia_inexistente(tmp_path):
+    with pytest.raises(ValueError, match="no existe"):
+        ejecutar([Etapa("a", _nada, depende=["b"])], ruta_cache=str(tmp_path / "cache.json"))
+
+
+@pytest.fixture
+def cadena(tmp_path, monkeypatch):
+    """entrada.txt -> copiar -> copia.txt -> contar -> cuenta.txt, con un registro de ejecuciones."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "entrada.txt").write_text("uno dos tres")
+    ejecutadas = []
+
+    def copiar():
+        ejecutadas.append("copiar")
+        (tmp_path / "copia.txt").write_text((tmp_path / "entrada.txt").read_text())
+
+    def contar():
+        ejecutadas.append("contar")
+        (tmp_path / "cuenta.txt").write_text(str(len((tmp_path / "copia.txt").read_text().split())))
+
+    etapas = [
+        Etapa("copiar", copiar, entradas=["entrada.txt"], salidas=["copia.txt"]),
+        Etapa("contar", contar, entradas=["copia.txt"], salidas=["cuenta.txt"], depende=["copiar"]),
+    ]
+    return tmp_path, etapas, ejecutadas
+
+
+def test_etapas_al_dia_se_saltan(cadena):
+    carpeta, etapas, ejecutadas = cadena
+    assert ejecutar(etapas) == {"copiar": "ok", "contar": "ok"}
+    assert ejecutar(etapas) == {"copiar": "al día", "contar": "al día"}
+    assert ejecutadas == ["copiar", "contar"]
+    assert (carpeta / "cuenta.txt").read_text() == "3"
+
+
+def test_cambio_de_entrada_o_salida_borrada(cadena):
+    carpeta, etapas, ejecutadas = cadena
+    ejecutar(etapas)
+    (carpeta / "entrada.txt").write_text("uno dos tres cuatro")
+    assert ejecutar(etapas) == {"copiar": "ok", "contar": "ok"}
+    assert (carpeta / "cuenta.txt").read_text() == "4"
+
+    os.remove(carpeta / "cuenta.txt")
+    assert ejecutar(etapas) == {"copiar": "al día", "contar": "ok"}
+    assert ejecutadas == ["copiar", "contar"] * 2 + ["contar"]
+
+
+def test_forzar_y_dependencia_fallida(cadena):
+    carpeta, etapas, ejecutadas = cadena
+    ejecutar(etapas)
+    assert ejecutar(etapas, forzar=True) == {"copiar": "ok", "contar": "ok"}
+
+    def falla():
+        raise RuntimeError("sin red")
+
+    etapas[0].funcion = falla
+    (carpeta / "entrada.txt").write_text("otra cosa")
+    assert ejecutar(etapas) == {"copiar": "error", "contar": "omitida"}
@@ -0,0 +1,75 @@
+# test_unificar_datasets.py
+# Unificación por bloques: mismo resultado con cualquier tamaño de bloque y
+# ninguna fila suelta de una tabla que falla a mitad.
+
+import pandas as pd
+import pytest
+
+import unificar_datasets
+
+
+@pytest.fixture
+def tablas(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    n = 300
+    pd.DataFrame({
+        "kepoi_name": [f"K{i % 200:05d}.01" for i in range(n)],   # nombres repetidos
+        "kepler_name": [None] * n,
+        "ra": range(n), "dec": 1.0, "koi_period": 2.0,
+    }).to_csv("kepler_koi_FULL.csv", index=False)
+    pd.DataFrame({
+        "toidisplay": [f"TOI-{i}" if i % 10 else None for i in range(n)],   # filas sin nombre
+        "tid": 1, "ra": 1.0, "dec": 2.0, "st_dist": 3.0,
+    }).to_csv("tess_toi_FULL.csv", index=False)
+    pd.DataFrame({"pl_name": [f"K2-{i} b" for i in range(n)], "ra": 3.0, "dec": 4.0}).to_csv("k2_planets_FULL.csv", index=False)
+    return tmp_path
+
+
+def test_mismo_resultado_con_cualquier_bloque(tablas):
+    salidas = []
+    for filas_por_bloque in (7, 100, 10_000):
+        salida = f"unificado_{filas_por_bloque}.csv"
+        assert unificar_datasets.unificar(salida=salida, filas_por_bloque=filas_por_bloque) == 900
+        salidas.append((tablas / salida).read_bytes())
+    assert salidas[0] == salidas[1] == salidas[2]
+    df = pd.read_csv(tablas / "unificado_7.csv")
+    assert df["source"].value_counts().to_dict() == {"KOI": 300, "TOI": 300, "K2": 300}
+    # Los repetidos se quitan en limpiar_datasets, no aquí
+    assert df["pl_name"].duplicated().sum() > 0
+
+
+def test_tabla_que_falla_a_mitad_no_deja_filas(tablas, monkeypatch):
+    original = unificar_datasets.mapear_bloque
+    bloques = []
+
+    def falla_en_el_tercer_bloque_toi(bloque, esquema):
+        if esquema["fuente"] == "TOI":
+            bloques.append(1)
+            if len(bloques) == 3:
+                raise ValueError("bloque corrupto")
+        return original(bloque, esquema)
+
+    monkeypatch.setattr(unificar_datasets, "mapear_bloque", falla_en_el_tercer_bloque_toi)
+    filas = unificar_datasets.unificar(salida="unificado.csv", filas_por_bloque=50)
+    df = pd.read_csv(tablas / "unificado.csv")
+    assert filas == len(df) == 600
+    assert "TOI" not in set(df["source"])
+    # Sin archivos temporales de la tabla que falló
+    assert sorted(p.name for p in tablas.iterdir()) == [
+        "k2_planets_FULL.csv", "kepler_koi_FULL.csv", "tess_toi_FULL.csv", "unificado.csv"
+    ]
+
+
+def test_cabecera_aunque_falle_la_primera_tabla(tablas, monkeypatch):
+    original = unificar_datasets.mapear_bloque
+
+    def falla_koi(bloque, esquema):
+        if esquema["fuente"] == "KOI":
+            raise ValueError("tabla corrupta")
+        return original(bloque, esquema)
+
+    monkeypatch.setattr(unificar_datasets, "mapear_bloque", falla_koi)
+    assert unificar_datasets.unificar(salida="unificado.csv", filas_por_bloque=50) == 600
+    assert list(pd.read_csv(tablas / "unificado.csv").columns) == (
+        unificar_datasets.COLUMNAS_FINALES_DASH_Y_ANALISIS + [unificar_datasets.COLUMNA_FUENTE]
+    )
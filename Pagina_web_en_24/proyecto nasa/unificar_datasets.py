@@ -1,71 +1,173 @@
 # unificar_datasets.py
 # Script para combinar los datasets FULL y filtrar a las columnas más útiles.
+#
+# Unificación en streaming: de cada tabla FULL se leen solo las columnas que se
+# necesitan (usecols), por bloques de filas (chunksize), se renombran al esquema
+# común de cada catálogo y se van escribiendo a disco. La memoria máxima depende
+# del tamaño del bloque, no del tamaño de las tablas de entrada.
+#
+# Cada tabla se escribe primero en un archivo temporal propio y solo se añade a
+# la salida cuando se ha leído entera: una tabla que falla a mitad no deja
+# filas sueltas. Los nombres repetidos no se quitan aquí (haría falta recordar
+# todos los nombres vistos); lo hace limpiar_datasets.py.
+
+import os
+import shutil
+import sys
 
 import pandas as pd
 import numpy as np
 
+# atomic_write vive en el módulo del catálogo (raíz del proyecto)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from catalogo import atomic_write
+
 # --- ESTRUCTURA DE COLUMNAS ÚTILES (16 columnas) ---
 COLUMNAS_FINALES_DASH_Y_ANALISIS = [
     # 1. UBICACIÓN (3)
-    "ra", "dec", "sy_dist", 
-    
+    "ra", "dec", "sy_dist",
+
     # 2. IDENTIDAD Y COLOR (3)
     "pl_name", "hostname", "pl_eqt",
-    
+
     # 3. PROPIEDADES PLANETARIAS FÍSICAS (3)
     "pl_rade",   # Radio del planeta
     "pl_bmasse", # Masa del planeta
     "pl_orbper", # Período orbital
-    
+
     # 4. PROPIEDADES ESTELARES (3)
     "st_teff",   # Temperatura de la estrella (K)
     "st_mass",   # Masa de la estrella
     "st_rad",    # Radio de la estrella
-    
+
     # 5. CONTEXTO Y HABITABILIDAD (4)
-    "discoverymethod", 
-    "disc_year", 
+    "discoverymethod",
+    "disc_year",
     "pl_insol",  # Flujo de insolación (Métrica de habitabilidad)
     "pl_orbeccen" # Excentricidad orbital
 ]
 
-# Rutas de los archivos FULL generados
-file_paths = ["kepler_koi_FULL.csv", "tess_toi_FULL.csv", "k2_planets_FULL.csv"]
-combined_data = []
+# Además de las 16 columnas se guarda el catálogo de origen de cada fila
+COLUMNA_FUENTE = "source"
+
+# --- ESQUEMA DE CADA CATÁLOGO ---
+# Para cada columna final: nombre de la columna en la tabla FULL, o lista de
+# columnas (se usa la primera que no sea nula). Las columnas que no aparecen
+# quedan en NaN, salvo las de 'constantes'.
+ESQUEMAS = [
+    {
+        "archivo": "kepler_koi_FULL.csv",
+        "fuente": "KOI",
+        "columnas": {
+            "ra": "ra", "dec": "dec",
+            "pl_name": ["kepler_name", "kepoi_name"], "hostname": "kepoi_name",
+            "pl_eqt": "koi_teq", "pl_rade": "koi_prad", "pl_orbper": "koi_period",
+            "st_teff": "koi_steff", "st_rad": "koi_srad", "pl_insol": "koi_insol",
+        },
+        "constantes": {"discoverymethod": "Transit"},
+    },
+    {
+        "archivo": "tess_toi_FULL.csv",
+        "fuente": "TOI",
+        "columnas": {
+            "ra": "ra", "dec": "dec", "sy_dist": "st_dist",
+            "pl_name": "toidisplay", "hostname": "tid",
+            "pl_eqt": "pl_eqt", "pl_rade": "pl_rade", "pl_orbper": "pl_orbper",
+            "st_teff": "st_teff", "st_rad": "st_rad", "pl_insol": "pl_insol",
+        },
+        "constantes": {"discoverymethod": "Transit"},
+    },
+    {
+        "archivo": "k2_planets_FULL.csv",
+        "fuente": "K2",
+        # k2pandc ya usa los nombres del esquema común
+        "columnas": {col: col for col in COLUMNAS_FINALES_DASH_Y_ANALISIS},
+        "constantes": {},
+    },
+]
+
+FILAS_POR_BLOQUE = 50_000
+
+
+def _columnas_origen(esquema):
+    origen = set()
+    for fuente in esquema["columnas"].values():
+        origen.update([fuente] if isinstance(fuente, str) else fuente)
+    return origen
 
-print("Iniciando unificación de bases de datos con filtrado a columnas útiles...")
 
-for file in file_paths:
+def mapear_bloque(bloque, esquema):
+    """Convierte un bloque de una tabla FULL al esquema común (16 columnas + fuente)."""
+    salida = pd.DataFrame(index=bloque.index)
+    for col in COLUMNAS_FINALES_DASH_Y_ANALISIS:
+        fuente = esquema["columnas"].get(col)
+        candidatas = [fuente] if isinstance(fuente, str) else (fuente or [])
+        valores = pd.Series(np.nan, index=bloque.index, dtype=object)
+        for candidata in candidatas:
+            if candidata in bloque.columns:
+                valores = valores.where(valores.notna(), bloque[candidata])
+        if col in esquema["constantes"]:
+            valores = valores.where(valores.notna(), esquema["constantes"][col])
+        salida[col] = valores
+    salida[COLUMNA_FUENTE] = esquema["fuente"]
+    return salida
+
+
+# limpiar_datasets.py lee este archivo y genera exoplanets_visual.csv
+SALIDA = "exoplanets_dataset.csv"
+
+
+def volcar_tabla(esquema, destino, filas_por_bloque=FILAS_POR_BLOQUE, cabecera=True):
+    """Escribe en 'destino' una tabla FULL ya mapeada al esquema común, bloque a bloque. Devuelve sus filas."""
+    necesarias = _columnas_origen(esquema)
+    lector = pd.read_csv(
+        esquema["archivo"], usecols=lambda c: c in necesarias, chunksize=filas_por_bloque, low_memory=False
+    )
+    filas = 0
+    with open(destino, "w", encoding="utf-8", newline="") as f:
+        for bloque in lector:
+            bloque = mapear_bloque(bloque, esquema)
+            bloque.to_csv(f, header=cabecera and filas == 0, index=False)
+            filas += len(bloque)
+        # Una tabla vacía también deja la cabecera (si es la primera)
+        if cabecera and filas == 0:
+            pd.DataFrame(columns=COLUMNAS_FINALES_DASH_Y_ANALISIS + [COLUMNA_FUENTE]).to_csv(f, index=False)
+    return filas
+
+
+def unificar(esquemas=ESQUEMAS, salida=SALIDA, filas_por_bloque=FILAS_POR_BLOQUE):
+    """Unifica las tablas FULL en 'salida' leyendo por bloques. Devuelve el número de filas."""
+    filas = 0
+    with atomic_write(salida) as tmp_path:
+        primera = True
+        for esquema in esquemas:
+            file = esquema["archivo"]
+            parte = f"{tmp_path}.{esquema['fuente']}"
+            try:
+                filas_archivo = volcar_tabla(esquema, parte, filas_por_bloque, cabecera=primera)
+                # La tabla se leyó entera: se añade a la salida
+                with open(parte, "rb") as origen, open(tmp_path, "wb" if primera else "ab") as destino:
+                    shutil.copyfileobj(origen, destino)
+                primera = False
+                filas += filas_archivo
+                print(f"  - Añadido {file}: {filas_archivo} filas (solo se leen {len(_columnas_origen(esquema))} columnas).")
+            except FileNotFoundError:
+                print(f"  - ❌ Archivo {file} no encontrado. Asegúrate de correr el script de descarga primero.")
+            except Exception as e:
+                print(f"  - ❌ Error al procesar {file}: {e} (no se añade ninguna fila suya)")
+            finally:
+                if os.path.exists(parte):
+                    os.remove(parte)
+
+        if primera:
+            raise FileNotFoundError("No se pudo encontrar ninguna base de datos para unificar.")
+    return filas
+
+
+if __name__ == "__main__":
+    print("Iniciando unificación de bases de datos con filtrado a columnas útiles...")
     try:
-        # Cargamos los DataFrames recolectados con todas las columnas
-        df = pd.read_csv(file)
-        combined_data.append(df)
-        print(f"  - Añadido {file} con {len(df.columns)} columnas iniciales.")
+        total = unificar()
+        print(f"✔ Unificación y filtrado finalizado. Creado '{SALIDA}' con {total} filas y {len(COLUMNAS_FINALES_DASH_Y_ANALISIS) + 1} columnas finales y útiles.")
     except FileNotFoundError:
-        print(f"  - ❌ Archivo {file} no encontrado. Asegúrate de correr el script de descarga primero.")
-    except Exception as e:
-        print(f"  - ❌ Error al procesar {file}: {e}")
-
-if combined_data:
-    # 1. Concatenar todos los DataFrames
-    final_df = pd.concat(combined_data, ignore_index=True)
-    
-    # 2. Eliminar duplicados
-    final_df.drop_duplicates(subset=['pl_name'], keep='first', inplace=True)
-    
-    # 3. FILTRADO FINAL: Filtramos para quedarnos SOLAMENTE con las 16 columnas útiles.
-    df_filtrado = pd.DataFrame(index=final_df.index)
-    
-    for col in COLUMNAS_FINALES_DASH_Y_ANALISIS:
-        if col in final_df.columns:
-            df_filtrado[col] = final_df[col]
-        else:
-            # Si una columna esencial no se encontró en la descarga, la rellenamos con NaN
-            df_filtrado[col] = np.nan
-    
-    # 4. Guardar la base de datos final
-    df_filtrado.to_csv("exoplanets_visual.csv", index=False)
-    
-    print(f"✔ Unificación y filtrado finalizado. Creado 'exoplanets_visual.csv' con {len(df_filtrado)} filas y {len(df_filtrado.columns)} columnas finales y útiles.")
-else:
-    print("❌ No se pudo encontrar ninguna base de datos para unificar.")
\ No newline at end of file
+        print("❌ No se pudo encontrar ninguna base de datos para unificar.")
@@ -5,10 +5,19 @@ import plotly.graph_objects as go
 import pandas as pd
 import numpy as np
 from scipy import stats 
+import os
+import sys
+
+# El módulo del catálogo compartido vive en la raíz del proyecto
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import busqueda
+import catalogo
+import coordenadas
+import respuestas
+import validacion
 
 # --- CONSTANTES DE CONVERSIÓN ---
-PC_TO_LY = 3.26156    # 1 parsec = 3.26156 años luz
-PC_TO_AU = 206264.8   # 1 parsec = 206,264.8 UA
+from coordenadas import PC_TO_LY, PC_TO_AU  # pc -> años luz / UA
 DAY_TO_YEAR = 1 / 365.25 # 1 día a años
 
 # --- CONFIGURACIÓN DE LA VISUALIZACIÓN ---
@@ -16,6 +25,7 @@ INTERVALO_ACTUALIZACION_MS = 10000
 CAMERA_INITIAL_DISTANCE = 1500.0 
 CAMERA_SEARCH_ZOOM_FACTOR = 0.05 
 DATA_FILE = "exoplanets_visual.csv"
+OPCIONES_BUSQUEDA = 50  # coincidencias que se muestran en el buscador
 
 # Rango máximo fijo base en parsecs (pc).
 RANGO_MAX_FIJO_PC = 3000.0 
@@ -24,7 +34,8 @@ RANGO_MAX_FIJO_PC = 3000.0
 # Función de Carga de Datos y Conversiones (FILTROS SUAVIZADOS)
 def load_and_prepare_data():
     try:
-        df = pd.read_csv(DATA_FILE)
+        # Catálogo memory-mapped: ya no se re-parsea el CSV en cada callback
+        df = catalogo.load_catalog(DATA_FILE)
     except FileNotFoundError:
         print(f"ERROR: No se encontró el archivo {DATA_FILE}. Usando DataFrame vacío.")
         return pd.DataFrame()
@@ -42,15 +53,9 @@ def load_and_prepare_data():
     
     # LÍNEA CLAVE: Solo se eliminan si NO tienen las coordenadas y el nombre. 
     # Los planetas sin 'pl_eqt' (temperatura) se mantienen.
-    df = df.dropna(subset=['ra', 'dec', 'sy_dist', 'pl_name'])
-    
-    # Se mantienen los filtros de rangos físicos básicos
-    df = df[df['sy_dist'] > 0.01] 
-    df = df[(df['ra'] >= 0) & (df['ra'] <= 360)] 
-    df = df[(df['dec'] >= -90) & (df['dec'] <= 90)] 
-    
-    # Filtro de T° de la ESTRELLA (se mantiene, es útil)
-    df = df[(df['st_teff'] >= 1000) & (df['st_teff'] <= 10000)]
+    # Rangos físicos básicos (distancia, RA, Dec y T° de la ESTRELLA): ver
+    # validacion.REGLAS_VISUALIZACION. El catálogo trae la máscara precalculada.
+    df = df[validacion.mascara_valida(df)]
     
     # Filtro de T° del planeta (COMENTADO para incluir más planetas)
     # df = df[(df['pl_eqt'] >= 100) & (df['pl_eqt'] <= 3000)] 
@@ -66,17 +71,21 @@ def load_and_prepare_data():
         return pd.DataFrame()
 
     # 2. CONVERSIONES
-    df['sy_dist_ly'] = df['sy_dist'] * PC_TO_LY
-    df['sy_dist_au'] = df['sy_dist'] * PC_TO_AU
+    # (las distancias y coordenadas 3D se escalan a la unidad elegida en update_graph)
     df['pl_orbper_yr'] = df['pl_orbper'] * DAY_TO_YEAR
 
-    # 3. CÁLCULO DE ÁNGULOS
-    df['ra_rad'] = np.deg2rad(df['ra'])
-    df['dec_rad'] = np.deg2rad(df['dec'])
-
     df = df.reset_index(drop=True)
     return df
 
+# Índice de nombres de los planetas que se dibujan (los de load_and_prepare_data,
+# ya con la máscara de validez): el buscador no ofrece planetas que no están en
+# la gráfica. Se construye una vez por versión del catálogo.
+def _construir_indice():
+    df = load_and_prepare_data()
+    return busqueda.IndiceNombres(df['pl_name'] if 'pl_name' in df.columns else [])
+
+indice_nombres = respuestas.PorVersion(_construir_indice, lambda: catalogo.version(DATA_FILE))
+
 # Inicializar Dash
 app = dash.Dash(__name__)
 
@@ -125,21 +134,26 @@ app.layout = html.Div(style={'backgroundColor': '#111111', 'color': 'white', 'pa
     ),
 ])
 
-# --- CALLBACK 1: ACTUALIZAR DATOS Y OPCIONES DE BÚSQUEDA ---
+# --- CALLBACK 1: OPCIONES DE BÚSQUEDA A MEDIDA QUE SE ESCRIBE ---
+# Solo se envían al navegador las coincidencias del índice de nombres de los
+# planetas dibujados (indice_nombres), no todos los pl_name.
 @app.callback(
-    [Output('planet-dropdown', 'options'),
-     Output('planet-dropdown', 'value')],
-    [Input('interval-component', 'n_intervals'),
-     Input('planet-dropdown', 'value')] 
+    Output('planet-dropdown', 'options'),
+    [Input('planet-dropdown', 'search_value')],
+    [State('planet-dropdown', 'value')]
 )
-def update_dropdown_options(n, current_value):
-    df = load_and_prepare_data()
-    if df.empty:
-        return [], None
-    options = [{'label': name, 'value': name} for name in df['pl_name'].unique()]
-    if current_value is not None and current_value not in df['pl_name'].unique():
-        current_value = None
-    return options, current_value
+def update_dropdown_options(search_value, current_value):
+    names = []
+    if search_value:
+        try:
+            results = indice_nombres.obtener().buscar(search_value, OPCIONES_BUSQUEDA)
+        except FileNotFoundError:
+            results = []
+        names = [nombre for nombre, _ in results]
+    # El valor seleccionado debe seguir entre las opciones o Dash lo borra
+    if current_value is not None and current_value not in names:
+        names.insert(0, current_value)
+    return [{'label': name, 'value': name} for name in names]
 
 # --- CALLBACK 2: GENERAR GRÁFICA Y PERSISTENCIA DE CÁMARA (CORREGIDO) ---
 @app.callback(
@@ -164,26 +178,23 @@ def update_graph(selected_planet_name, n, selected_unit, relayout_data, current_
 
     # --- DETERMINAR LAS UNIDADES Y LA COLUMNA DE DISTANCIA ---
     if selected_unit == 'pc':
-        dist_col = 'sy_dist'
         unit_name = 'pc'
         factor_conversion = 1.0
     elif selected_unit == 'ly':
-        dist_col = 'sy_dist_ly'
         unit_name = 'al' 
         factor_conversion = PC_TO_LY
     elif selected_unit == 'au':
-        dist_col = 'sy_dist_au'
         unit_name = 'UA' 
         factor_conversion = PC_TO_AU
     else: # Fallback
-        dist_col = 'sy_dist'
+        selected_unit = 'pc'
         unit_name = 'pc'
         factor_conversion = 1.0
 
-    # *** CÁLCULO DE COORDENADAS 3D DINÁMICO ***
-    df['x'] = df[dist_col] * np.cos(df['dec_rad']) * np.cos(df['ra_rad'])
-    df['y'] = df[dist_col] * np.cos(df['dec_rad']) * np.sin(df['ra_rad'])
-    df['z'] = df[dist_col] * np.sin(df['dec_rad'])
+    # *** COORDENADAS 3D: precalculadas en el catálogo (pc), solo se escalan ***
+    dist_col = 'dist'
+    df[dist_col] = df['sy_dist'] * factor_conversion
+    df['x'], df['y'], df['z'] = coordenadas.cartesianas(df, selected_unit)
     
     # Rango de los ejes ajustado a la unidad seleccionada
     RANGO_MAX_DINAMICO = RANGO_MAX_FIJO_PC * factor_conversion
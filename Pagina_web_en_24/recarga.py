@@ -0,0 +1,117 @@
+# recarga.py
+# Recarga en caliente de los artefactos que sirven las apps (modelo y catálogo).
+#
+# Un hilo de fondo mira cada pocos segundos la firma (mtime, tamaño) de los
+# archivos vigilados. Cuando una firma cambia y se mantiene igual en la
+# siguiente comprobación (la escritura terminó), llama a la función 'recargar'
+# de ese artefacto en el mismo hilo: la función carga la versión nueva, la
+# valida y la cambia de una sola asignación. Si falla, se sigue sirviendo la
+# anterior y se vuelve a intentar cuando los archivos cambien otra vez. Las
+# peticiones nunca esperan a una carga.
+#
+# El hilo se arranca en el primer uso de cada proceso (también en los workers
+# de prefork.py, que no heredan los hilos del padre).
+
+import os
+import threading
+import time
+import traceback
+
+INTERVALO_S = 2.0
+
+
+def firma(rutas):
+    """(mtime_ns, tamaño) de cada ruta; None para las que no existen."""
+    resultado = []
+    for ruta in rutas:
+        try:
+            info = os.stat(ruta)
+            resultado.append((info.st_mtime_ns, info.st_size))
+        except OSError:
+            resultado.append(None)
+    return tuple(resultado)
+
+
+class _Tarea:
+    def __init__(self, nombre, rutas, recargar):
+        self.nombre = nombre
+        self.rutas = list(rutas)
+        self.recargar = recargar
+        self.firma = firma(self.rutas)
+        self.pendiente = None
+
+
+class Vigilante:
+    """Hilo que recarga cada artefacto registrado cuando cambian sus archivos."""
+
+    def __init__(self, intervalo=INTERVALO_S):
+        self.intervalo = intervalo
+        self._tareas = []
+        self._lock = threading.Lock()
+        self._hilo = None
+        self._pid = None
+        self.recargas = 0
+        self.fallos = 0
+
+    def agregar(self, nombre, rutas, recargar):
+        """Vigila 'rutas'; al cambiar se llama a 'recargar()' desde el hilo de fondo.
+
+        'recargar' lanza una excepción si la versión nueva no es válida, y puede
+        devolver False si no había nada nuevo que publicar.
+        """
+        with self._lock:
+            self._tareas.append(_Tarea(nombre, rutas, recargar))
+
+    def asegurar(self):
+        """Arranca el hilo si no está corriendo en este proceso."""
+        if self._hilo is not None and self._pid == os.getpid() and self._hilo.is_alive():
+            return
+        with self._lock:
+            if self._hilo is None or self._pid != os.getpid() or not self._hilo.is_alive():
+                self._pid = os.getpid()
+                self._hilo = threading.Thread(target=self._bucle, name="recarga", daemon=True)
+                self._hilo.start()
+
+    def comprobar(self):
+        """Una pasada sobre todos los artefactos (la que hace el hilo en cada intervalo)."""
+        with self._lock:
+            tareas = list(self._tareas)
+        for tarea in tareas:
+            actual = firma(tarea.rutas)
+            if actual == tarea.firma:
+                tarea.pendiente = None
+                continue
+            if actual != tarea.pendiente:
+                # Todavía se está escribiendo: se espera a que deje de cambiar
+                tarea.pendiente = actual
+                continue
+            inicio = time.perf_counter()
+            try:
+                cambio = tarea.recargar()
+            except Exception:
+                self.fallos += 1
+                print(f"⚠️ No se pudo recargar {tarea.nombre}; se mantiene la versión anterior:")
+                traceback.print_exc()
+            else:
+                # False: mismo contenido (p.ej. archivos reescritos sin cambios)
+                if cambio is not False:
+                    self.recargas += 1
+                    print(f"🔄 {tarea.nombre} recargado en {time.perf_counter() - inicio:.2f} s (pid {os.getpid()})")
+            # La recarga puede reescribir los archivos vigilados (p.ej. el .arrow)
+            tarea.firma = firma(tarea.rutas)
+            tarea.pendiente = None
+
+    def _bucle(self):
+        while True:
+            time.sleep(self.intervalo)
+            self.comprobar()
+
+
+def vigilar(app, vigilante):
+    """Arranca 'vigilante' con la primera petición que atienda cada proceso de la app Flask."""
+
+    @app.before_request
+    def _recarga():
+        vigilante.asegurar()
+
+    return vigilante
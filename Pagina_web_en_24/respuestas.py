@@ -0,0 +1,169 @@
+# respuestas.py
+# Respuestas HTTP precalculadas para los endpoints que sirven el catálogo.
+#
+# El JSON de /exoplanets solo cambia cuando cambia el catálogo, así que se
+# serializa y comprime (gzip y, si está instalado, brotli) una vez por versión
+# y se guarda como bytes. Cada petición solo elige la codificación, y si el
+# cliente ya tiene esa versión (If-None-Match con el mismo ETag) recibe un 304
+# sin cuerpo.
+#
+# Formato columnar binario (FORMATO_BINARIO), para que el navegador envuelva
+# las columnas en Float32Array / Int32Array sin parsear nada:
+#   bytes 0-3    "EXO1"
+#   bytes 4-7    longitud L de la cabecera (uint32 little-endian)
+#   bytes 8-8+L  cabecera JSON UTF-8, rellenada con espacios hasta múltiplo de 4
+#   resto        columnas contiguas de 'filas' valores de 4 bytes little-endian
+# Cabecera: {"filas": n, "columnas": [{"nombre", "tipo", "offset", "cadenas"?}]}
+# 'offset' cuenta desde el final de la cabecera (byte 8+L). Las columnas numéricas
+# van como float32 (NaN = nulo); las de texto como int32 con el índice en su
+# lista "cadenas" (-1 = nulo).
+
+import gzip
+import hashlib
+import json
+import threading
+
+import numpy as np
+import pandas as pd
+from flask import Response, request
+
+from metricas import fase
+
+try:
+    import brotli
+except ImportError:  # opcional: sin brotli se sirve gzip
+    brotli = None
+
+FORMATO_BINARIO = "application/x-exoplanets-columnar"
+MAGIA_BINARIO = b"EXO1"
+# Cabecera con la versión de los datos con la que se construyó la respuesta
+CABECERA_VERSION = "X-Data-Version"
+
+
+def registros_json(df):
+    """JSON (bytes) con una lista de objetos por fila; NaN y <NA> se envían como null."""
+    df = df.copy(deep=False)
+    for col in df.columns:
+        if df[col].dtype == np.float32:
+            # float(np.float32(2.26)) es 2.259999990463257: se pasa por el texto
+            # más corto del float32 para que el JSON lleve 2.26
+            df[col] = df[col].to_numpy().astype(str).astype(np.float64)
+    return df.to_json(orient="records").encode("utf-8")
+
+
+def columnar_binario(df):
+    """Bytes de 'df' en el formato columnar binario descrito arriba."""
+    columnas, datos, offset = [], [], 0
+    for col in df.columns:
+        serie = df[col]
+        if pd.api.types.is_numeric_dtype(serie):
+            valores = serie.to_numpy(dtype="<f4", na_value=np.nan)
+            meta = {"nombre": col, "tipo": "float32", "offset": offset}
+        else:
+            # Tabla de cadenas: cada valor distinto una sola vez
+            codigos, unicos = pd.factorize(serie)
+            valores = codigos.astype("<i4")
+            meta = {"nombre": col, "tipo": "int32", "offset": offset, "cadenas": [str(v) for v in unicos]}
+        columnas.append(meta)
+        datos.append(valores.tobytes())
+        offset += len(datos[-1])
+
+    cabecera = json.dumps({"filas": len(df), "columnas": columnas}).encode("utf-8")
+    cabecera += b" " * (-len(cabecera) % 4)
+    return MAGIA_BINARIO + len(cabecera).to_bytes(4, "little") + cabecera + b"".join(datos)
+
+
+def sobre_json(datos_json, **campos):
+    """Objeto JSON (bytes) con 'campos' y la lista ya serializada 'datos_json' bajo "datos"."""
+    cabecera = json.dumps(campos).encode("utf-8")
+    return cabecera[:-1] + (b', "datos": ' if campos else b'"datos": ') + datos_json + b"}"
+
+
+class PorVersion:
+    """Valor derivado de los datos que solo se recalcula cuando cambia su versión.
+
+    'construir' calcula el valor; 'version' devuelve algo que cambia cuando
+    cambian los datos (p.ej. catalogo.version). Se conservan las dos últimas
+    versiones: mientras una recarga en segundo plano precalcula la nueva, las
+    peticiones siguen sirviendo la anterior sin reconstruirla.
+    """
+
+    def __init__(self, construir, version):
+        self._construir = construir
+        self._version = version
+        self._lock = threading.Lock()
+        # versión -> valor (como máximo dos); se reemplaza entero, nunca se modifica
+        self._valores = {}
+
+    def obtener_con_version(self):
+        """(versión, valor) para la versión actual de los datos."""
+        version = self._version()
+        valores = self._valores
+        if version in valores:
+            return version, valores[version]
+        with self._lock:
+            if version not in self._valores:
+                anterior = list(self._valores.items())[-1:]
+                self._valores = dict(anterior + [(version, self._construir())])
+            return version, self._valores[version]
+
+    def obtener(self):
+        return self.obtener_con_version()[1]
+
+    def precalcular(self):
+        """Construye el valor ya (p.ej. al arrancar) en lugar de en la primera petición."""
+        self.obtener()
+
+
+class RespuestaPrecalculada:
+    """Cuerpo serializado y comprimido una sola vez por versión de los datos.
+
+    'construir' devuelve los bytes del cuerpo (JSON por defecto, o el tipo
+    'mimetype'); solo se vuelve a llamar (y a comprimir) cuando cambia 'version'.
+    """
+
+    def __init__(self, construir, version, mimetype="application/json"):
+        self._construir = construir
+        self.mimetype = mimetype
+        self._cache = PorVersion(self._comprimir, version)
+
+    def _comprimir(self):
+        with fase("serializar"):
+            crudo = self._construir()
+        with fase("comprimir"):
+            # ETag fuerte: hash del contenido, distinto por codificación
+            base = hashlib.sha256(crudo).hexdigest()[:32]
+            cuerpos = {
+                "identity": (crudo, base),
+                "gzip": (gzip.compress(crudo, compresslevel=9, mtime=0), base + "-gzip"),
+            }
+            if brotli is not None:
+                cuerpos["br"] = (brotli.compress(crudo, quality=11), base + "-br")
+        return cuerpos
+
+    def precalcular(self):
+        """Construye el cuerpo ya (p.ej. al arrancar) en lugar de en la primera petición."""
+        self._cache.precalcular()
+
+    def responder(self):
+        """Respuesta para la petición actual de Flask: 200 con el cuerpo comprimido o 304."""
+        version, cuerpos = self._cache.obtener_con_version()
+        codificacion = "identity"
+        for candidata in ("br", "gzip"):
+            if candidata in cuerpos and request.accept_encodings[candidata]:
+                codificacion = candidata
+                break
+        cuerpo, etag = cuerpos[codificacion]
+
+        if request.if_none_match.contains_weak(etag):
+            respuesta = Response(status=304)
+        else:
+            respuesta = Response(cuerpo, mimetype=self.mimetype)
+            if codificacion != "identity":
+                respuesta.headers["Content-Encoding"] = codificacion
+        respuesta.set_etag(etag)
+        respuesta.headers["Vary"] = "Accept-Encoding"
+        # El navegador puede guardarla, pero debe revalidar (barato: 304) en cada sondeo
+        respuesta.headers["Cache-Control"] = "no-cache"
+        respuesta.headers[CABECERA_VERSION] = str(version)
+        return respuesta
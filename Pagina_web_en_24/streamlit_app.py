@@ -1,15 +1,78 @@
 import streamlit as st
 import pandas as pd
-import joblib
+import hashlib
 import os
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
+import busqueda
+import catalogo
+import coordenadas
+import prediccion
+import recarga
+import validacion
 
 st.set_page_config(page_title="Exoplanet Simulator and Classifier", layout="wide")
 
 # Base dir para cargar assets (style.css)
 base_dir = os.path.dirname(__file__)
+
+
+@st.cache_resource
+def _cargar_modelo(directorio, firma):
+    # 'firma' (mtime y tamaño de los archivos) hace que se recargue al reentrenar
+    return prediccion.Modelo(directorio)
+
+
+def cargar_modelo():
+    """Clasificador de ML/ (paquete modelo.exo o los .joblib), cargado una vez por versión."""
+    directorio = os.path.join(base_dir, "ML")
+    return _cargar_modelo(directorio, recarga.firma(prediccion.rutas_modelo(directorio)))
+
+
+@st.cache_resource
+def _cache_predicciones():
+    # Compartida entre sesiones; se vacía sola cuando cambia la versión del modelo
+    return prediccion.CachePredicciones()
+
+
+def predecir_fila(modelo, features):
+    """Clase predicha para una fila de features, desde la caché si ya se pidió."""
+    return _cache_predicciones().predecir(modelo, features)[0]
+
+
+# Coincidencias que se muestran en los buscadores de la pestaña 3D
+OPCIONES_BUSQUEDA = 50
+
+
+@st.cache_resource
+def _indice_nombres(firma, _nombres):
+    # '_nombres' no se hashea (empieza por '_'): 'firma' decide si se reconstruye
+    posiciones = {}
+    for i, nombre in enumerate(_nombres):
+        if not pd.isna(nombre):
+            posiciones.setdefault(str(nombre), i)
+    return busqueda.IndiceNombres(_nombres), posiciones
+
+
+def indice_nombres(nombres):
+    """IndiceNombres de una columna y nombre -> primera posición, una vez por contenido."""
+    nombres = nombres.reset_index(drop=True)
+    firma = hashlib.sha256(pd.util.hash_pandas_object(nombres, index=False).to_numpy().tobytes()).hexdigest()
+    return _indice_nombres(firma, nombres)
+
+
+def buscador(etiqueta, nombres, key, vacio, contenedor=st):
+    """Caja de búsqueda (prefijo y aproximada) y desplegable con las coincidencias.
+
+    Devuelve el nombre elegido y su posición en 'nombres' (None si no hay).
+    """
+    indice, posiciones = indice_nombres(nombres)
+    texto = contenedor.text_input(etiqueta, key=f"{key}_texto")
+    opciones = [nombre for nombre, _ in indice.buscar(texto, OPCIONES_BUSQUEDA)] if texto.strip() else []
+    elegido = contenedor.selectbox("Matches", options=[vacio] + opciones, key=key)
+    return elegido, posiciones.get(elegido)
+
 style_path = os.path.join(base_dir, "style.css")
 css = ""
 if os.path.exists(style_path):
@@ -184,7 +247,7 @@ def generate_fallback_reply(user_text: str) -> str:
     if "csv" in t or "data" in t:
         return "The expected data file is at 'Pagina_web_en_24/ML/exoplanets_visual.csv'. If it doesn't exist, copy the CSV there or update the path in the code."
     if "model" in t or "predict" in t:
-        return "To enable ML predictions you need 'exoplanet_classifier.joblib', 'scaler.joblib' and 'label_encoder.joblib' in the ML/ folder. If they're not there, the form will still allow adding exoplanets but without prediction."
+        return "To enable ML predictions you need the model bundle 'modelo.exo' (created by ML/ML.py) or 'exoplanet_classifier.joblib', 'scaler.joblib' and 'label_encoder.joblib' in the ML/ folder. If they're not there, the form will still allow adding exoplanets but without prediction."
     return "I can help you with: how to use the 2D/3D simulators, how to add exoplanets, or how to prepare ML files. Ask a specific question or write 'help'."
 
 
@@ -221,7 +284,7 @@ if page == "2D Simulator":
     data_path = os.path.join(base_dir, "ML", "exoplanets_visual.csv")
     if os.path.exists(data_path):
         try:
-            df = pd.read_csv(data_path)
+            df = catalogo.load_catalog(data_path)
         except Exception as e:
             st.error(f"Error leyendo el CSV en {data_path}: {e}")
             df = pd.DataFrame()
@@ -268,14 +331,11 @@ if page == "2D Simulator":
     exo_df = st.session_state.exo_df
 
     # Intentar cargar modelos (opcional) para predicción al añadir
-    model, scaler, encoder = None, None, None
     try:
-        model = joblib.load(os.path.join(base_dir, "ML", "exoplanet_classifier.joblib"))
-        scaler = joblib.load(os.path.join(base_dir, "ML", "scaler.joblib"))
-        encoder = joblib.load(os.path.join(base_dir, "ML", "label_encoder.joblib"))
+        modelo_ml = cargar_modelo()
     except Exception:
         # no hay modelo disponible; la sección de clasificación seguirá funcionando en su propio tab
-        model = scaler = encoder = None
+        modelo_ml = None
 
     # Move controls to the sidebar so main content can use full width
     with st.sidebar.expander("Add new exoplanet", expanded=False):
@@ -317,11 +377,9 @@ if page == "2D Simulator":
                     time0bk,
                 ]
                 pred_label = None
-                if model is not None and scaler is not None and encoder is not None:
+                if modelo_ml is not None:
                     try:
-                        Xs = scaler.transform([features])
-                        p = model.predict(Xs)
-                        pred_label = encoder.inverse_transform(p)[0]
+                        pred_label = predecir_fila(modelo_ml, features)
                     except Exception as e:
                         st.sidebar.error(f"Error al predecir: {e}")
 
@@ -429,8 +487,8 @@ elif page == "3D Simulator":
     )
 
     # Constantes de conversión
-    PC_TO_LY = 3.26156
-    PC_TO_AU = 206264.8
+    PC_TO_LY = coordenadas.PC_TO_LY
+    PC_TO_AU = coordenadas.PC_TO_AU
     DAY_TO_YEAR = 1 / 365.25
     CAMERA_INITIAL_DISTANCE = 1.0
     CAMERA_SEARCH_ZOOM_FACTOR = 0.05
@@ -443,12 +501,12 @@ elif page == "3D Simulator":
         fallback_csv = os.path.join(base_dir, "ML", "exoplanets_visual.csv")
         if os.path.exists(project_csv):
             try:
-                df3 = pd.read_csv(project_csv)
+                df3 = catalogo.load_catalog(project_csv)
             except Exception:
                 df3 = pd.DataFrame()
         elif os.path.exists(fallback_csv):
             try:
-                df3 = pd.read_csv(fallback_csv)
+                df3 = catalogo.load_catalog(fallback_csv)
             except Exception:
                 df3 = pd.DataFrame()
 
@@ -458,46 +516,26 @@ elif page == "3D Simulator":
         )
     else:
         # Cargar modelos ML si están disponibles (misma lógica que en otras pestañas)
-        model3, scaler3, encoder3 = None, None, None
         try:
-            model3 = joblib.load(
-                os.path.join(base_dir, "ML", "exoplanet_classifier.joblib")
-            )
-            scaler3 = joblib.load(os.path.join(base_dir, "ML", "scaler.joblib"))
-            encoder3 = joblib.load(os.path.join(base_dir, "ML", "label_encoder.joblib"))
+            modelo3 = cargar_modelo()
         except Exception:
-            model3 = scaler3 = encoder3 = None
+            modelo3 = None
 
         # Move 3D controls and ML forms to the sidebar so the 3D canvas can fill the page
         with st.sidebar.expander("Controls & ML Classifier", expanded=False):
             st.subheader("Controls & ML Classifier")
 
-            required_features = [
-                "koi_model_snr",
-                "koi_prad",
-                "koi_sma",
-                "koi_teq",
-                "koi_period",
-                "koi_duration",
-                "koi_depth",
-                "koi_steff",
-                "koi_slogg",
-                "koi_srad",
-                "koi_time0bk",
-            ]
+            # Las 11 columnas KOI en el orden con el que se entrenó el modelo
+            required_features = [columna for _, columna in prediccion.CARACTERISTICAS]
             can_batch_predict = (
-                model3 is not None
-                and scaler3 is not None
-                and encoder3 is not None
+                modelo3 is not None
                 and all(feat in df3.columns for feat in required_features)
             )
             if can_batch_predict:
                 if st.button("Predict ML classification for entire dataset"):
                     try:
                         X_batch = df3[required_features].fillna(0).astype(float).values
-                        Xs_batch = scaler3.transform(X_batch)
-                        preds = model3.predict(Xs_batch)
-                        df3["pred_class"] = encoder3.inverse_transform(preds)
+                        df3["pred_class"] = modelo3.predecir(X_batch)[0]
                         st.session_state["exo_df"] = df3
                         st.success(
                             "Batch prediction completed: 'pred_class' column added to dataset."
@@ -509,9 +547,9 @@ elif page == "3D Simulator":
                     except Exception as e:
                         st.error(f"Error en predicción por lote: {e}")
             else:
-                if model3 is None:
+                if modelo3 is None:
                     st.info(
-                        "ML model not found in ML/. Place exoplanet_classifier.joblib, scaler.joblib and label_encoder.joblib in the ML/ folder."
+                        "ML model not found in ML/. Run ML/ML.py to create ML/modelo.exo (or place exoplanet_classifier.joblib, scaler.joblib and label_encoder.joblib in the ML/ folder)."
                     )
 
             st.markdown("---")
@@ -567,9 +605,9 @@ elif page == "3D Simulator":
                 ml_submitted = st.form_submit_button("Predict class (ML)")
 
             if ml_submitted:
-                if model3 is None or scaler3 is None or encoder3 is None:
+                if modelo3 is None:
                     st.error(
-                        "ML model not found in ML/. Place exoplanet_classifier.joblib, scaler.joblib and label_encoder.joblib in the ML/ folder."
+                        "ML model not found in ML/. Run ML/ML.py to create ML/modelo.exo (or place exoplanet_classifier.joblib, scaler.joblib and label_encoder.joblib in the ML/ folder)."
                     )
                 else:
                     features3 = [
@@ -588,9 +626,7 @@ elif page == "3D Simulator":
                         ]
                     ]
                     try:
-                        Xs3 = scaler3.transform(features3)
-                        p3 = model3.predict(Xs3)
-                        pred_label3 = encoder3.inverse_transform(p3)[0]
+                        pred_label3 = predecir_fila(modelo3, features3)
                         st.success(f"Prediction: {pred_label3}")
                         if add_to_plot:
                             new_name = f"ML_added_{len(st.session_state.exo_df) + 1}"
@@ -615,10 +651,12 @@ elif page == "3D Simulator":
 
             st.markdown("---")
             st.subheader("Select / Information")
-            options3 = df3["hostname"].fillna(df3["pl_name"]).astype(str).tolist()
-            selected3 = st.selectbox(
+            # Solo las coincidencias de la búsqueda, no un desplegable con todo el catálogo
+            selected3, _ = buscador(
                 "Select an exoplanet to view details",
-                options=options3 if options3 else ["-"],
+                df3["hostname"].fillna(df3["pl_name"]),
+                key="selected3",
+                vacio="-",
             )
 
         # Main 3D area: compact header and sidebar slider for marker size
@@ -655,46 +693,36 @@ elif page == "3D Simulator":
         for col in ["ra", "dec", "sy_dist", "st_teff", "pl_orbper", "pl_eqt"]:
             df3[col] = pd.to_numeric(df3[col], errors="coerce")
 
-        # Filtrado suave similar al proyecto
-        df3 = df3.dropna(subset=["ra", "dec", "sy_dist", "pl_name"])
-        df3 = df3[df3["sy_dist"] > 0.01]
-        df3 = df3[(df3["ra"] >= 0) & (df3["ra"] <= 360)]
-        df3 = df3[(df3["dec"] >= -90) & (df3["dec"] <= 90)]
-        df3 = df3[(df3["st_teff"] >= 1000) & (df3["st_teff"] <= 10000)]
+        # Filtrado suave similar al proyecto (mismas reglas que el Dash; la
+        # máscara viene precalculada en el catálogo salvo para filas añadidas)
+        df3 = df3[validacion.mascara_valida(df3)]
 
         # Units and controls
         st.sidebar.subheader("Controls - NASA Project")
         unit = st.sidebar.selectbox("Units", options=["pc", "ly", "au"], index=0)
-        planet_options = sorted(df3["pl_name"].dropna().unique().tolist())
-        planet_sel = st.sidebar.selectbox(
-            "Search exoplanet by name", options=["(none)"] + planet_options
+        # Índice de los planetas que se dibujan (df3 ya filtrado) y nombre -> fila
+        planet_sel, planet_pos = buscador(
+            "Search exoplanet by name",
+            df3["pl_name"],
+            key="planet_sel",
+            vacio="(none)",
+            contenedor=st.sidebar,
         )
         unit_name = "pc"
         if unit == "pc":
-            dist_col = "sy_dist"
             unit_name = "pc"
             factor_conversion = 1.0
         elif unit == "ly":
-            dist_col = "sy_dist_ly" if "sy_dist_ly" in df3.columns else "sy_dist"
             unit_name = "al"
             factor_conversion = PC_TO_LY
-            if "sy_dist_ly" not in df3.columns:
-                df3["sy_dist_ly"] = df3["sy_dist"] * PC_TO_LY
         else:
-            dist_col = "sy_dist_au" if "sy_dist_au" in df3.columns else "sy_dist"
             unit_name = "UA"
             factor_conversion = PC_TO_AU
-            if "sy_dist_au" not in df3.columns:
-                df3["sy_dist_au"] = df3["sy_dist"] * PC_TO_AU
-
-        # Convertir a radianes
-        df3["ra_rad"] = np.deg2rad(df3["ra"])
-        df3["dec_rad"] = np.deg2rad(df3["dec"])
 
-        # Calcular coordenadas 3D
-        df3["x"] = df3[dist_col] * np.cos(df3["dec_rad"]) * np.cos(df3["ra_rad"])
-        df3["y"] = df3[dist_col] * np.cos(df3["dec_rad"]) * np.sin(df3["ra_rad"])
-        df3["z"] = df3[dist_col] * np.sin(df3["dec_rad"])
+        # Coordenadas 3D precalculadas en el catálogo (pc): solo se escalan a la unidad
+        dist_col = "dist"
+        df3[dist_col] = df3["sy_dist"] * factor_conversion
+        df3["x"], df3["y"], df3["z"] = coordenadas.cartesianas(df3, unit)
 
         # Rango dinámico
         RANGO_MAX_DINAMICO = RANGO_MAX_FIJO_PC * factor_conversion
@@ -728,8 +756,8 @@ elif page == "3D Simulator":
         fig_data_highlight = []
 
         # If a planet was selected, center and highlight
-        if planet_sel and planet_sel != "(none)":
-            sel_row = df3[df3["pl_name"] == planet_sel]
+        if planet_sel and planet_sel != "(none)" and planet_pos is not None:
+            sel_row = df3.iloc[[planet_pos]]
             if not sel_row.empty:
                 x_t = sel_row["x"].iloc[0]
                 y_t = sel_row["y"].iloc[0]
@@ -961,9 +989,7 @@ elif page == "Clasificador ML":
     try:
         # Cargar modelos usando rutas relativas al archivo para mayor robustez
         base_dir = os.path.dirname(__file__)
-        model = joblib.load(os.path.join(base_dir, "ML", "exoplanet_classifier.joblib"))
-        scaler = joblib.load(os.path.join(base_dir, "ML", "scaler.joblib"))
-        encoder = joblib.load(os.path.join(base_dir, "ML", "label_encoder.joblib"))
+        modelo = cargar_modelo()
         st.subheader("Introduce los datos del exoplaneta:")
         # Los 11 features en orden:
         # koi_model_snr, koi_prad, koi_sma, koi_teq, koi_period, koi_duration, koi_depth, koi_steff, koi_slogg, koi_srad, koi_time0bk
@@ -1020,9 +1046,7 @@ elif page == "Clasificador ML":
                     koi_time0bk,
                 ]
             ]
-            X_scaled = scaler.transform(features)
-            pred = model.predict(X_scaled)
-            clase = encoder.inverse_transform(pred)
-            st.success(f"Predicción: {clase[0]}")
+            clase = predecir_fila(modelo, features)
+            st.success(f"Predicción: {clase}")
     except Exception as e:
         st.error(f"Error cargando el modelo o scaler: {e}")
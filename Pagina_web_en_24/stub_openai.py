@@ -0,0 +1,76 @@
+# stub_openai.py
+# Servidor local que imita POST /v1/chat/completions de la API de OpenAI.
+#
+# Sirve para probar /chat y /chat/stream de app.py sin clave ni red:
+#   python stub_openai.py --puerto 8001 --retraso 0.05
+#   OPENAI_API_KEY=stub OPENAI_BASE_URL=http://127.0.0.1:8001/v1 python app.py
+# Responde repitiendo la pregunta palabra por palabra; --retraso simula la
+# latencia entre tokens.
+
+import argparse
+import json
+import time
+import uuid
+
+from flask import Flask, Response, jsonify, request
+
+app = Flask(__name__)
+RETRASO_S = 0.0
+
+
+def _respuesta(mensajes):
+    pregunta = next((m["content"] for m in reversed(mensajes) if m.get("role") == "user"), "")
+    return f"Stub answer about exoplanets to: {pregunta}"
+
+
+def _fragmento(id_, modelo, delta, fin=None):
+    return {
+        "id": id_,
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": modelo,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": fin}],
+    }
+
+
+@app.route("/v1/chat/completions", methods=["POST"])
+def chat_completions():
+    datos = request.get_json()
+    modelo = datos.get("model", "stub")
+    texto = _respuesta(datos.get("messages", []))
+    id_ = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+
+    if not datos.get("stream"):
+        time.sleep(RETRASO_S * len(texto.split()))
+        return jsonify({
+            "id": id_,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": modelo,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": texto},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": len(texto.split()), "total_tokens": len(texto.split())},
+        })
+
+    def eventos():
+        yield f"data: {json.dumps(_fragmento(id_, modelo, {'role': 'assistant', 'content': ''}))}\n\n"
+        for i, palabra in enumerate(texto.split(" ")):
+            time.sleep(RETRASO_S)
+            contenido = palabra if i == 0 else " " + palabra
+            yield f"data: {json.dumps(_fragmento(id_, modelo, {'content': contenido}))}\n\n"
+        yield f"data: {json.dumps(_fragmento(id_, modelo, {}, 'stop'))}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return Response(eventos(), mimetype="text/event-stream")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor local compatible con /v1/chat/completions.")
+    parser.add_argument("--puerto", type=int, default=8001)
+    parser.add_argument("--retraso", type=float, default=0.0, help="segundos entre tokens")
+    args = parser.parse_args()
+    RETRASO_S = args.retraso
+    app.run(host="127.0.0.1", port=args.puerto, threaded=True)
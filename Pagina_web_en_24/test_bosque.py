@@ -0,0 +1,47 @@
+# test_bosque.py
+# El bosque compilado (bosque.py) debe dar exactamente lo mismo que sklearn.
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+
+from bosque import FILAS_POR_BLOQUE, BosquePlano
+
+
+@pytest.fixture(scope="module")
+def datos():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(600, 11))
+    # Tres clases con fronteras no lineales, para que los árboles sean profundos
+    y = (X[:, 0] + X[:, 1] ** 2 + rng.normal(scale=0.5, size=600) > 1).astype(int) + (X[:, 2] > 1)
+    return X, np.array(["FALSE POSITIVE", "CANDIDATE", "CONFIRMED"])[y]
+
+
+@pytest.mark.parametrize("max_depth", [3, None])
+def test_igual_que_sklearn(datos, max_depth):
+    X, y = datos
+    modelo = RandomForestClassifier(n_estimators=25, max_depth=max_depth, random_state=0).fit(X, y)
+    bosque = BosquePlano.desde_sklearn(modelo)
+    # Más filas que un bloque, para recorrer varios
+    nuevas = np.random.default_rng(1).normal(size=(FILAS_POR_BLOQUE + 37, 11))
+    np.testing.assert_array_equal(bosque.predict_proba(nuevas), modelo.predict_proba(nuevas))
+    np.testing.assert_array_equal(bosque.predict(nuevas), modelo.predict(nuevas))
+
+
+def test_una_fila_y_ninguna(datos):
+    X, y = datos
+    modelo = RandomForestClassifier(n_estimators=10, random_state=0).fit(X, y)
+    bosque = BosquePlano.desde_sklearn(modelo)
+    np.testing.assert_array_equal(bosque.predict_proba(X[:1]), modelo.predict_proba(X[:1]))
+    assert bosque.hojas(X[:0]).shape == (0, 10)
+
+
+def test_rechaza_filas_invalidas(datos):
+    X, y = datos
+    bosque = BosquePlano.desde_sklearn(RandomForestClassifier(n_estimators=5, random_state=0).fit(X, y))
+    with pytest.raises(ValueError):
+        bosque.predict_proba(X[:, :10])
+    con_nan = X[:2].copy()
+    con_nan[0, 0] = np.nan
+    with pytest.raises(ValueError):
+        bosque.predict_proba(con_nan)
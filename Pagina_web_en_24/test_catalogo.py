@@ -0,0 +1,33 @@
+# test_catalogo.py
+# Las columnas que calcula el catálogo (valido, x_pc...) no salen en /exoplanets.
+
+import json
+
+import pandas as pd
+
+import catalogo
+import respuestas
+
+
+def test_registros_solo_con_columnas_del_csv(tmp_path):
+    csv_path = tmp_path / "exoplanets_visual.csv"
+    pd.DataFrame({
+        "pl_name": ["Kepler-22 b", "Sin distancia"],
+        "hostname": ["Kepler-22", "X"],
+        "ra": [289.2, 10.0],
+        "dec": [47.9, -5.0],
+        "sy_dist": [190.0, None],
+        "pl_rade": [2.38, 1.0],
+    }).to_csv(csv_path, index=False)
+    cabecera = list(pd.read_csv(csv_path, nrows=0).columns)
+
+    # El catálogo sí las tiene para los visores...
+    completo = catalogo.load_catalog(str(csv_path))
+    assert set(catalogo.COLUMNAS_DERIVADAS) <= set(completo.columns)
+
+    # ...pero la respuesta de /exoplanets lleva exactamente las del CSV
+    assert catalogo.columnas_csv(str(csv_path)) == cabecera
+    df = catalogo.load_catalog(str(csv_path), columns=catalogo.columnas_csv(str(csv_path)))
+    registros = json.loads(respuestas.registros_json(df))
+    assert [list(registro) for registro in registros] == [cabecera, cabecera]
+    assert registros[0]["pl_rade"] == 2.38 and registros[1]["sy_dist"] is None
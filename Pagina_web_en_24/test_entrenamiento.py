@@ -0,0 +1,74 @@
+# test_entrenamiento.py
+# Partición entrenamiento/prueba por hash de kepoi_name y caché de preparar().
+
+import numpy as np
+import pandas as pd
+
+import entrenamiento
+from prediccion import CARACTERISTICAS
+
+FEATURES = [columna for _, columna in CARACTERISTICAS]
+
+
+def koi(nombres, semilla=0):
+    rng = np.random.default_rng(semilla)
+    df = pd.DataFrame(rng.normal(size=(len(nombres), len(FEATURES))), columns=FEATURES)
+    df.insert(0, entrenamiento.IDENTIFICADOR, nombres)
+    df[entrenamiento.OBJETIVO] = rng.choice(["CONFIRMED", "CANDIDATE", "FALSE POSITIVE"], size=len(nombres))
+    return df
+
+
+def lado_de_prueba(csv_path, directorio):
+    """Nombre -> si la fila quedó en prueba (el CSV no tiene NaN: filas en el mismo orden)."""
+    datos = entrenamiento.preparar(str(csv_path), str(directorio))
+    nombres = pd.read_csv(csv_path)[entrenamiento.IDENTIFICADOR].to_numpy()
+    en_prueba = np.zeros(len(nombres), dtype=bool)
+    en_prueba[datos.prueba] = True
+    return datos, dict(zip(nombres, en_prueba))
+
+
+def test_particion_completa_y_proporcion(tmp_path):
+    csv_path = tmp_path / "koi.csv"
+    koi([f"K{i:05d}.01" for i in range(3000)]).to_csv(csv_path, index=False)
+    datos, _ = lado_de_prueba(csv_path, tmp_path / "cache")
+    todas = np.concatenate([datos.entrenamiento, datos.prueba])
+    assert sorted(todas) == list(range(3000))
+    assert abs(len(datos.prueba) / 3000 - entrenamiento.PORCENTAJE_PRUEBA / 100) < 0.03
+
+
+def test_filas_nuevas_no_cambian_de_lado_a_las_antiguas(tmp_path):
+    antiguas = koi([f"K{i:05d}.01" for i in range(1000)])
+    antiguas.to_csv(tmp_path / "v1.csv", index=False)
+    # Versión siguiente: filas nuevas, otro orden y otras features para las de siempre
+    nuevas = pd.concat([koi([f"K{i:05d}.01" for i in range(1000)], semilla=1), koi([f"N{i:05d}.01" for i in range(500)], semilla=2)])
+    nuevas.sample(frac=1, random_state=0).to_csv(tmp_path / "v2.csv", index=False)
+
+    _, antes = lado_de_prueba(tmp_path / "v1.csv", tmp_path / "cache")
+    _, despues = lado_de_prueba(tmp_path / "v2.csv", tmp_path / "cache")
+    assert all(despues[nombre] == lado for nombre, lado in antes.items())
+
+
+def test_preparar_reutiliza_la_cache(tmp_path, monkeypatch):
+    csv_path = tmp_path / "koi.csv"
+    koi([f"K{i:05d}.01" for i in range(200)]).to_csv(csv_path, index=False)
+    primera = entrenamiento.preparar(str(csv_path), str(tmp_path / "cache"))
+
+    def sin_leer(*args, **kwargs):
+        raise AssertionError("el CSV no debería volver a leerse")
+
+    monkeypatch.setattr(entrenamiento.pd, "read_csv", sin_leer)
+    segunda = entrenamiento.preparar(str(csv_path), str(tmp_path / "cache"))
+    assert segunda.directorio == primera.directorio
+    np.testing.assert_array_equal(segunda.prueba, primera.prueba)
+    np.testing.assert_array_equal(segunda.X, primera.X)
+
+
+def test_sin_identificador_particiona_por_contenido(tmp_path):
+    df = koi([f"K{i:05d}.01" for i in range(500)]).drop(columns=[entrenamiento.IDENTIFICADOR])
+    df.to_csv(tmp_path / "a.csv", index=False)
+    df.iloc[::-1].to_csv(tmp_path / "b.csv", index=False)
+    a = entrenamiento.preparar(str(tmp_path / "a.csv"), str(tmp_path / "cache"))
+    b = entrenamiento.preparar(str(tmp_path / "b.csv"), str(tmp_path / "cache"))
+    # Mismas filas en prueba aunque el CSV venga en otro orden
+    assert len(a.prueba) > 0
+    assert sorted(map(bytes, np.asarray(a.X)[a.prueba])) == sorted(map(bytes, np.asarray(b.X)[b.prueba]))
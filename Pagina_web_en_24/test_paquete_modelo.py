@@ -0,0 +1,69 @@
+# test_paquete_modelo.py
+# Ida y vuelta del paquete ML/modelo.exo y rechazo de archivos que no encajan.
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+import paquete_modelo
+from prediccion import CARACTERISTICAS
+
+
+@pytest.fixture(scope="module")
+def entrenado():
+    rng = np.random.default_rng(0)
+    X = rng.normal(loc=50, scale=20, size=(400, len(CARACTERISTICAS)))
+    etiquetas = np.where(X[:, 0] + rng.normal(scale=10, size=400) > 50, "CONFIRMED", "FALSE POSITIVE")
+    encoder = LabelEncoder().fit(etiquetas)
+    scaler = StandardScaler().fit(X)
+    model = RandomForestClassifier(n_estimators=15, max_depth=6, random_state=0)
+    model.fit(scaler.transform(X), encoder.transform(etiquetas))
+    return X, model, scaler, encoder
+
+
+@pytest.fixture
+def ruta(tmp_path, entrenado):
+    _, model, scaler, encoder = entrenado
+    paquete = paquete_modelo.PaqueteModelo.desde_sklearn(model, scaler, encoder, CARACTERISTICAS, {"accuracy": 0.9})
+    ruta = str(tmp_path / paquete_modelo.NOMBRE)
+    paquete_modelo.guardar(paquete, ruta)
+    return ruta
+
+
+def test_ida_y_vuelta(ruta, entrenado):
+    X, model, scaler, encoder = entrenado
+    paquete = paquete_modelo.cargar(ruta, CARACTERISTICAS)
+    np.testing.assert_array_equal(paquete.predict_proba(X), model.predict_proba(scaler.transform(X)))
+    assert paquete.predecir(X) == list(encoder.inverse_transform(model.predict(scaler.transform(X))))
+    assert paquete.caracteristicas == CARACTERISTICAS
+    assert paquete.metricas == {"accuracy": 0.9}
+    # Abierto con memory-mapping (solo lectura), sin copiar los arrays
+    assert not paquete.bosque.umbral2.flags.writeable
+
+
+def test_version_depende_solo_del_contenido(ruta, tmp_path):
+    otra = str(tmp_path / "copia.exo")
+    paquete_modelo.guardar(paquete_modelo.cargar(ruta), otra)
+    assert paquete_modelo.leer_cabecera(otra)["version"] == paquete_modelo.leer_cabecera(ruta)["version"]
+
+
+def test_rechaza_otro_esquema(ruta):
+    otras = list(reversed(CARACTERISTICAS))
+    with pytest.raises(ValueError, match="otras features"):
+        paquete_modelo.cargar(ruta, otras)
+
+
+def test_rechaza_marca_formato_y_truncado(ruta, tmp_path):
+    with open(ruta, "rb") as f:
+        datos = f.read()
+    casos = {
+        "marca": b"NOPE" + datos[4:],
+        "formato": datos.replace(b'"formato": 1', b'"formato": 9', 1),
+        "truncado": datos[:-200],
+    }
+    for nombre, contenido in casos.items():
+        malo = tmp_path / f"{nombre}.exo"
+        malo.write_bytes(contenido)
+        with pytest.raises(ValueError):
+            paquete_modelo.cargar(str(malo))
@@ -0,0 +1,102 @@
+# test_respuestas.py
+# Formato columnar EXO1 y respuestas precalculadas con ETag / 304.
+
+import gzip
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from flask import Flask
+
+import respuestas
+
+
+def leer_binario(cuerpo):
+    """DataFrame a partir de los bytes de columnar_binario (como lo lee el navegador)."""
+    assert cuerpo[:4] == respuestas.MAGIA_BINARIO
+    largo = int.from_bytes(cuerpo[4:8], "little")
+    cabecera = json.loads(cuerpo[8:8 + largo])
+    inicio = 8 + largo
+    # Las columnas empiezan alineadas a 4 bytes (Float32Array / Int32Array)
+    assert inicio % 4 == 0
+    columnas = {}
+    for col in cabecera["columnas"]:
+        assert col["offset"] % 4 == 0
+        valores = np.frombuffer(cuerpo, dtype="<f4" if col["tipo"] == "float32" else "<i4",
+                                count=cabecera["filas"], offset=inicio + col["offset"])
+        if col["tipo"] == "int32":
+            valores = [col["cadenas"][i] if i >= 0 else None for i in valores]
+        columnas[col["nombre"]] = valores
+    return cabecera, columnas
+
+
+def test_binario_ida_y_vuelta():
+    df = pd.DataFrame({
+        "ra": np.array([10.5, np.nan, 300.25], dtype=np.float32),
+        "pl_rade": pd.array([1.0, None, 2.5], dtype="Float64"),
+        "hostname": ["Kepler-22", None, "Kepler-22"],
+    })
+    cabecera, columnas = leer_binario(respuestas.columnar_binario(df))
+    assert cabecera["filas"] == 3
+    np.testing.assert_array_equal(columnas["ra"], df["ra"].to_numpy())
+    np.testing.assert_array_equal(columnas["pl_rade"], np.array([1.0, np.nan, 2.5], dtype=np.float32))
+    assert columnas["hostname"] == ["Kepler-22", None, "Kepler-22"]
+    # Cada cadena distinta una sola vez
+    assert [c for c in cabecera["columnas"] if c["nombre"] == "hostname"][0]["cadenas"] == ["Kepler-22"]
+
+
+def test_binario_vacio():
+    cabecera, columnas = leer_binario(respuestas.columnar_binario(pd.DataFrame({"ra": np.array([], dtype=np.float32)})))
+    assert cabecera["filas"] == 0 and len(columnas["ra"]) == 0
+
+
+@pytest.fixture
+def servidor():
+    version = {"actual": 1}
+    construidas = []
+
+    def construir():
+        construidas.append(version["actual"])
+        return json.dumps([{"version": version["actual"]}] * 50).encode("utf-8")
+
+    app = Flask(__name__)
+    precalculada = respuestas.RespuestaPrecalculada(construir, lambda: version["actual"])
+    app.add_url_rule("/datos", "datos", precalculada.responder)
+    return app.test_client(), version, construidas
+
+
+def test_etag_y_304(servidor):
+    cliente, _, construidas = servidor
+    primera = cliente.get("/datos", headers={"Accept-Encoding": "identity"})
+    assert primera.status_code == 200 and primera.headers["ETag"]
+    assert primera.headers[respuestas.CABECERA_VERSION] == "1"
+
+    repetida = cliente.get("/datos", headers={"Accept-Encoding": "identity", "If-None-Match": primera.headers["ETag"]})
+    assert repetida.status_code == 304 and repetida.data == b""
+    assert repetida.headers["ETag"] == primera.headers["ETag"]
+    # Se serializa una vez por versión, no por petición
+    assert construidas == [1]
+
+
+def test_gzip_tiene_su_propio_etag(servidor):
+    cliente, _, _ = servidor
+    plana = cliente.get("/datos", headers={"Accept-Encoding": "identity"})
+    comprimida = cliente.get("/datos", headers={"Accept-Encoding": "gzip"})
+    assert comprimida.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(comprimida.data) == plana.data
+    assert comprimida.headers["ETag"] != plana.headers["ETag"]
+    # El ETag de una codificación no vale para la otra
+    cruzada = cliente.get("/datos", headers={"Accept-Encoding": "gzip", "If-None-Match": plana.headers["ETag"]})
+    assert cruzada.status_code == 200
+
+
+def test_nueva_version_cambia_el_etag(servidor):
+    cliente, version, construidas = servidor
+    antes = cliente.get("/datos", headers={"Accept-Encoding": "identity"})
+    version["actual"] = 2
+    despues = cliente.get("/datos", headers={"Accept-Encoding": "identity", "If-None-Match": antes.headers["ETag"]})
+    assert despues.status_code == 200
+    assert despues.headers["ETag"] != antes.headers["ETag"]
+    assert despues.headers[respuestas.CABECERA_VERSION] == "2"
+    assert construidas == [1, 2]
@@ -0,0 +1,92 @@
+# validacion.py
+# Motor único de validación/filtrado del catálogo.
+#
+# Los filtros físicos (distancia > 0.01 pc, RA 0-360, Dec ±90, T° estelar
+# 1000-10000 K...) se declaran una sola vez como reglas. 'evaluar' los compila
+# en una única máscara booleana recorriendo cada columna una vez, sin crear
+# DataFrames intermedios, y cuenta cuántas filas rechaza cada regla.
+#
+# El catálogo guarda el resultado en la columna 'valido' al construirse, así
+# que los frontends solo aplican esa máscara en lugar de refiltrar.
+
+import numpy as np
+import pandas as pd
+
+COLUMNA_VALIDO = "valido"
+
+
+class Regla:
+    """Condición sobre una columna: no nula y, opcionalmente, dentro de [minimo, maximo]."""
+
+    def __init__(self, nombre, columna, minimo=None, maximo=None, minimo_estricto=False):
+        self.nombre = nombre
+        self.columna = columna
+        self.minimo = minimo
+        self.maximo = maximo
+        self.minimo_estricto = minimo_estricto
+
+    def mascara(self, df):
+        if self.columna not in df.columns:
+            return np.zeros(len(df), dtype=bool)
+        serie = df[self.columna]
+        if self.minimo is None and self.maximo is None:
+            return serie.notna().to_numpy()
+        valores = pd.to_numeric(serie, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+        # Las comparaciones con NaN son False: un valor nulo nunca cumple un rango
+        ok = ~np.isnan(valores)
+        if self.minimo is not None:
+            ok &= valores > self.minimo if self.minimo_estricto else valores >= self.minimo
+        if self.maximo is not None:
+            ok &= valores <= self.maximo
+        return ok
+
+
+# Reglas de limpiar_datasets.py: sin coordenadas o distancia no hay posición 3D
+REGLAS_LIMPIEZA = [
+    Regla("ra presente", "ra"),
+    Regla("dec presente", "dec"),
+    Regla("sy_dist > 0", "sy_dist", minimo=0.0, minimo_estricto=True),
+]
+
+# Reglas de los visores 3D (Dash y Streamlit)
+REGLAS_VISUALIZACION = [
+    Regla("pl_name presente", "pl_name"),
+    Regla("sy_dist > 0.01", "sy_dist", minimo=0.01, minimo_estricto=True),
+    Regla("ra en [0, 360]", "ra", minimo=0, maximo=360),
+    Regla("dec en [-90, 90]", "dec", minimo=-90, maximo=90),
+    Regla("st_teff en [1000, 10000]", "st_teff", minimo=1000, maximo=10000),
+]
+
+
+def evaluar(df, reglas=REGLAS_VISUALIZACION):
+    """Máscara de filas válidas y número de filas rechazadas por cada regla."""
+    valido = np.ones(len(df), dtype=bool)
+    rechazos = {}
+    for regla in reglas:
+        ok = regla.mascara(df)
+        rechazos[regla.nombre] = int(len(ok) - np.count_nonzero(ok))
+        valido &= ok
+    return valido, rechazos
+
+
+def mascara_valida(df, reglas=REGLAS_VISUALIZACION):
+    """Máscara de filas válidas reutilizando la columna precalculada 'valido'.
+
+    Las reglas solo se evalúan en las filas sin valor precalculado (p.ej. los
+    exoplanetas añadidos a mano desde el simulador).
+    """
+    if COLUMNA_VALIDO not in df.columns:
+        return evaluar(df, reglas)[0]
+    precalculado = df[COLUMNA_VALIDO]
+    faltan = precalculado.isna().to_numpy()
+    if not faltan.any():
+        return precalculado.to_numpy(dtype=bool)
+    valido = precalculado.fillna(False).to_numpy(dtype=bool)
+    valido[faltan] = evaluar(df[faltan], reglas)[0]
+    return valido
+
+
+def resumen(rechazos, total):
+    """Texto con las filas rechazadas por cada regla."""
+    lineas = [f"  - {nombre}: {n} filas rechazadas" for nombre, n in rechazos.items()]
+    return f"Validación de {total} filas:\n" + "\n".join(lineas)